@@ -0,0 +1,178 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from frames import CENTS, concat_frames, dollar_frame
+
+logger = logging.getLogger(__name__)
+
+HIGH_TICKET_THRESHOLD = 500
+
+TRANSACTION_COLUMNS = ['Date', 'Description', 'Amount', 'Category']
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """``df.to_dict('records')`` without boxing every date as a Timestamp.
+
+    Dates come back as plain datetimes, which serialize the same way.
+    """
+    columns = list(df.columns)
+    values = []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series) and not series.isna().any():
+            # DatetimeArray.to_pydatetime returns an ndarray and, unlike Series.dt's, isn't deprecated
+            values.append(series.array.to_pydatetime().tolist())
+        else:
+            values.append(series.tolist())
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+class SpendingAggregates:
+    """Running totals behind the upload response, folded in one frame or chunk at a time.
+
+    Input frames are canonical (see frames.py), so totals are summed in whole
+    cents and converted to dollars only on the way out.
+    Category totals, monthly spending and high-ticket items are exact. Per-category
+    transaction lists keep every row unless ``max_rows_per_category`` is set, in
+    which case only the most recent rows are retained so memory stays bounded.
+    """
+
+    def __init__(self, max_rows_per_category: Optional[int] = None):
+        self.max_rows_per_category = max_rows_per_category
+        self.row_count = 0
+        self._category_totals = defaultdict(float)
+        self._monthly = {}
+        self._high_ticket = []
+        self._by_category = defaultdict(list)
+        self._by_category_rows = defaultdict(int)
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Fold a categorized frame with Date, Description, Amount and Category columns.
+
+        Everything is computed in one vectorized pass: categories and months are
+        factorized once, totals come from ``np.bincount`` over those codes, and the
+        expense rows are sorted a single time (by category, newest first) and then
+        sliced per category instead of being masked and re-sorted for each one.
+        """
+        if df.empty:
+            return
+        self.row_count += len(df)
+
+        amounts = df['Amount'].to_numpy(dtype=np.int64)
+        # Cents as floats are exact well past any realistic total, and bincount needs float weights
+        magnitudes = np.abs(amounts).astype(float)
+        codes, categories = pd.factorize(df['Category'], sort=True, use_na_sentinel=False)
+        categories = categories.tolist()
+        expense = amounts < 0
+
+        totals = np.bincount(codes[expense], weights=magnitudes[expense], minlength=len(categories))
+        for category, total in zip(categories, totals.tolist()):
+            if total:
+                self._category_totals[category] += total
+
+        # Months as datetime64[M] codes; only the distinct months are formatted as strings
+        month_codes, months = pd.factorize(df['Date'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]'), sort=True)
+        months = np.datetime_as_string(np.asarray(months, dtype='datetime64[M]'), unit='M').tolist()
+        dated = month_codes >= 0
+        cells = month_codes[dated] * len(categories) + codes[dated]
+        size = len(months) * len(categories)
+        pivot = np.bincount(cells, weights=magnitudes[dated], minlength=size).reshape(len(months), len(categories))
+        present = np.bincount(cells, minlength=size).reshape(pivot.shape)
+        for m, c in zip(*np.nonzero(present)):
+            self._monthly.setdefault(months[m], defaultdict(float))[categories[c]] += float(pivot[m, c])
+
+        high_ticket = (magnitudes > HIGH_TICKET_THRESHOLD * CENTS) & (df['Category'] != 'Income').to_numpy()
+        if high_ticket.any():
+            rows = df[high_ticket]
+            self._high_ticket.extend(pd.DataFrame({
+                'Description': rows['Description'].astype(object),
+                'Amount': magnitudes[high_ticket] / CENTS,
+                'Category': rows['Category'].astype(object),
+                'Date': rows['Date'].dt.strftime('%Y-%m-%d')
+            }).to_dict('records'))
+
+        positions = np.flatnonzero(expense)
+        if len(positions):
+            expense_codes = codes[positions]
+            dates = df['Date'].to_numpy()[positions]
+            # Category ascending, then date descending; lexsort is stable so ties keep file order
+            order = positions[np.lexsort((-dates.view('int64'), expense_codes))]
+            ordered = df.iloc[order]
+            sorted_codes = codes[order]
+            bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+            for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(order)]):
+                self._add_rows(categories[sorted_codes[start]], [ordered.iloc[start:stop]], stop - start)
+
+    def merge(self, other: 'SpendingAggregates') -> None:
+        """Fold another accumulator (e.g. one file's chunks) into this one."""
+        self.row_count += other.row_count
+        for category, total in other._category_totals.items():
+            self._category_totals[category] += total
+        for month, categories in other._monthly.items():
+            for category, total in categories.items():
+                self._monthly.setdefault(month, defaultdict(float))[category] += total
+        self._high_ticket.extend(other._high_ticket)
+        for category, frames in other._by_category.items():
+            self._add_rows(category, frames, other._by_category_rows[category])
+
+    def category_data(self) -> List[Dict[str, Any]]:
+        return [
+            {'Category': category, 'Amount': total / CENTS}
+            for category, total in sorted(self._category_totals.items())
+        ]
+
+    def transactions_by_category(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {category: frame_records(dollar_frame(self._recent(category))) for category in sorted(self._by_category)}
+
+    def transactions_frame(self) -> pd.DataFrame:
+        """The expense rows of ``transactions_by_category`` as one compact frame in dollars, ordered by category."""
+        frames = [self._recent(category)[TRANSACTION_COLUMNS] for category in sorted(self._by_category)]
+        return dollar_frame(concat_frames(frames)) if frames else pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    def monthly_spending(self) -> Dict[str, Dict[str, float]]:
+        return {
+            month: {category: total / CENTS for category, total in categories.items()}
+            for month, categories in sorted(self._monthly.items())
+        }
+
+    def high_ticket_items(self) -> List[Dict[str, Any]]:
+        return list(self._high_ticket)
+
+    def summary(self) -> Dict[str, Any]:
+        """Category totals, per-category transactions, monthly pivot and high-ticket items together."""
+        return {
+            'category_data': self.category_data(),
+            'transactions_by_category': self.transactions_by_category(),
+            'monthly_spending': self.monthly_spending(),
+            'high_ticket_items': self.high_ticket_items()
+        }
+
+    def _add_rows(self, category: str, frames: List[pd.DataFrame], rows: int) -> None:
+        self._by_category[category].extend(frames)
+        self._by_category_rows[category] += rows
+        # Trim lazily so a run of small chunks doesn't re-sort on every update
+        if self.max_rows_per_category and self._by_category_rows[category] > 2 * self.max_rows_per_category:
+            trimmed = self._recent(category)
+            self._by_category[category] = [trimmed]
+            self._by_category_rows[category] = len(trimmed)
+
+    def _recent(self, category: str) -> pd.DataFrame:
+        frames = self._by_category[category]
+        combined = frames[0] if len(frames) == 1 else concat_frames(frames)
+        # A single slice from ``update`` is already newest first
+        if not combined['Date'].is_monotonic_decreasing:
+            combined = combined.sort_values('Date', ascending=False, kind='stable')
+        if self.max_rows_per_category:
+            combined = combined.head(self.max_rows_per_category)
+        return combined
+
+
+def aggregate_frame(df: pd.DataFrame, max_rows_per_category: Optional[int] = None) -> SpendingAggregates:
+    """Aggregate a whole categorized frame in a single pass."""
+    aggregates = SpendingAggregates(max_rows_per_category=max_rows_per_category)
+    aggregates.update(df)
+    return aggregates
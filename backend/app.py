@@ -1,213 +1,256 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, current_app, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from werkzeug.utils import secure_filename
 import os
-from datetime import datetime
-import openai
 from dotenv import load_dotenv
 import json
-import pdfplumber
-import tabula
-import re
-from typing import List, Dict, Any
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import traceback
 import logging
+import re
+import time
+from aggregation import SpendingAggregates, aggregate_frame
+from categorization import TieredCategorizer
+from frames import canonical_frame, category_column, concat_frames, to_dollars
+from goals import goal_analysis
+from ingestion import iter_statement_chunks, parse_statement, parse_statements
+from jobs import JobCheckpoint, JobQueue
+from llm import LLMExecutor
+from llm_backends import create_backend
+from local_categorizer import KeywordMatcher, LocalClassifier
+from merchant_cache import MerchantCategoryCache
+from metrics import HTTP_SECONDS, PROMETHEUS_CONTENT_TYPE, REGISTRY, end_trace, span, start_trace
+from prompt_cache import PromptCache, prompt_fingerprint
+from responses import (ARROW_STREAM_TYPE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, FastJSONProvider, arrow_ipc,
+                       compress_response, frame_columns, page_frame, page_records)
+from result_cache import ResultCache, combined_digest, file_digest
+from streaming import EVENT_STREAM_HEADERS, EVENT_STREAM_TYPE, stream_completion
+from transaction_store import TransactionStore
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
+# Routes live on a blueprint; create_app() builds the Flask app around it
+api = Blueprint('api', __name__)
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
 
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'pdf'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-# Create uploads directory if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-# Initialize OpenAI client
-openai.api_key = os.getenv('OPENAI_API_KEY')
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-def extract_transactions_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
-    transactions = []
+# Parse worker processes per upload (defaults to one per core)
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '0')) or None
+
+# CSV/Excel files at least this large are streamed in chunks rather than loaded whole
+STREAMABLE_EXTENSIONS = {'.csv', '.xlsx'}
+STREAM_THRESHOLD_BYTES = int(os.getenv('STREAM_THRESHOLD_MB', '50')) * 1024 * 1024
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '50000'))
+STREAM_MAX_ROWS_PER_CATEGORY = int(os.getenv('STREAM_MAX_ROWS_PER_CATEGORY', '500'))
+
+HISTORY_MAX_ROWS_PER_CATEGORY = int(os.getenv('HISTORY_MAX_ROWS_PER_CATEGORY', '500'))
+
+# Shared services, built once per process by init_services()
+merchant_cache = None
+result_cache = None
+transaction_store = None
+llm_executor = None
+prompt_cache = None
+categorizer = None
+upload_jobs = None
+
+def init_services():
+    """Build the caches, stores, LLM executor and job queue for this process.
+
+    They hold SQLite connections and threads, which must not cross a fork, so a
+    pre-forking server calls this in each worker (through create_app) rather
+    than at import time.
+    """
+    global merchant_cache, result_cache, transaction_store, llm_executor, prompt_cache, categorizer, upload_jobs
+    if upload_jobs is not None:
+        return
     
-    try:
-        logger.info(f"Starting PDF processing for {pdf_path}")
-        
-        # First try to extract tables using tabula
-        logger.info("Attempting to extract tables using tabula")
-        try:
-            tables = tabula.read_pdf(pdf_path, pages='all')
-            logger.info(f"Found {len(tables)} tables in PDF")
-        except Exception as e:
-            logger.error(f"Tabula extraction failed: {str(e)}")
-            tables = []
-        
-        for table in tables:
-            try:
-                # Clean up column names
-                table.columns = [col.strip().lower() for col in table.columns]
-                logger.debug(f"Table columns: {table.columns.tolist()}")
-                
-                # Try to identify date, description, and amount columns
-                date_col = next((col for col in table.columns if 'date' in col), None)
-                desc_col = next((col for col in table.columns if any(x in col for x in ['desc', 'memo', 'details'])), None)
-                amount_col = next((col for col in table.columns if any(x in col for x in ['amount', 'debit', 'credit'])), None)
-                
-                logger.debug(f"Identified columns - Date: {date_col}, Description: {desc_col}, Amount: {amount_col}")
-                
-                if date_col and desc_col and amount_col:
-                    for _, row in table.iterrows():
-                        try:
-                            date = pd.to_datetime(row[date_col])
-                            description = str(row[desc_col])
-                            amount_str = str(row[amount_col]).replace('$', '').replace(',', '')
-                            amount = float(amount_str)
-                            
-                            transactions.append({
-                                'Date': date,
-                                'Description': description,
-                                'Amount': amount
-                            })
-                        except Exception as e:
-                            logger.warning(f"Error processing row: {e}")
-                            continue
-            except Exception as e:
-                logger.error(f"Error processing table: {str(e)}")
-                continue
-        
-        # If no transactions found, try text extraction
-        if not transactions:
-            logger.info("No transactions found in tables, attempting text extraction")
-            try:
-                with pdfplumber.open(pdf_path) as pdf:
-                    for page_num, page in enumerate(pdf.pages, 1):
-                        try:
-                            text = page.extract_text()
-                            if text:
-                                logger.debug(f"Extracted text from page {page_num} using pdfplumber")
-                                transactions.extend(parse_text_for_transactions(text))
-                        except Exception as e:
-                            logger.warning(f"Error processing page {page_num} with pdfplumber: {e}")
-                            continue
-            except Exception as e:
-                logger.error(f"pdfplumber extraction failed: {str(e)}")
-        
-        logger.info(f"Found {len(transactions)} transactions")
-        return transactions
-    except Exception as e:
-        logger.error(f"Error processing PDF: {str(e)}")
-        logger.error(traceback.format_exc())
-        return []
-
-def parse_text_for_transactions(text: str) -> List[Dict[str, Any]]:
-    """Parse text to find transactions."""
-    transactions = []
-    lines = text.split('\n')
+    # Create uploads directory if it doesn't exist
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     
-    for line in lines:
-        # Look for date patterns (MM/DD/YYYY or MM-DD-YYYY)
-        date_match = re.search(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', line)
-        if date_match:
-            try:
-                date = pd.to_datetime(date_match.group(1))
-                # Look for amount patterns ($XXX.XX)
-                amount_match = re.search(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', line)
-                if amount_match:
-                    amount = float(amount_match.group(1).replace(',', ''))
-                    # Get description (everything between date and amount)
-                    desc_start = line.find(date_match.group(1)) + len(date_match.group(1))
-                    desc_end = line.find(amount_match.group(0))
-                    description = line[desc_start:desc_end].strip()
-                    
-                    transactions.append({
-                        'Date': date,
-                        'Description': description,
-                        'Amount': amount
-                    })
-            except Exception as e:
-                logger.warning(f"Error parsing line: {e}")
-                continue
+    # Merchant -> category cache shared across uploads
+    merchant_cache = MerchantCategoryCache(
+        os.getenv('MERCHANT_CACHE_PATH', os.path.join('cache', 'merchant_categories.db')),
+        ttl_seconds=int(os.getenv('MERCHANT_CACHE_TTL_SECONDS', str(90 * 24 * 3600))),
+        max_entries=int(os.getenv('MERCHANT_CACHE_MAX_ENTRIES', '100000'))
+    )
+    
+    # Categorized frames of previously uploaded files, keyed by content hash
+    result_cache = ResultCache(
+        os.getenv('RESULT_CACHE_DIR', os.path.join('cache', 'results')),
+        max_bytes=int(os.getenv('RESULT_CACHE_MAX_MB', '512')) * 1024 * 1024
+    ) if ResultCache.available() else None
+    
+    # Categorized history per user; uploads carrying a user id append only their new rows
+    transaction_store = TransactionStore(os.getenv('TRANSACTION_STORE_PATH', os.path.join('cache', 'transactions.db')))
+    
+    # Every completion call shares one backend (LLM_BACKEND=openai|stub) and one concurrency, rate-limit and retry policy
+    max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+    llm_executor = LLMExecutor(
+        create_backend(pool_size=max_concurrency),
+        max_concurrency=max_concurrency,
+        rate_per_second=float(os.getenv('LLM_RATE_PER_SECOND', '0')) or None,
+        max_retries=int(os.getenv('LLM_MAX_RETRIES', '4'))
+    )
+    
+    # Chat, goal and insight replies for identical prompts; PROMPT_CACHE_TTL_SECONDS=0 turns it off
+    prompt_cache = PromptCache(
+        ttl_seconds=float(os.getenv('PROMPT_CACHE_TTL_SECONDS', '3600')),
+        max_entries=int(os.getenv('PROMPT_CACHE_MAX_ENTRIES', '1024'))
+    )
     
-    return transactions
+    # Keyword rules and the local classifier settle most rows before the LLM is asked
+    categorizer = TieredCategorizer(
+        cache=merchant_cache,
+        rules=KeywordMatcher.default(),
+        classifier=LocalClassifier(min_confidence=float(os.getenv('LOCAL_CLASSIFIER_MIN_CONFIDENCE', '0.8')))
+        if LocalClassifier.available() else None,
+        executor=llm_executor
+    )
+    
+    # Background upload jobs; unfinished jobs from a previous run are resumed once started
+    upload_jobs = JobQueue(
+        os.getenv('JOBS_DIR', os.path.join('cache', 'jobs')),
+        run_upload_job,
+        workers=int(os.getenv('JOB_WORKERS', '2')),
+        stale_seconds=int(os.getenv('JOB_STALE_SECONDS', '300'))
+    )
+
+def create_app(start_jobs: bool = True) -> Flask:
+    """Application factory: ``gunicorn 'app:create_app()'``, or ``python app.py`` in development.
+
+    PDF extraction, plotly, scikit-learn and the OpenAI client are imported on
+    first use, so a worker is ready to serve as soon as this returns.
+    """
+    logging.basicConfig(level=LOG_LEVEL)
+    init_services()
+    
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    CORS(app)
+    app.register_blueprint(api)
+    
+    upload_jobs.encode = app.json.dumps
+    if start_jobs:
+        upload_jobs.start()
+    return app
+
+INSIGHTS_UNAVAILABLE = "Unable to generate insights at this time."
+
+RESULT_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+# Requests sending this header get their stage breakdown back in a Server-Timing header
+PROFILE_HEADER = 'X-Profile'
+
+def cache_lookups() -> Dict[Tuple[str, str], int]:
+    lookups = {}
+    for name, cache in (('merchant', merchant_cache), ('result', result_cache), ('prompt', prompt_cache)):
+        if cache is None:
+            continue
+        stats = cache.stats()
+        lookups[(name, 'hit')] = stats['hits']
+        lookups[(name, 'miss')] = stats['misses']
+        if 'coalesced' in stats:
+            lookups[(name, 'coalesced')] = stats['coalesced']
+    return lookups
+
+def cache_hit_ratios() -> Dict[str, float]:
+    return {name: cache.stats()['hit_ratio']
+            for name, cache in (('merchant', merchant_cache), ('result', result_cache), ('prompt', prompt_cache))
+            if cache is not None}
+
+def categorized_rows() -> Dict[str, int]:
+    if categorizer is None:
+        return {}
+    stats = categorizer.stats()
+    return {tier: stats[f'{tier}_rows'] for tier in categorizer.TIERS}
+
+REGISTRY.callback('morelife_cache_lookups_total', 'Cache lookups by cache and result.', cache_lookups,
+                  ['cache', 'result'], kind='counter')
+REGISTRY.callback('morelife_cache_hit_ratio', 'Share of cache lookups answered from the cache.', cache_hit_ratios,
+                  ['cache'])
+REGISTRY.callback('morelife_categorized_rows_total', 'Rows categorized, by the tier that settled them.',
+                  categorized_rows, ['tier'], kind='counter')
+REGISTRY.callback('morelife_llm_saved_seconds_total', 'LLM latency avoided by the prompt cache.',
+                  lambda: prompt_cache.stats()['saved_seconds'] if prompt_cache else None, kind='counter')
+
+@api.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request.headers.get(PROFILE_HEADER):
+        start_trace()
+
+@api.after_app_request
+def record_request_time(response):
+    # Registered before compress so it runs after it; streamed bodies are timed up to the first byte
+    trace = end_trace()
+    if trace is not None:
+        response.headers['Server-Timing'] = trace.server_timing()
+    if 'request_started' in g:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=endpoint,
+                             method=request.method, status=response.status_code)
+    return response
+
+@api.after_app_request
+def compress(response):
+    return compress_response(response, request.accept_encodings)
+
+def cached_completion(messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+    """Completion through the prompt cache; identical prompts already in flight share one call."""
+    key = prompt_fingerprint(messages, temperature, max_tokens)
+    return prompt_cache.get_or_call(key, lambda: llm_executor.call(messages, temperature, max_tokens))
+
+def cached_stream(messages: List[Dict[str, str]], temperature: float, max_tokens: int):
+    """Streamed counterpart of cached_completion; a cached reply arrives as one chunk."""
+    key = prompt_fingerprint(messages, temperature, max_tokens)
+    return prompt_cache.stream(key, lambda: llm_executor.stream(messages, temperature, max_tokens))
+
+def wants_stream() -> bool:
+    """Clients opt into server-sent events with ?stream=1 or Accept: text/event-stream."""
+    return request.args.get('stream') == '1' or request.accept_mimetypes.best == EVENT_STREAM_TYPE
+
+def event_stream(chunks, **kwargs):
+    """Server-sent events response relaying completion chunks (see streaming.stream_completion)."""
+    return current_app.response_class(stream_with_context(stream_completion(chunks, **kwargs)),
+                                      mimetype=EVENT_STREAM_TYPE, headers=EVENT_STREAM_HEADERS)
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_ai_categorization(description: str, amount: float) -> str:
-    try:
-        prompt = f"""Categorize this financial transaction into one of these categories:
-        - Income (for positive amounts)
-        - Food & Dining
-        - Transportation
-        - Housing
-        - Entertainment
-        - Healthcare
-        - Shopping
-        - Utilities
-        - Education
-        - Travel
-        - Other
-
-        Transaction: {description}
-        Amount: ${amount}
-
-        Return only the category name, nothing else."""
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a financial transaction categorizer. Respond with only the category name."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=10
-        )
-        
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        logger.error(f"Error in AI categorization: {str(e)}")
-        return "Other"
+    return categorizer.categorize([description], [amount])[0]
 
 def get_spending_insights(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Generate AI-powered insights about spending patterns."""
     try:
-        # Calculate high-ticket items (transactions above $500, excluding income)
-        high_ticket_items = []
-        for transaction in transactions:
-            if transaction.get('Amount') and abs(transaction['Amount']) > 500 and transaction.get('Category') != 'Income':
-                high_ticket_items.append({
-                    'Description': transaction.get('Description', 'Unknown'),
-                    'Amount': abs(transaction['Amount']),
-                    'Category': transaction.get('Category', 'Uncategorized'),
-                    'Date': transaction.get('Date', '').strftime('%Y-%m-%d') if transaction.get('Date') else ''
-                })
+        aggregates = aggregate_frame(canonical_frame(pd.DataFrame(transactions)))
+        high_ticket_items = aggregates.high_ticket_items()
+        monthly_spending = aggregates.monthly_spending()
         
-        # Calculate monthly spending by category
-        monthly_spending = {}
-        for transaction in transactions:
-            if transaction.get('Date') and transaction.get('Category'):
-                month = transaction['Date'].strftime('%Y-%m')
-                category = transaction['Category']
-                amount = abs(transaction.get('Amount', 0))
-                
-                if month not in monthly_spending:
-                    monthly_spending[month] = {}
-                if category not in monthly_spending[month]:
-                    monthly_spending[month][category] = 0
-                monthly_spending[month][category] += amount
-        
-        # Generate insights using AI
-        prompt = f"""Analyze these financial transactions and provide concise insights for a young adult in their twenties:
+        return generate_spending_insights(high_ticket_items, monthly_spending)
+    except Exception as e:
+        logger.error(f"Error generating insights: {str(e)}")
+        logger.error(traceback.format_exc())
+        return {
+            'high_ticket_items': [],
+            'monthly_spending': {},
+            'insights': INSIGHTS_UNAVAILABLE
+        }
+
+def insights_messages(high_ticket_items: List[Dict[str, Any]],
+                      monthly_spending: Dict[str, Dict[str, float]]) -> List[Dict[str, str]]:
+    prompt = f"""Analyze these financial transactions and provide concise insights for a young adult in their twenties:
 
         High-ticket expenses (over $500):
         {[f"- ${item['Amount']}: {item['Description']} ({item['Category']}) on {item['Date']}" for item in high_ticket_items]}
@@ -228,18 +271,17 @@ def get_spending_insights(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
         [2-3 actionable financial tips]
 
         Keep the response concise and focused on practical advice."""
-
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a financial advisor specializing in young adult financial literacy. Provide concise, actionable insights."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        insights = response.choices[0].message.content.strip()
+    return [
+        {"role": "system", "content": "You are a financial advisor specializing in young adult financial literacy. Provide concise, actionable insights."},
+        {"role": "user", "content": prompt}
+    ]
+
+def generate_spending_insights(high_ticket_items: List[Dict[str, Any]],
+                               monthly_spending: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    """Ask the LLM for insights over precomputed high-ticket items and monthly totals."""
+    try:
+        # Generate insights using AI
+        insights = cached_completion(insights_messages(high_ticket_items, monthly_spending), temperature=0.7, max_tokens=300)
         
         return {
             'high_ticket_items': high_ticket_items,
@@ -250,108 +292,249 @@ def get_spending_insights(transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
         logger.error(f"Error generating insights: {str(e)}")
         logger.error(traceback.format_exc())
         return {
-            'high_ticket_items': [],
-            'monthly_spending': {},
-            'insights': "Unable to generate insights at this time."
+            'high_ticket_items': high_ticket_items,
+            'monthly_spending': monthly_spending,
+            'insights': INSIGHTS_UNAVAILABLE
         }
 
 def process_file(filepath: str) -> pd.DataFrame:
-    try:
-        logger.info(f"Processing file: {filepath}")
-        
-        # Get file extension
-        file_ext = os.path.splitext(filepath)[1].lower()
-        logger.info(f"File extension: {file_ext}")
+    df = parse_statement(filepath)
+
+    # Add AI categorization
+    logger.info("Starting AI categorization")
+    with span('categorize') as categorized:
+        categorize_frame(df)
+        categorized.rows = len(df)
+    logger.info(f"Completed AI categorization. Tiers: {categorizer.stats()}, merchant cache: {merchant_cache.stats()}")
+
+    return df
+
+def categorize_frame(df: pd.DataFrame) -> None:
+    """Add the Category column to a canonical frame (amounts in cents) in place."""
+    df['Category'] = category_column(categorizer.categorize(df['Description'].tolist(), to_dollars(df['Amount']).tolist()))
+
+def should_stream(filepath: str, force: bool = False) -> bool:
+    if os.path.splitext(filepath)[1].lower() not in STREAMABLE_EXTENSIONS:
+        return False
+    return force or os.path.getsize(filepath) >= STREAM_THRESHOLD_BYTES
+
+def process_file_streaming(filepath: str, on_progress: Optional[Callable[[int], None]] = None,
+                           user_id: Optional[str] = None) -> SpendingAggregates:
+    """Categorize a large CSV/Excel file chunk by chunk, keeping only running aggregates.
+
+    With a user id each categorized chunk is also appended to that user's stored history.
+    """
+    aggregates = SpendingAggregates(max_rows_per_category=STREAM_MAX_ROWS_PER_CATEGORY)
+    # Repeat counts behind the dedup keys run over the whole file, not each chunk
+    seen_keys: Dict[str, int] = {}
+    for chunk in iter_statement_chunks(filepath, chunk_size=STREAM_CHUNK_SIZE):
+        with span('categorize') as categorized:
+            categorize_frame(chunk)
+            categorized.rows = len(chunk)
+        with span('aggregate'):
+            aggregates.update(chunk)
+        if user_id:
+            with span('store'):
+                transaction_store.add(user_id, chunk, seen=seen_keys)
+        logger.info(f"Streamed {aggregates.row_count} rows from {filepath}")
+        if on_progress:
+            on_progress(aggregates.row_count)
+    
+    if aggregates.row_count == 0:
+        raise ValueError("No valid transactions found after cleaning the data.")
+    return aggregates
+
+def run_upload_pipeline(saved: List[Tuple[str, str]], stream_all: bool = False,
+                        failed_files: Optional[List[Dict[str, str]]] = None,
+                        checkpoint: Optional[JobCheckpoint] = None,
+                        user_id: Optional[str] = None, view: str = 'full',
+                        defer_insights: bool = False) -> Tuple[Dict[str, Any], int]:
+    """Parse, categorize and summarize saved uploads into the /api/upload payload.
+
+    ``saved`` holds (original filename, path on disk) pairs. With a job
+    checkpoint each finished stage is persisted and reused when the job is resumed.
+    With a user id the new rows are added to that user's stored history and the
+    response summarizes the whole history rather than just these files.
+    The ``summary`` view leaves out the rows and plot; rows are saved as a result
+    served page by page from /api/results/<result_id>/transactions instead.
+    Either view's aggregates are kept under the result id for /api/analyze-goals.
+    With ``defer_insights`` the LLM is skipped and the insights text is left to
+    /api/insights, which can stream it.
+    """
+    failed_files = list(failed_files or [])
+    
+    # Stage 1: parse. Files seen before come straight from the result cache; large CSV/Excel exports are
+    # streamed in chunks; everything else is parsed whole in worker processes
+    parsed_stage = checkpoint.load('parse') if checkpoint else None
+    if parsed_stage is None:
+        digests = {filepath: file_digest(filepath) for _, filepath in saved} if result_cache else {}
+        results = {}
+        cached = set()
+        for filepath, digest in digests.items():
+            df = result_cache.get_frame(digest)
+            if df is not None:
+                results[filepath] = (df, None)
+                cached.add(filepath)
         
-        if file_ext == '.pdf':
-            logger.info("Processing PDF file")
-            transactions = extract_transactions_from_pdf(filepath)
-            if not transactions:
-                raise ValueError("No transactions found in the PDF. Please ensure the statement contains transaction data.")
-            df = pd.DataFrame(transactions)
-            logger.info(f"Successfully extracted {len(df)} transactions from PDF")
-        else:
-            # Handle CSV and Excel files
-            logger.info(f"Processing {file_ext} file")
+        remaining = [filepath for _, filepath in saved if filepath not in cached]
+        streamed = [filepath for filepath in remaining if should_stream(filepath, stream_all)]
+        parsed = [filepath for filepath in remaining if filepath not in streamed]
+        results.update(zip(parsed, parse_statements(parsed, max_workers=INGEST_WORKERS)))
+        for filepath in streamed:
             try:
-                if file_ext == '.csv':
-                    df = pd.read_csv(filepath)
-                    logger.info(f"Successfully read CSV with {len(df)} rows")
-                elif file_ext in ['.xlsx', '.xls']:
-                    df = pd.read_excel(filepath)
-                    logger.info(f"Successfully read Excel with {len(df)} rows")
-                else:
-                    raise ValueError(f"Unsupported file format: {file_ext}")
+                results[filepath] = (process_file_streaming(
+                    filepath, on_progress=lambda rows: checkpoint and checkpoint.progress('parse', rows),
+                    user_id=user_id
+                ), None)
             except Exception as e:
-                logger.error(f"Error reading file: {str(e)}")
-                raise ValueError(f"Error reading file: {str(e)}")
-
-        # Log column names for debugging
-        logger.info(f"Available columns: {df.columns.tolist()}")
-        
-        # Try to identify required columns if they don't exist
-        if 'Description' not in df.columns:
-            desc_cols = [col for col in df.columns if any(x in col.lower() for x in ['desc', 'memo', 'details', 'narrative'])]
-            if desc_cols:
-                df['Description'] = df[desc_cols[0]]
-                logger.info(f"Using column '{desc_cols[0]}' as Description")
+                results[filepath] = (None, str(e))
+        parsed_stage = (results, digests, cached)
+        if checkpoint:
+            checkpoint.save('parse', parsed_stage)
+    results, digests, cached = parsed_stage
+    
+    # Stage 2: categorize and aggregate
+    categorized = checkpoint.load('categorize') if checkpoint else None
+    if categorized is None:
+        streaming = any(isinstance(data, SpendingAggregates) for data, _ in results.values())
+        aggregates = SpendingAggregates(max_rows_per_category=STREAM_MAX_ROWS_PER_CATEGORY if streaming else None)
+        processed_files = []
+        uncategorized = []
+        for filename, filepath in saved:
+            data, error = results[filepath]
+            if error is None:
+                if isinstance(data, SpendingAggregates):
+                    aggregates.merge(data)
+                elif filepath in cached:
+                    with span('aggregate'):
+                        aggregates.update(data)
+                    if user_id:
+                        with span('store'):
+                            transaction_store.add(user_id, data)
+                else:
+                    uncategorized.append((filepath, data))
+                processed_files.append(filename)
+                logger.info(f"Successfully processed {filename}")
             else:
-                raise ValueError("Could not find a description column. Please ensure your file has a column for transaction descriptions.")
+                logger.error(f"Error processing {filename}: {error}")
+                failed_files.append({
+                    'filename': filename,
+                    'error': error
+                })
         
-        if 'Amount' not in df.columns:
-            amount_cols = [col for col in df.columns if any(x in col.lower() for x in ['amount', 'debit', 'credit', 'value'])]
-            if amount_cols:
-                df['Amount'] = df[amount_cols[0]]
-                logger.info(f"Using column '{amount_cols[0]}' as Amount")
-            else:
-                raise ValueError("Could not find an amount column. Please ensure your file has a column for transaction amounts.")
+        if not processed_files:
+            return {
+                'error': 'Unable to process any files. Please check the error messages below for each file.',
+                'failed_files': failed_files
+            }, 400
         
-        if 'Date' not in df.columns:
-            date_cols = [col for col in df.columns if any(x in col.lower() for x in ['date', 'posted', 'transaction date'])]
-            if date_cols:
-                df['Date'] = df[date_cols[0]]
-                logger.info(f"Using column '{date_cols[0]}' as Date")
-            else:
-                raise ValueError("Could not find a date column. Please ensure your file has a column for transaction dates.")
-
-        # Clean up the data
-        try:
-            # Convert Date column to datetime
-            df['Date'] = pd.to_datetime(df['Date'])
-            logger.info("Successfully converted Date column to datetime")
-            
-            # Clean Amount column
-            df['Amount'] = df['Amount'].astype(str).str.replace('$', '').str.replace(',', '')
-            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-            logger.info("Successfully cleaned Amount column")
-            
-            # Clean Description column
-            df['Description'] = df['Description'].astype(str).str.strip()
-            logger.info("Successfully cleaned Description column")
+        if uncategorized:
+            # Combine all dataframes and categorize them together so repeated merchants across files are sent once
+            combined_df = concat_frames([df for _, df in uncategorized])
+            if checkpoint:
+                checkpoint.progress('categorize', len(combined_df))
+            with span('categorize') as categorized_rows:
+                categorize_frame(combined_df)
+                categorized_rows.rows = len(combined_df)
+            logger.info(f"Completed AI categorization. Tiers: {categorizer.stats()}, merchant cache: {merchant_cache.stats()}")
+            with span('aggregate'):
+                aggregates.update(combined_df)
             
-            # Remove any rows with missing values
-            df = df.dropna(subset=['Date', 'Description', 'Amount'])
-            logger.info(f"Removed rows with missing values. Remaining rows: {len(df)}")
-            
-            if len(df) == 0:
-                raise ValueError("No valid transactions found after cleaning the data.")
-            
-        except Exception as e:
-            logger.error(f"Error cleaning data: {str(e)}")
-            raise ValueError(f"Error cleaning data: {str(e)}")
+            # Store each file's categorized rows on their own (dedup keys count repeats within one file)
+            # and cache them under the hash of its contents
+            offset = 0
+            for filepath, df in uncategorized:
+                file_rows = combined_df.iloc[offset:offset + len(df)]
+                offset += len(df)
+                if user_id:
+                    with span('store'):
+                        transaction_store.add(user_id, file_rows)
+                if result_cache:
+                    result_cache.put_frame(digests[filepath], file_rows)
         
-        # Add AI categorization
-        logger.info("Starting AI categorization")
-        df['Category'] = df.apply(lambda x: get_ai_categorization(x['Description'], x['Amount']), axis=1)
-        logger.info("Completed AI categorization")
-        
-        return df
-    except Exception as e:
-        logger.error(f"Error processing file: {str(e)}")
-        logger.error(traceback.format_exc())
-        raise
+        categorized = (aggregates, processed_files, failed_files)
+        if checkpoint:
+            checkpoint.save('categorize', categorized)
+    aggregates, processed_files, failed_files = categorized
+    if user_id:
+        with span('aggregate'):
+            aggregates = transaction_store.aggregates(user_id, max_rows_per_category=HISTORY_MAX_ROWS_PER_CATEGORY)
+    
+    # Stage 3: generate spending insights, reusing them when this exact set of files (or history) was seen before
+    insights_key = None
+    if result_cache and user_id:
+        insights_key = 'insights-' + combined_digest([], user_id=user_id, rows=aggregates.row_count)
+    elif result_cache and not failed_files:
+        insights_key = 'insights-' + combined_digest(digests.values())
+    insights_data = checkpoint.load('insights') if checkpoint else None
+    if insights_data is None and insights_key:
+        insights_data = result_cache.get_json(insights_key)
+    if insights_data is None and defer_insights:
+        insights_data = {
+            'high_ticket_items': aggregates.high_ticket_items(),
+            'monthly_spending': aggregates.monthly_spending(),
+            'insights': None
+        }
+    if insights_data is None:
+        with span('insights'):
+            insights_data = generate_spending_insights(aggregates.high_ticket_items(), aggregates.monthly_spending())
+        if insights_key and insights_data['insights'] != INSIGHTS_UNAVAILABLE:
+            result_cache.put_json(insights_key, insights_data)
+        if checkpoint:
+            checkpoint.save('insights', insights_data)
+    
+    with span('serialize'):
+        return upload_payload(aggregates, insights_data, processed_files, failed_files, view)
+
+def upload_payload(aggregates, insights_data: Dict[str, Any], processed_files: List[str],
+                   failed_files: List[Dict[str, str]], view: str) -> Tuple[Dict[str, Any], int]:
+    # Category breakdown
+    category_data = pd.DataFrame(aggregates.category_data(), columns=['Category', 'Amount'])
+    
+    # Goal analysis reads these back by result id instead of the client posting them
+    result_id = None
+    if result_cache:
+        result_id = uuid.uuid4().hex
+        result_cache.put_json(f"aggregates-{result_id}", {
+            'category_data': category_data.to_dict('records'),
+            'monthly_spending': aggregates.monthly_spending()
+        })
+    
+    if view == 'summary' and result_cache:
+        transactions = aggregates.transactions_frame()
+        result_cache.put_frame(f"rows-{result_id}", transactions)
+        return {
+            'category_data': category_data.to_dict('records'),
+            'category_counts': transactions['Category'].astype(str).value_counts().sort_index().to_dict(),
+            'result_id': result_id,
+            'transactions_url': f"/api/results/{result_id}/transactions",
+            'insights': insights_data,
+            'processed_files': processed_files,
+            'failed_files': failed_files
+        }, 200
+    
+    # Create visualizations (plotly is imported on the first full response)
+    import plotly.express as px
+    fig_categories = px.pie(category_data, values='Amount', names='Category', title='Expenses by Category')
+    
+    return {
+        'category_data': category_data.to_dict('records'),
+        'category_plot': fig_categories.to_json(),
+        'transactions_by_category': aggregates.transactions_by_category(),
+        'result_id': result_id,
+        'insights': insights_data,
+        'processed_files': processed_files,
+        'failed_files': failed_files
+    }, 200
 
-@app.route('/api/upload', methods=['POST'])
+def run_upload_job(files: List[Tuple[str, str]], options: Dict[str, Any],
+                   checkpoint: JobCheckpoint) -> Tuple[Dict[str, Any], int]:
+    return run_upload_pipeline(files, stream_all=options.get('stream', False),
+                               failed_files=options.get('failed_files'), checkpoint=checkpoint,
+                               user_id=options.get('user_id'), view=options.get('view', 'full'),
+                               defer_insights=options.get('defer_insights', False))
+
+@api.route('/api/upload', methods=['POST'])
 def upload_files():
     if 'files' not in request.files:
         return jsonify({'error': 'Please select at least one file to upload'}), 400
@@ -360,83 +543,167 @@ def upload_files():
     if not files or files[0].filename == '':
         return jsonify({'error': 'Please select at least one file to upload'}), 400
     
-    all_data = []
-    processed_files = []
+    # With ?async=1 the upload is queued as a job and polled through /api/jobs/<id>
+    run_async = request.args.get('async') == '1'
+    stream_all = request.args.get('stream') == '1'
+    # Uploads carrying a server-issued history token (or ?history=1 to start one) are merged into that history
+    history_token = request.headers.get('X-History-Token') or request.form.get('history_token') or None
+    issued_token = None
+    if history_token:
+        user_id = transaction_store.resolve_token(history_token)
+        if user_id is None:
+            return jsonify({'error': 'Unknown history token'}), 403
+    elif request.args.get('history') == '1':
+        issued_token = transaction_store.issue_token()
+        user_id = transaction_store.resolve_token(issued_token)
+    else:
+        user_id = None
+    # ?view=summary returns aggregates only; rows are fetched page by page
+    view = request.args.get('view', 'full')
+    # ?insights=defer skips the LLM; the client then fetches (or streams) /api/insights
+    defer_insights = request.args.get('insights') == 'defer'
+    job_id = upload_jobs.create() if run_async else None
+    upload_dir = upload_jobs.job_dir(job_id) if run_async else current_app.config['UPLOAD_FOLDER']
+    
     failed_files = []
+    saved = []
     
     for file in files:
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
+            # Prefix so identically named uploads don't overwrite each other while parsed in parallel
+            filepath = os.path.join(upload_dir, f"{uuid.uuid4().hex}_{filename}")
             try:
-                # Save the file
                 file.save(filepath)
                 logger.info(f"Saved file: {filename}")
-                
-                # Process the file
-                logger.info(f"Processing file: {filename}")
-                df = process_file(filepath)
-                
-                if df is not None and not df.empty:
-                    all_data.append(df)
-                    processed_files.append(filename)
-                    logger.info(f"Successfully processed {filename} with {len(df)} transactions")
-                else:
-                    raise ValueError("No data found in file")
+                saved.append((filename, filepath))
             except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Error processing {filename}: {error_msg}")
+                logger.error(f"Error saving {filename}: {str(e)}")
                 failed_files.append({
                     'filename': filename,
-                    'error': error_msg
+                    'error': str(e)
                 })
-            finally:
-                # Clean up the uploaded file
-                try:
-                    os.remove(filepath)
-                    logger.info(f"Cleaned up file: {filename}")
-                except Exception as e:
-                    logger.error(f"Error cleaning up file {filename}: {str(e)}")
-    
-    if not all_data:
-        return jsonify({
-            'error': 'Unable to process any files. Please check the error messages below for each file.',
-            'failed_files': failed_files
-        }), 400
     
-    # Combine all dataframes
-    combined_df = pd.concat(all_data, ignore_index=True)
+    if run_async:
+        upload_jobs.submit(job_id, saved, {'stream': stream_all, 'failed_files': failed_files, 'user_id': user_id,
+                                        'view': view, 'defer_insights': defer_insights})
+        accepted = {'job_id': job_id, 'status': 'queued'}
+        if issued_token:
+            accepted['history_token'] = issued_token
+        return jsonify(accepted), 202
     
-    # Category breakdown
-    category_data = combined_df[combined_df['Amount'] < 0].groupby('Category')['Amount'].sum().reset_index()
-    category_data['Amount'] = category_data['Amount'].abs()
+    try:
+        payload, status_code = run_upload_pipeline(saved, stream_all=stream_all, failed_files=failed_files,
+                                                   user_id=user_id, view=view, defer_insights=defer_insights)
+    finally:
+        for filename, filepath in saved:
+            # Clean up the uploaded file
+            try:
+                os.remove(filepath)
+                logger.info(f"Cleaned up file: {filename}")
+            except Exception as e:
+                logger.error(f"Error cleaning up file {filename}: {str(e)}")
+    if issued_token and status_code == 200:
+        payload['history_token'] = issued_token
     
-    # Create visualizations
-    fig_categories = px.pie(category_data, values='Amount', names='Category', title='Expenses by Category')
+    with span('serialize'):
+        return jsonify(payload), status_code
+
+@api.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok'})
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint for this worker process."""
+    return current_app.response_class(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@api.route('/api/stats', methods=['GET'])
+def stats():
+    """Cache hit rates for this worker process."""
+    return jsonify({
+        'prompt_cache': prompt_cache.stats(),
+        'merchant_cache': merchant_cache.stats(),
+        'categorizer': categorizer.stats()
+    })
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['result'] is not None:
+        job['result'] = json.loads(job['result'])
+    return jsonify(job)
+
+@api.route('/api/results/<result_id>/transactions', methods=['GET'])
+def get_result_transactions(result_id):
+    """Page through a summary upload's expense rows, newest first within each category.
+
+    Query parameters: ``category`` to restrict to one category, ``cursor`` from
+    the previous page, ``limit`` (max 1000) and ``format`` = records (default),
+    columns (column-oriented JSON) or arrow (Arrow IPC stream, cursor in X-Next-Cursor).
+    """
+    if not result_cache or not RESULT_ID_RE.match(result_id):
+        return jsonify({'error': 'Result not found'}), 404
+    
+    category = request.args.get('category')
+    output = request.args.get('format', 'records')
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    if output not in ('records', 'columns', 'arrow'):
+        return jsonify({'error': 'format must be records, columns or arrow'}), 400
+    
+    df = result_cache.get_frame(f"rows-{result_id}", filters=[('Category', '==', category)] if category else None)
+    if df is None:
+        return jsonify({'error': 'Result not found or expired'}), 404
     
-    # Get detailed transaction data by category
-    transactions_by_category = {}
-    for category in category_data['Category'].unique():
-        category_transactions = combined_df[
-            (combined_df['Category'] == category) & 
-            (combined_df['Amount'] < 0)
-        ].sort_values('Date', ascending=False)
-        transactions_by_category[category] = category_transactions.to_dict('records')
+    try:
+        page, next_cursor = page_frame(df, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Generate spending insights
-    insights_data = get_spending_insights(combined_df.to_dict('records'))
+    if output == 'arrow':
+        response = current_app.response_class(arrow_ipc(page), mimetype=ARROW_STREAM_TYPE)
+        response.headers['X-Total-Count'] = str(len(df))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
     
     return jsonify({
-        'category_data': category_data.to_dict('records'),
-        'category_plot': fig_categories.to_json(),
-        'transactions_by_category': transactions_by_category,
-        'insights': insights_data,
-        'processed_files': processed_files,
-        'failed_files': failed_files
+        'transactions': frame_columns(page) if output == 'columns' else page_records(page),
+        'next_cursor': next_cursor,
+        'total': len(df)
     })
 
-@app.route('/api/chat', methods=['POST'])
+@api.route('/api/insights', methods=['POST'])
+def spending_insights():
+    """Insights over the high_ticket_items and monthly_spending of an upload response.
+
+    Pairs with /api/upload?insights=defer, which returns those without waiting
+    for the LLM, so the insights text can be streamed separately.
+    """
+    data = request.json or {}
+    high_ticket_items = data.get('high_ticket_items', [])
+    monthly_spending = data.get('monthly_spending')
+    if not monthly_spending:
+        return jsonify({'error': 'Missing required data'}), 400
+    
+    if wants_stream():
+        return event_stream(
+            cached_stream(insights_messages(high_ticket_items, monthly_spending), temperature=0.7, max_tokens=300),
+            meta={'high_ticket_items': high_ticket_items, 'monthly_spending': monthly_spending},
+            done=lambda text: {'insights': text},
+            error_message=INSIGHTS_UNAVAILABLE
+        )
+    return jsonify(generate_spending_insights(high_ticket_items, monthly_spending))
+
+@api.route('/api/chat', methods=['POST'])
 def chat():
     try:
         data = request.json
@@ -455,63 +722,93 @@ def chat():
 
         Provide a concise, practical response focused on financial advice for young adults."""
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a financial advisor specializing in young adult financial literacy. Provide concise, actionable advice."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300
-        )
+        messages = [
+            {"role": "system", "content": "You are a financial advisor specializing in young adult financial literacy. Provide concise, actionable advice."},
+            {"role": "user", "content": prompt}
+        ]
+        
+        if wants_stream():
+            return event_stream(cached_stream(messages, temperature=0.7, max_tokens=300),
+                                done=lambda text: {'response': text},
+                                error_message='Failed to process chat message')
+        
+        response = cached_completion(messages, temperature=0.7, max_tokens=300)
         
         return jsonify({
-            'response': response.choices[0].message.content.strip()
+            'response': response
         })
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
         return jsonify({'error': 'Failed to process chat message'}), 500
 
-@app.route('/api/analyze-goals', methods=['POST'])
+def goal_spending(data: Dict[str, Any]) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]]:
+    """Category totals and monthly spending to analyze goals against, or None if there are none.
+
+    Looked up server-side by ``resultId`` (any upload response) or by the
+    ``historyToken`` / X-History-Token an upload issued (stored history).
+    Otherwise the client's ``actualSpending`` is used; without its
+    ``monthlySpending`` the totals are treated as one month.
+    """
+    result_id = str(data.get('resultId') or '')
+    if result_cache and RESULT_ID_RE.match(result_id):
+        stored = result_cache.get_json(f"aggregates-{result_id}")
+        if stored is not None:
+            return stored['category_data'], stored['monthly_spending']
+    user_id = transaction_store.resolve_token(data.get('historyToken') or request.headers.get('X-History-Token'))
+    if user_id and transaction_store.row_count(user_id):
+        return transaction_store.category_data(user_id), transaction_store.monthly_spending(user_id)
+    actual_spending = data.get('actualSpending') or {}
+    if actual_spending.get('categoryData'):
+        return actual_spending['categoryData'], actual_spending.get('monthlySpending') or {}
+    return None
+
+@api.route('/api/analyze-goals', methods=['POST'])
 def analyze_goals():
+    """Budget variance, savings projections and months-to-goal, with an opt-in LLM narrative.
+
+    The numbers come from goals.goal_analysis and are returned straight away
+    with ``recommendations`` set to None. The recommendations text is only
+    written when asked for: ``?narrative=1`` waits for it (through the prompt
+    cache) and ``?stream=1`` streams it after the analysis.
+    """
     try:
         data = request.json
         monthly_income = data.get('monthlyIncome')
         budget_goals = data.get('budgetGoals', {})
         custom_goals = data.get('customGoals', [])
-        actual_spending = data.get('actualSpending')
+        spending = goal_spending(data)
 
-        if not monthly_income or not actual_spending or not actual_spending.get('categoryData'):
+        if not monthly_income or spending is None:
             return jsonify({'error': 'Missing required data'}), 400
 
-        # Calculate total current spending
-        total_spending = sum(category['Amount'] for category in actual_spending['categoryData'])
-        
-        # Calculate current spending percentages
-        current_spending = {}
-        for category in actual_spending['categoryData']:
-            current_spending[category['Category'].lower()] = (category['Amount'] / total_spending) * 100
+        category_data, monthly_spending = spending
+        with span('goals'):
+            analysis = goal_analysis(category_data, monthly_spending, float(monthly_income), budget_goals, custom_goals)
+        # Fields older clients read
+        analysis.update({
+            'monthly_income': monthly_income,
+            'budget_goals': budget_goals,
+            'custom_goals': custom_goals,
+            'current_spending': {row['category'].lower(): row['share_pct'] for row in analysis['budget']},
+            'total_spending': round(sum(row['total'] for row in analysis['budget']), 2)
+        })
+
+        if request.args.get('narrative') != '1' and not wants_stream():
+            return jsonify({'recommendations': None, 'analysis': analysis})
 
-        # Generate AI analysis and recommendations
-        prompt = f"""As a financial advisor, analyze this person's financial goals and provide personalized recommendations:
+        # The model explains numbers computed above instead of working them out itself
+        prompt = f"""As a financial advisor, analyze this person's financial goals and provide personalized recommendations. All figures below are already calculated; use them as given.
 
 Monthly Income: ${monthly_income}
 
-Current Spending by Category:
-{json.dumps([{
-    'Category': cat['Category'],
-    'Amount': cat['Amount'],
-    'Percentage': current_spending.get(cat['Category'].lower(), 0)
-} for cat in actual_spending['categoryData']], indent=2)}
+Spending vs. Budget (monthly averages over {analysis['months_covered']} months; budget_pct is the desired share of income, negative variance is overspending):
+{json.dumps(analysis['budget'], indent=2)}
 
-Desired Budget Allocation:
-{json.dumps([{
-    'Category': cat,
-    'Percentage': percentage
-} for cat, percentage in budget_goals.items()], indent=2)}
+Savings (current habits vs. following the budget):
+{json.dumps(analysis['savings'], indent=2)}
 
-Personal Financial Goals:
-{json.dumps(custom_goals, indent=2)}
+Personal Financial Goals (months_to_goal at current savings, on_track if reached by the deadline):
+{json.dumps(analysis['goals'], indent=2)}
 
 Provide analysis in this format:
 1. Budget Analysis
@@ -531,27 +828,23 @@ Provide analysis in this format:
 
 Keep the response practical and focused on achievable improvements."""
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a financial advisor specializing in personal finance and budgeting for young adults. Provide practical, actionable advice."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
+        messages = [
+            {"role": "system", "content": "You are a financial advisor specializing in personal finance and budgeting for young adults. Provide practical, actionable advice."},
+            {"role": "user", "content": prompt}
+        ]
+
+        # The analysis doesn't depend on the LLM, so streaming clients get it before the first token
+        if wants_stream():
+            return event_stream(cached_stream(messages, temperature=0.7, max_tokens=500),
+                                meta={'analysis': analysis},
+                                done=lambda text: {'recommendations': text, 'analysis': analysis},
+                                error_message='Failed to analyze goals')
 
-        recommendations = response.choices[0].message.content.strip()
+        recommendations = cached_completion(messages, temperature=0.7, max_tokens=500)
 
         return jsonify({
             'recommendations': recommendations,
-            'analysis': {
-                'monthly_income': monthly_income,
-                'budget_goals': budget_goals,
-                'custom_goals': custom_goals,
-                'current_spending': current_spending,
-                'total_spending': total_spending
-            }
+            'analysis': analysis
         })
 
     except Exception as e:
@@ -560,4 +853,4 @@ Keep the response practical and focused on achievable improvements."""
         return jsonify({'error': 'Failed to analyze goals'}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    create_app().run(debug=True) 
\ No newline at end of file
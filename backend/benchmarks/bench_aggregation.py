@@ -0,0 +1,119 @@
+"""Benchmark for building the upload response aggregates.
+
+Compares the single-pass ``aggregate_frame`` with the original upload path
+(category groupby, a mask + sort per category, then ``to_dict('records')``
+looped over twice for high-ticket items and monthly spending). Run from the
+backend directory:
+
+    python -m benchmarks.bench_aggregation --rows 10000 100000 1000000
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregation import aggregate_frame
+from benchmarks.synthetic import generate_rows
+from categorization import CATEGORIES
+from frames import canonical_frame
+
+
+def categorized_frame(count, seed=0):
+    rows = generate_rows(count, seed=seed)
+    df = pd.DataFrame(rows, columns=['Date', 'Description', 'Amount'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    expenses = [category for category in CATEGORIES if category != 'Income']
+    categories = np.random.default_rng(seed).choice(expenses, size=count)
+    df['Category'] = np.where(df['Amount'] > 0, 'Income', categories)
+    return df
+
+
+def legacy_aggregate(combined_df):
+    """The original upload_files/get_spending_insights aggregation, kept here as the baseline."""
+    category_data = combined_df[combined_df['Amount'] < 0].groupby('Category')['Amount'].sum().reset_index()
+    category_data['Amount'] = category_data['Amount'].abs()
+
+    transactions_by_category = {}
+    for category in category_data['Category'].unique():
+        category_transactions = combined_df[
+            (combined_df['Category'] == category) &
+            (combined_df['Amount'] < 0)
+        ].sort_values('Date', ascending=False)
+        transactions_by_category[category] = category_transactions.to_dict('records')
+
+    transactions = combined_df.to_dict('records')
+    high_ticket_items = []
+    for transaction in transactions:
+        if transaction.get('Amount') and abs(transaction['Amount']) > 500 and transaction.get('Category') != 'Income':
+            high_ticket_items.append({
+                'Description': transaction.get('Description', 'Unknown'),
+                'Amount': abs(transaction['Amount']),
+                'Category': transaction.get('Category', 'Uncategorized'),
+                'Date': transaction.get('Date', '').strftime('%Y-%m-%d') if transaction.get('Date') else ''
+            })
+
+    monthly_spending = {}
+    for transaction in transactions:
+        if transaction.get('Date') and transaction.get('Category'):
+            month = transaction['Date'].strftime('%Y-%m')
+            category = transaction['Category']
+            amount = abs(transaction.get('Amount', 0))
+
+            if month not in monthly_spending:
+                monthly_spending[month] = {}
+            if category not in monthly_spending[month]:
+                monthly_spending[month][category] = 0
+            monthly_spending[month][category] += amount
+
+    return {
+        'category_data': category_data.to_dict('records'),
+        'transactions_by_category': transactions_by_category,
+        'monthly_spending': monthly_spending,
+        'high_ticket_items': high_ticket_items
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3, help='best of this many runs per size')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = []
+    for count in args.rows:
+        df = categorized_frame(count)
+        # The pipeline hands aggregate_frame canonical frames (cents, categoricals); the baseline keeps float dollars
+        canonical = canonical_frame(df)
+        timings = {}
+        for name, run in (('single_pass', lambda: aggregate_frame(canonical).summary()),
+                          ('legacy', lambda: legacy_aggregate(df))):
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        result = {
+            'rows': count,
+            'single_pass_seconds': round(timings['single_pass'], 4),
+            'legacy_seconds': round(timings['legacy'], 4),
+            'speedup': round(timings['legacy'] / timings['single_pass'], 1)
+        }
+        results.append(result)
+        print(f"{count:>8} rows  single pass {timings['single_pass']:8.3f}s  "
+              f"legacy {timings['legacy']:8.3f}s  ({result['speedup']:5.1f}x)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Memory benchmark for the canonical transaction frame.
+
+Compares bytes per row of a categorized statement held the way the pipeline
+used to hold it (every source column kept, object strings, float dollar
+amounts, object categories) with the canonical frame of frames.py (datetime
+dates, categorical descriptions and categories, int64 cents). Sizes are
+``memory_usage(deep=True)``, so string payloads are counted. Run from the
+backend directory:
+
+    python -m benchmarks.bench_memory --rows 100000 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_rows
+from categorization import CATEGORIES
+from frames import canonical_frame
+
+
+def legacy_frame(count, seed=0):
+    """A categorized standard-layout statement as the pipeline used to pass it around, Balance column included."""
+    df = pd.DataFrame(generate_rows(count, seed=seed), columns=['Date', 'Description', 'Amount'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    df['Balance'] = df['Amount'].cumsum().round(2)
+    expenses = [category for category in CATEGORIES if category != 'Income']
+    df['Category'] = np.where(df['Amount'] > 0, 'Income', np.random.default_rng(seed).choice(expenses, size=count))
+    return df.astype({'Category': object})
+
+
+def bytes_per_row(df):
+    return df.memory_usage(deep=True, index=False).sum() / len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = []
+    for count in args.rows:
+        legacy = legacy_frame(count)
+        start = time.perf_counter()
+        canonical = canonical_frame(legacy)
+        elapsed = time.perf_counter() - start
+
+        result = {
+            'rows': count,
+            'legacy_bytes_per_row': round(bytes_per_row(legacy), 1),
+            'canonical_bytes_per_row': round(bytes_per_row(canonical), 1),
+            'distinct_descriptions': len(canonical['Description'].cat.categories),
+            'convert_seconds': round(elapsed, 4)
+        }
+        result['reduction'] = round(result['legacy_bytes_per_row'] / result['canonical_bytes_per_row'], 1)
+        results.append(result)
+        print(f"{count:>8} rows  legacy {result['legacy_bytes_per_row']:7.1f} B/row  "
+              f"canonical {result['canonical_bytes_per_row']:6.1f} B/row  ({result['reduction']:4.1f}x smaller)  "
+              f"convert {elapsed:6.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
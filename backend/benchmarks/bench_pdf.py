@@ -0,0 +1,68 @@
+"""PDF extraction throughput over synthetic multi-page statements.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pdf --pages 4 16 64
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_rows, write_pdf
+from pdf_extraction import extract_pdf_frame
+
+ROWS_PER_PAGE = 40
+
+
+def time_call(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            rows = generate_rows(pages * ROWS_PER_PAGE)
+            for layout in ('table', 'text'):
+                path = os.path.join(tmp, f"{layout}-{pages}.pdf")
+                write_pdf(path, rows, rows_per_page=ROWS_PER_PAGE, table=layout == 'table')
+                for mode, parallel in (('sequential', False), ('page-parallel', True)):
+                    # Warm the worker pool so process start-up isn't billed to the first run
+                    if parallel:
+                        extract_pdf_frame(path, parallel=True)
+                    seconds, frame = time_call(lambda: extract_pdf_frame(path, parallel=parallel), args.repeat)
+                    result = {
+                        'layout': layout,
+                        'mode': mode,
+                        'pages': pages,
+                        'rows': len(frame),
+                        'seconds': round(seconds, 4),
+                        'pages_per_second': round(pages / seconds, 1)
+                    }
+                    results.append(result)
+                    print(f"{layout:>5} {mode:>13} {pages:>4} pages  {len(frame):>6} rows  "
+                          f"{seconds:8.3f}s  {result['pages_per_second']:8.1f} pages/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
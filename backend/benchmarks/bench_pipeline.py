@@ -0,0 +1,243 @@
+"""End-to-end pipeline benchmark over synthetic statements.
+
+Writes CSV and Excel statements in every bank layout of benchmarks.synthetic,
+plus multi-page PDFs drawn as text lines and as ruled tables, at each row
+count, and times:
+
+- ``process_file``: parse, clean and categorize one statement
+- ``extract_transactions_from_pdf``: PDFs only
+- ``parse_text_for_transactions``: the same rows as raw statement text
+- ``upload``: a full POST /api/upload through the Flask test client
+
+The LLM is the deterministic local stub (LLM_BACKEND=stub) and every cache
+lives in a scratch directory. Uploads get an empty result cache on every run
+so each one does the full parse and categorize; the merchant cache is left to
+warm up as it would in production. Every case reports throughput at the
+median, p50/p99 latency and the peak RSS of this process while it ran (PDF
+page workers run in their own processes and aren't included).
+
+Run from the backend directory and keep the JSON output; pass an earlier run
+as --baseline to print the change per case. ``--full`` adds the 1,000,000-row
+scale point (CSV and the text parser; Excel and PDF stay capped by
+--max-xlsx-rows and --max-pdf-rows unless those are raised too):
+
+    python -m benchmarks.bench_pipeline --rows 1000 10000 100000 --output pipeline.json
+    python -m benchmarks.bench_pipeline --rows 1000 10000 100000 --baseline pipeline.json
+    python -m benchmarks.bench_pipeline --full --repeat 3 --output pipeline-1m.json
+"""
+import argparse
+import io
+import itertools
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import LAYOUTS, PDF_LAYOUTS, generate_rows, statement_lines, write_statement
+
+FORMATS = ('csv', 'xlsx', 'pdf')
+
+# Row counts run by default, and the scale point --full adds
+DEFAULT_ROWS = [1000, 10000, 100000]
+FULL_ROWS = 1000000
+
+
+class PeakRSS:
+    """Highest resident set size seen while the block runs, sampled from /proc every few milliseconds.
+
+    Without /proc (macOS) it falls back to the process-wide high-water mark.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+        self._proc = os.path.exists('/proc/self/statm')
+
+    def __enter__(self):
+        if self._proc:
+            self.peak = self._sample()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._proc:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._sample())
+        else:
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+    def _sample(self) -> int:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * self._page_size
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._sample())
+
+
+def measure(fn, repeat):
+    """Run fn ``repeat`` times after one warm-up run; returns latencies, peak RSS and the last result."""
+    result = fn()
+    latencies = []
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            latencies.append(time.perf_counter() - start)
+    return latencies, rss.peak, result
+
+
+def summarize(case, rows, latencies, peak_rss, **extra):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    summary = {
+        'case': case,
+        'rows': rows,
+        **extra,
+        'runs': len(latencies),
+        'p50_seconds': round(float(p50), 5),
+        'p99_seconds': round(float(p99), 5),
+        'rows_per_second': round(rows / p50, 1) if p50 else None,
+        'peak_rss_mb': round(peak_rss / 2 ** 20, 1),
+    }
+    label = f"{extra.get('format', '')} {extra.get('layout', '')}"
+    print(f"{case:<30} {label:<18} {rows:>8} rows  p50 {p50:8.4f}s  p99 {p99:8.4f}s  "
+          f"{summary['rows_per_second'] or 0:>12,.0f} rows/s  {summary['peak_rss_mb']:8.1f} MB")
+    return summary
+
+
+def case_key(result):
+    return (result['case'], result['rows'], result.get('format'), result.get('layout'))
+
+
+def compare(results, baseline_path):
+    """Print the p50 and peak RSS change of every case also present in the baseline run."""
+    with open(baseline_path) as f:
+        baseline = {case_key(result): result for result in json.load(f)['results']}
+    print(f"\nchange vs {baseline_path} (negative is faster / smaller)")
+    for result in results:
+        before = baseline.get(case_key(result))
+        if before is None:
+            continue
+        latency = (result['p50_seconds'] / before['p50_seconds'] - 1) * 100 if before['p50_seconds'] else 0.0
+        memory = result['peak_rss_mb'] - before['peak_rss_mb']
+        label = ' '.join(str(part) for part in case_key(result) if part is not None)
+        print(f"{label:<60} p50 {latency:+7.1f}%  peak RSS {memory:+8.1f} MB")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--full', action='store_true', help=f'also run {FULL_ROWS:,} rows (slow)')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--layouts', nargs='+', choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    parser.add_argument('--pdf-layouts', nargs='+', choices=PDF_LAYOUTS, default=list(PDF_LAYOUTS))
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case, after one warm-up run')
+    parser.add_argument('--max-pdf-rows', type=int, default=10000,
+                        help='PDFs above this size are skipped (40 rows per page)')
+    parser.add_argument('--max-xlsx-rows', type=int, default=200000,
+                        help='Excel files above this size are skipped')
+    parser.add_argument('--view', choices=['full', 'summary'], default='full', help='upload response view')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='earlier --output to compare against')
+    args = parser.parse_args()
+    if args.full and FULL_ROWS not in args.rows:
+        args.rows = args.rows + [FULL_ROWS]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ.update(
+            LLM_BACKEND='stub',
+            LOG_LEVEL='WARNING',
+            MERCHANT_CACHE_PATH=os.path.join(scratch, 'merchants.db'),
+            RESULT_CACHE_DIR=os.path.join(scratch, 'results'),
+            TRANSACTION_STORE_PATH=os.path.join(scratch, 'transactions.db'),
+            LAYOUT_CACHE_PATH=os.path.join(scratch, 'layouts.db'),
+            JOBS_DIR=os.path.join(scratch, 'jobs'),
+        )
+        import app as backend
+        from pdf_extraction import extract_transactions_from_pdf, parse_text_for_transactions
+        from result_cache import ResultCache
+
+        flask_app = backend.create_app(start_jobs=False)
+        flask_app.config['UPLOAD_FOLDER'] = os.path.join(scratch, 'uploads')
+        os.makedirs(flask_app.config['UPLOAD_FOLDER'], exist_ok=True)
+        client = flask_app.test_client()
+        logging.disable(logging.WARNING)
+
+        runs = itertools.count()
+
+        def upload(path):
+            if backend.result_cache is not None:
+                backend.result_cache = ResultCache(os.path.join(scratch, f"results-{next(runs)}"))
+            with open(path, 'rb') as f:
+                data = f.read()
+            response = client.post(f"/api/upload?view={args.view}",
+                                   data={'files': [(io.BytesIO(data), os.path.basename(path))]},
+                                   content_type='multipart/form-data')
+            if response.status_code != 200:
+                raise RuntimeError(f"Upload of {path} failed: {response.get_data(as_text=True)[:200]}")
+            return response
+
+        results = []
+        for count in args.rows:
+            rows = generate_rows(count)
+
+            text = '\n'.join(statement_lines(count))
+            latencies, peak, _ = measure(lambda: parse_text_for_transactions(text), args.repeat)
+            results.append(summarize('parse_text_for_transactions', count, latencies, peak))
+
+            for fmt in args.formats:
+                if (fmt == 'pdf' and count > args.max_pdf_rows) or (fmt == 'xlsx' and count > args.max_xlsx_rows):
+                    print(f"skipping {fmt} at {count} rows")
+                    continue
+                for layout in (args.layouts if fmt != 'pdf' else args.pdf_layouts):
+                    path = os.path.join(scratch, f"{layout}-{count}.{fmt}")
+                    write_statement(path, rows, layout)
+                    size = os.path.getsize(path)
+
+                    latencies, peak, frame = measure(lambda: backend.process_file(path), args.repeat)
+                    results.append(summarize('process_file', len(frame), latencies, peak,
+                                             format=fmt, layout=layout, bytes=size))
+                    if fmt == 'pdf':
+                        latencies, peak, records = measure(lambda: extract_transactions_from_pdf(path), args.repeat)
+                        results.append(summarize('extract_transactions_from_pdf', len(records), latencies, peak,
+                                                 format=fmt, layout=layout, bytes=size))
+                    latencies, peak, _ = measure(lambda: upload(path), args.repeat)
+                    results.append(summarize('upload', count, latencies, peak, format=fmt, layout=layout, bytes=size))
+                    os.remove(path)
+
+    report = {
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
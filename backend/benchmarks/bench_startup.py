@@ -0,0 +1,109 @@
+"""Startup benchmark: import-time breakdown and time to first request.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Run from the backend directory and keep the JSON output to compare releases:
+
+    python -m benchmarks.bench_startup --output startup.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+# Runs in the child interpreter; prints one JSON line of timings
+_FIRST_REQUEST = r'''
+import io, json, sys, time
+start = time.perf_counter()
+import app as backend
+imported = time.perf_counter()
+flask_app = backend.create_app(start_jobs=False)
+created = time.perf_counter()
+client = flask_app.test_client()
+client.get('/api/health')
+first_request = time.perf_counter()
+timings = {
+    'import_seconds': imported - start,
+    'create_app_seconds': created - imported,
+    'first_request_seconds': first_request - start,
+}
+if sys.argv[1]:
+    with open(sys.argv[1], 'rb') as f:
+        data = f.read()
+    client.post('/api/upload', data={'files': [(io.BytesIO(data), 'statement.csv')]},
+                content_type='multipart/form-data')
+    timings['first_upload_seconds'] = time.perf_counter() - first_request
+print(json.dumps(timings))
+'''
+
+
+def import_breakdown(module, top):
+    """Top-level packages imported by ``module`` with their cumulative import time."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    packages = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        depth = len(indent) // 2
+        if name == module and depth == 0:
+            total = int(cumulative)
+        elif depth == 1:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + int(cumulative)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total / 1e6, [{'module': name, 'seconds': round(micros / 1e6, 4)} for name, micros in ranked]
+
+
+def first_request(statement, env):
+    result = subprocess.run([sys.executable, '-c', _FIRST_REQUEST, statement or ''],
+                            capture_output=True, text=True, check=True, env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15, help='packages to list in the import breakdown')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per measurement (best is kept)')
+    parser.add_argument('--statement', default=os.path.join('..', 'sample_bank_statement.csv'),
+                        help="CSV uploaded as the first real request ('' to skip)")
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+
+    import_seconds, packages = min((import_breakdown(args.module, args.top) for _ in range(args.runs)),
+                                   key=lambda run: run[0])
+    print(f"import {args.module}: {import_seconds:.3f}s")
+    for entry in packages:
+        print(f"  {entry['module']:<24} {entry['seconds']:8.3f}s")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Caches go to a scratch directory so every run starts cold
+        env = dict(os.environ, LOG_LEVEL='WARNING', LLM_BACKEND='stub', JOBS_DIR=os.path.join(scratch, 'jobs'))
+        runs = []
+        for i in range(args.runs):
+            env.update(
+                MERCHANT_CACHE_PATH=os.path.join(scratch, f'merchants-{i}.db'),
+                RESULT_CACHE_DIR=os.path.join(scratch, f'results-{i}'),
+                TRANSACTION_STORE_PATH=os.path.join(scratch, f'transactions-{i}.db'),
+                LAYOUT_CACHE_PATH=os.path.join(scratch, f'layouts-{i}.db'),
+            )
+            runs.append(first_request(args.statement, env))
+    timings = {key: round(min(run[key] for run in runs), 4) for key in runs[0]}
+    for key, value in timings.items():
+        print(f"{key:<24} {value:8.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'import_seconds': round(import_seconds, 4), 'imports': packages, **timings}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
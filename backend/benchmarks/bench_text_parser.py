@@ -0,0 +1,83 @@
+"""Microbenchmark for the statement text-line parser.
+
+Compares the vectorized parser with the previous per-line regex +
+to_datetime implementation. Run from the backend directory:
+
+    python -m benchmarks.bench_text_parser --lines 1000 10000 100000
+"""
+import argparse
+import json
+import logging
+import re
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import statement_lines
+from pdf_extraction import parse_text_lines
+
+
+def legacy_parse_text(text):
+    """The original parse_text_for_transactions, kept here as the baseline."""
+    transactions = []
+    for line in text.split('\n'):
+        date_match = re.search(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', line)
+        if date_match:
+            try:
+                date = pd.to_datetime(date_match.group(1))
+                amount_match = re.search(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)', line)
+                if amount_match:
+                    amount = float(amount_match.group(1).replace(',', ''))
+                    desc_start = line.find(date_match.group(1)) + len(date_match.group(1))
+                    desc_end = line.find(amount_match.group(0))
+                    transactions.append({
+                        'Date': date,
+                        'Description': line[desc_start:desc_end].strip(),
+                        'Amount': amount
+                    })
+            except Exception:
+                continue
+    return transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--skip-legacy-above', type=int, default=20000,
+                        help='the legacy parser is slow; skip it for larger inputs')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    results = []
+    for count in args.lines:
+        lines = statement_lines(count)
+        start = time.perf_counter()
+        frame, date_format = parse_text_lines(lines)
+        vectorized = time.perf_counter() - start
+
+        legacy = None
+        if count <= args.skip_legacy_above:
+            start = time.perf_counter()
+            legacy_parse_text('\n'.join(lines))
+            legacy = time.perf_counter() - start
+
+        result = {
+            'lines': len(lines),
+            'rows': len(frame),
+            'date_format': date_format,
+            'vectorized_seconds': round(vectorized, 4),
+            'legacy_seconds': round(legacy, 4) if legacy is not None else None,
+            'speedup': round(legacy / vectorized, 1) if legacy else None
+        }
+        results.append(result)
+        legacy_text = f"{legacy:8.3f}s  ({legacy / vectorized:6.1f}x)" if legacy else "   skipped"
+        print(f"{len(lines):>8} lines  vectorized {vectorized:8.3f}s  legacy {legacy_text}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Synthetic bank statements for benchmarks.
+
+Rows come from ``generate_rows`` and are written as CSV or Excel exports in
+one of several bank ``LAYOUTS``, as multi-page PDFs (``write_pdf``) or as
+raw statement text lines (``statement_lines``).
+"""
+import csv
+import random
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Sequence, Tuple
+
+MERCHANTS = [
+    'Public Transport', 'ATM Withdrawal', 'Grocery Store', 'Coffee Shop', 'Restaurant', 'Gas Station',
+    'Doctor Appointment', 'Pharmacy', 'Electricity Bill', 'Internet Bill', 'Mobile Bill', 'Cinema',
+    'Online Shopping', 'Clothing Store', 'Supermarket', 'Fast Food', 'Bookstore', 'Concert Tickets',
+    'UBER *TRIP', 'AMAZON MKTPLACE', 'NETFLIX.COM', 'RENT PAYMENT', 'Local Bistro', 'Hardware Depot',
+]
+
+
+def generate_rows(count: int, seed: int = 0, start: date = date(2020, 1, 1)) -> List[Tuple[date, str, float]]:
+    """(date, description, signed amount) rows in date order, with a paycheck every ~30 rows."""
+    rng = random.Random(seed)
+    rows = []
+    day = start
+    for i in range(count):
+        if rng.random() < 0.3:
+            day += timedelta(days=1)
+        if i % 30 == 29:
+            rows.append((day, 'Payroll Deposit', round(rng.uniform(1500, 4000), 2)))
+        else:
+            amount = rng.uniform(3, 120) if rng.random() < 0.95 else rng.uniform(500, 2500)
+            rows.append((day, f"{rng.choice(MERCHANTS)} #{rng.randint(100, 999)}", -round(amount, 2)))
+    return rows
+
+
+def text_line(day: date, description: str, amount: float, date_format: str = '%m/%d/%Y') -> str:
+    """One statement line as printed on a PDF: "MM/DD/YYYY Description -$1,234.56"."""
+    sign = '-' if amount < 0 else ''
+    return f"{day.strftime(date_format)} {description} {sign}${abs(amount):,.2f}"
+
+
+def statement_lines(count: int, seed: int = 0) -> List[str]:
+    """Text lines of a statement, with a page header every 40 transactions."""
+    lines = []
+    for i, row in enumerate(generate_rows(count, seed=seed)):
+        lines.append(text_line(*row))
+        if i % 40 == 0:
+            lines.append('Page header: Account 1234  Statement period')
+    return lines
+
+
+class Layout:
+    """A bank export layout: its header and how one (date, description, amount) row is laid out.
+
+    ``cells`` returns CSV text cells; ``values`` returns the typed cells an
+    Excel export would hold (real dates and numbers).
+    """
+
+    def __init__(self, columns: Sequence[str], cells: Callable[[date, str, float, float], list],
+                 values: Callable[[date, str, float, float], list]):
+        self.columns = list(columns)
+        self.cells = cells
+        self.values = values
+
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+
+def _reference(day: date, description: str) -> str:
+    return f"REF{zlib.crc32(f'{day}{description}'.encode()):010d}"
+
+
+LAYOUTS: Dict[str, Layout] = {
+    # The shape of sample_bank_statement.csv: ISO dates, one signed amount, running balance
+    'standard': Layout(
+        ['Date', 'Description', 'Category', 'Amount', 'Balance'],
+        lambda day, description, amount, balance: [day.isoformat(), description, '', f"{amount:.2f}", f"{balance:.2f}"],
+        lambda day, description, amount, balance: [datetime(day.year, day.month, day.day), description, None,
+                                                  amount, round(balance, 2)]
+    ),
+    # US checking export: MM/DD/YYYY, separate debit and credit columns with currency formatting
+    'debit_credit': Layout(
+        ['Posted Date', 'Reference', 'Payee Details', 'Debit', 'Credit', 'Balance'],
+        lambda day, description, amount, balance: [
+            day.strftime('%m/%d/%Y'), _reference(day, description), description,
+            _money(-amount) if amount < 0 else '', _money(amount) if amount > 0 else '', _money(balance)],
+        lambda day, description, amount, balance: [
+            datetime(day.year, day.month, day.day), _reference(day, description), description,
+            -amount if amount < 0 else None, amount if amount > 0 else None, round(balance, 2)]
+    ),
+    # European card export: DD/MM/YYYY, a signed value and extra columns the parser must ignore
+    'narrative': Layout(
+        ['Transaction Date', 'Narrative', 'Value', 'Currency', 'Card'],
+        lambda day, description, amount, balance: [day.strftime('%d/%m/%Y'), description, f"{amount:.2f}", 'EUR', '**** 4821'],
+        lambda day, description, amount, balance: [datetime(day.year, day.month, day.day), description, amount,
+                                                  'EUR', '**** 4821']
+    ),
+}
+
+# How write_pdf draws the rows: plain statement text lines or a ruled grid
+PDF_LAYOUTS = ('text', 'table')
+
+
+def _layout_rows(rows: List[Tuple[date, str, float]], layout: Layout, typed: bool):
+    balance = 5000.0
+    cells = layout.values if typed else layout.cells
+    for day, description, amount in rows:
+        balance += amount
+        yield cells(day, description, amount, balance)
+
+
+def write_csv(path: str, rows: List[Tuple[date, str, float]], layout: str = 'standard') -> None:
+    spec = LAYOUTS[layout]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(spec.columns)
+        writer.writerows(_layout_rows(rows, spec, typed=False))
+
+
+def write_xlsx(path: str, rows: List[Tuple[date, str, float]], layout: str = 'standard') -> None:
+    import openpyxl
+
+    spec = LAYOUTS[layout]
+    # Write-only mode streams rows to disk, so million-row workbooks fit in memory
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Transactions')
+    sheet.append(spec.columns)
+    for values in _layout_rows(rows, spec, typed=True):
+        sheet.append(values)
+    workbook.save(path)
+
+
+def write_statement(path: str, rows: List[Tuple[date, str, float]], layout: str = 'standard') -> None:
+    """Write rows as a statement whose format follows the extension of ``path`` (.csv, .xlsx or .pdf).
+
+    ``layout`` names one of ``LAYOUTS`` for CSV and Excel, and one of
+    ``PDF_LAYOUTS`` for PDFs: text lines, or a ruled table grid.
+    """
+    if path.endswith('.csv'):
+        write_csv(path, rows, layout)
+    elif path.endswith('.xlsx'):
+        write_xlsx(path, rows, layout)
+    elif path.endswith('.pdf'):
+        write_pdf(path, rows, table=layout == 'table')
+    else:
+        raise ValueError(f"Unsupported statement format: {path}")
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: str, rows: List[Tuple[date, str, float]], rows_per_page: int = 40, table: bool = False,
+              date_format: str = '%m/%d/%Y') -> int:
+    """Write a minimal multi-page PDF statement and return its page count.
+
+    With ``table`` the rows are drawn as a ruled Date/Description/Amount grid
+    (found by pdfplumber's table finder); otherwise they are plain text lines
+    of the form "MM/DD/YYYY Description $12.34". Dates are printed with
+    ``date_format``.
+    """
+    pages = [rows[i:i + rows_per_page] for i in range(0, len(rows), rows_per_page)] or [[]]
+    streams = []
+    for page_rows in pages:
+        ops = ['BT /F1 9 Tf ET']
+        top = 760
+        if table:
+            xs = [40, 130, 430, 560]
+            lines = [('Date', 'Description', 'Amount')] + [
+                (day.strftime(date_format), description, f"{amount:.2f}") for day, description, amount in page_rows
+            ]
+            height = 16
+            for r, cells in enumerate(lines):
+                y = top - r * height
+                for x, cell in zip(xs, cells):
+                    ops.append(f"BT /F1 9 Tf {x + 4} {y - 12} Td ({_pdf_escape(cell)}) Tj ET")
+            bottom = top - len(lines) * height
+            for r in range(len(lines) + 1):
+                y = top - r * height
+                ops.append(f"{xs[0]} {y} m {xs[-1]} {y} l S")
+            for x in xs:
+                ops.append(f"{x} {top} m {x} {bottom} l S")
+        else:
+            for r, (day, description, amount) in enumerate(page_rows):
+                line = text_line(day, description, amount, date_format)
+                ops.append(f"BT /F1 9 Tf 40 {top - r * 16} Td ({_pdf_escape(line)}) Tj ET")
+        streams.append(('\n'.join(ops) + '\n').encode('latin-1'))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # pages tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for stream in streams:
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(len(objects) + 1)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b' '.join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(out)
+    return len(pages)
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+from llm import LLMExecutor, OpenAIBackend
+from local_categorizer import KeywordMatcher, LocalClassifier
+from merchant_cache import MerchantCategoryCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = [
+    'Income',
+    'Food & Dining',
+    'Transportation',
+    'Housing',
+    'Entertainment',
+    'Healthcare',
+    'Shopping',
+    'Utilities',
+    'Education',
+    'Travel',
+    'Other',
+]
+
+DEFAULT_BATCH_SIZE = int(os.getenv('CATEGORIZATION_BATCH_SIZE', '50'))
+
+# Roughly one short JSON entry per row plus the surrounding braces
+TOKENS_PER_ROW = 12
+BASE_TOKENS = 20
+
+SYSTEM_PROMPT = "You are a financial transaction categorizer. Respond with only valid JSON."
+
+# A completion function takes chat messages, temperature and max_tokens and returns the reply text
+CompletionFn = Callable[[List[Dict[str, str]], float, int], str]
+
+_CATEGORY_LOOKUP = {category.lower(): category for category in CATEGORIES}
+
+
+def build_batch_prompt(descriptions: Sequence[str], amounts: Sequence[float]) -> str:
+    rows = "\n".join(
+        f"{i}. {' '.join(str(description).split())} | ${amount}"
+        for i, (description, amount) in enumerate(zip(descriptions, amounts), 1)
+    )
+    categories = "\n".join(f"- {category}" for category in CATEGORIES)
+
+    return f"""Categorize each of these financial transactions into one of these categories:
+{categories}
+
+Use Income for positive amounts.
+
+Transactions (number. description | amount):
+{rows}
+
+Return a JSON object mapping each transaction number to its category name, e.g. {{"1": "Food & Dining", "2": "Income"}}. Return nothing else."""
+
+
+def parse_batch_response(text: str, expected: int) -> Optional[List[str]]:
+    """Return the categories in row order, or None if the response is malformed."""
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        return None
+    try:
+        payload = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    categories = []
+    for i in range(1, expected + 1):
+        value = payload.get(str(i))
+        if not isinstance(value, str) or value.strip().lower() not in _CATEGORY_LOOKUP:
+            return None
+        categories.append(_CATEGORY_LOOKUP[value.strip().lower()])
+    return categories
+
+
+def categorize_batch(descriptions: Sequence[str], amounts: Sequence[float],
+                     complete: CompletionFn) -> List[Optional[str]]:
+    """Categorize one batch, splitting it in half and retrying when the reply is malformed.
+
+    Rows that still can't be categorized on their own come back as None. A
+    backend error fails the whole batch without splitting: the executor has
+    already retried it, and bisecting would only multiply the failing calls.
+    """
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_batch_prompt(descriptions, amounts)}
+    ]
+    try:
+        text = complete(messages, 0.1, BASE_TOKENS + TOKENS_PER_ROW * len(descriptions))
+    except Exception as e:
+        logger.error(f"Error in AI categorization of {len(descriptions)} rows: {str(e)}")
+        return [None] * len(descriptions)
+
+    categories = parse_batch_response(text, len(descriptions))
+    if categories is not None:
+        return categories
+
+    if len(descriptions) == 1:
+        logger.warning(f"Could not categorize '{descriptions[0]}'")
+        return [None]
+
+    mid = len(descriptions) // 2
+    logger.warning(f"Malformed categorization response for batch of {len(descriptions)}, splitting")
+    return (categorize_batch(descriptions[:mid], amounts[:mid], complete) +
+            categorize_batch(descriptions[mid:], amounts[mid:], complete))
+
+
+class TieredCategorizer:
+    """Categorize rows through progressively more expensive tiers.
+
+    Positive amounts and keyword matches are settled by ``rules``, then the
+    merchant cache is consulted, then the optional local ``classifier``; only
+    what is left goes to the LLM, one batch per ``batch_size`` unseen merchants.
+    With an ``executor`` the batches are sent concurrently through its pool.
+    The classifier is refitted on a background thread every ``retrain_every``
+    new LLM labels. Rows are counted per tier so hit rates can be reported.
+    """
+
+    TIERS = ('rules', 'cache', 'classifier', 'llm')
+
+    def __init__(self, complete: Optional[CompletionFn] = None,
+                 cache: Optional[MerchantCategoryCache] = None,
+                 rules: Optional[KeywordMatcher] = None,
+                 classifier: Optional[LocalClassifier] = None,
+                 batch_size: Optional[int] = None,
+                 retrain_every: int = 200,
+                 executor: Optional[LLMExecutor] = None):
+        self.executor = executor
+        self.complete = complete or (executor.call if executor is not None else OpenAIBackend())
+        self.cache = cache
+        self.rules = rules
+        self.classifier = classifier
+        self.batch_size = max(1, batch_size or DEFAULT_BATCH_SIZE)
+        self.retrain_every = retrain_every
+        self._counts = Counter()
+        self._labels_since_fit = None
+        self._training = None
+        self._lock = threading.Lock()
+
+    def categorize(self, descriptions: Sequence[str], amounts: Sequence[float]) -> List[str]:
+        descriptions = list(descriptions)
+        amounts = list(amounts)
+        keys = [cache_key(description, amount) for description, amount in zip(descriptions, amounts)]
+        rows_per_key = Counter(keys)
+
+        # One representative row per distinct merchant/sign
+        pending = {}
+        for key, description, amount in zip(keys, descriptions, amounts):
+            if key not in pending:
+                pending[key] = (description, amount)
+
+        resolved = {}
+        tier_rows = Counter()
+
+        def settle(tier, results):
+            for key, category in results.items():
+                resolved[key] = category
+                tier_rows[tier] += rows_per_key[key]
+                del pending[key]
+
+        if self.rules is not None:
+            settle('rules', {
+                key: category for key, category in (
+                    (key, 'Income' if amount > 0 else self.rules.match(description))
+                    for key, (description, amount) in pending.items()
+                ) if category
+            })
+
+        if self.cache is not None and pending:
+            settle('cache', self.cache.get_many(pending))
+
+        if self.classifier is not None and pending:
+            self._ensure_trained()
+            candidates = [key for key in pending if key.endswith('|-')]
+            predictions = self.classifier.predict([key.rsplit('|', 1)[0] for key in candidates])
+            settle('classifier', {
+                key: category for key, (category, _) in zip(candidates, predictions) if category
+            })
+
+        pending_keys = list(pending)
+        batches = [pending_keys[start:start + self.batch_size]
+                   for start in range(0, len(pending_keys), self.batch_size)]
+
+        def run_batch(batch):
+            return categorize_batch([pending[key][0] for key in batch],
+                                    [pending[key][1] for key in batch], self.complete)
+
+        if self.executor is not None:
+            results = self.executor.map(run_batch, batches)
+        else:
+            results = [run_batch(batch) for batch in batches]
+
+        learned = {}
+        for batch, categories in zip(batches, results):
+            learned.update(zip(batch, categories))
+        tier_rows['llm'] += sum(rows_per_key[key] for key in pending_keys)
+
+        # Don't pin failed lookups in the cache
+        learned = {key: category for key, category in learned.items() if category is not None}
+        if self.cache is not None:
+            self.cache.set_many(learned)
+        resolved.update(learned)
+
+        with self._lock:
+            self._counts['rows'] += len(keys)
+            self._counts.update(tier_rows)
+            if self._labels_since_fit is not None:
+                self._labels_since_fit += len(learned)
+
+        return [resolved.get(key) or 'Other' for key in keys]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            rows = self._counts['rows']
+            result = {'rows': rows}
+            for tier in self.TIERS:
+                result[f'{tier}_rows'] = self._counts[tier]
+                result[f'{tier}_hit_rate'] = self._counts[tier] / rows if rows else 0.0
+        return result
+
+    def _ensure_trained(self) -> None:
+        """Start fitting the classifier from cached LLM labels on first use and after enough new ones.
+
+        The fit runs on a background thread so no request pays for it; until it
+        finishes the previous model keeps serving (before the first fit, those
+        rows go to the LLM).
+        """
+        if self.cache is None or not self.classifier.available():
+            return
+        with self._lock:
+            if self._training is not None and self._training.is_alive():
+                return
+            if self._labels_since_fit is not None and self._labels_since_fit < self.retrain_every:
+                return
+            self._labels_since_fit = 0
+            self._training = threading.Thread(target=self._train, name='classifier-fit', daemon=True)
+            self._training.start()
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> None:
+        """Block until a background fit in progress has finished."""
+        training = self._training
+        if training is not None:
+            training.join(timeout)
+
+    def _train(self) -> None:
+        try:
+            self.classifier.fit_from_cache(self.cache)
+        except Exception as e:
+            logger.error(f"Error training local classifier: {str(e)}")
+
+
+def categorize_transactions(descriptions: Sequence[str], amounts: Sequence[float],
+                            complete: Optional[CompletionFn] = None,
+                            batch_size: Optional[int] = None,
+                            cache: Optional[MerchantCategoryCache] = None) -> List[str]:
+    """Categorize transactions with the LLM only, one call per batch of unseen merchants."""
+    return TieredCategorizer(complete=complete, cache=cache, batch_size=batch_size).categorize(descriptions, amounts)
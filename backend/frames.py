@@ -0,0 +1,82 @@
+"""The canonical transaction frame passed between pipeline stages.
+
+Every parsed statement is reduced to the same four lean columns:
+
+- ``Date``: datetime64[ns]
+- ``Description``: a categorical, so each distinct merchant string is stored
+  once and rows hold small integer codes
+- ``Amount``: int64 cents, exact and half the size of an object column
+- ``Category``: a categorical over the fixed CATEGORIES set, once categorized
+
+Aggregates are computed on this frame; ``dollar_frame`` converts it back to
+float dollars at the edges (API responses, cached result pages).
+"""
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from categorization import CATEGORIES
+
+CANONICAL_COLUMNS = ['Date', 'Description', 'Amount']
+
+CATEGORY_DTYPE = pd.CategoricalDtype(CATEGORIES)
+
+CENTS = 100
+
+
+def to_cents(amounts: Iterable[float]) -> np.ndarray:
+    return np.rint(np.asarray(amounts, dtype=float) * CENTS).astype(np.int64)
+
+
+def to_dollars(cents: Iterable[int]) -> np.ndarray:
+    return np.asarray(cents, dtype=np.int64) / CENTS
+
+
+def intern_strings(values: pd.Series) -> pd.Categorical:
+    """Stripped strings as a categorical; only the distinct values are stripped and stored."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    stripped = pd.Index(uniques).astype(str).str.strip()
+    # Stripping can make two raw values equal, so the stripped set is factorized again
+    stripped_codes, categories = pd.factorize(stripped)
+    return pd.Categorical.from_codes(stripped_codes[codes], categories=categories)
+
+
+def category_column(values: Sequence[str]) -> pd.Categorical:
+    """Categories over the fixed set; anything outside it becomes Other."""
+    values = pd.Series(values, copy=False)
+    # pandas deprecates casting values outside the dtype's categories to NaN, so they're mapped first
+    known = values.isin(CATEGORIES)
+    if not known.all():
+        values = values.astype(object).where(known, 'Other')
+    return pd.Categorical(values, dtype=CATEGORY_DTYPE)
+
+
+def canonical_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Reduce a cleaned frame (float dollar amounts, no missing values) to the canonical columns."""
+    frame = pd.DataFrame({
+        'Date': df['Date'].to_numpy(dtype='datetime64[ns]'),
+        'Description': intern_strings(df['Description']),
+        'Amount': to_cents(df['Amount'])
+    })
+    if 'Category' in df.columns:
+        frame['Category'] = category_column(df['Category'])
+    return frame
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate canonical frames, merging their description categoricals instead of falling back to objects."""
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    descriptions = union_categoricals([frame['Description'] for frame in frames])
+    combined = pd.concat([frame.drop(columns='Description') for frame in frames], ignore_index=True)
+    combined.insert(1, 'Description', descriptions)
+    return combined
+
+
+def dollar_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """A canonical frame with Amount back in float dollars, for responses."""
+    df = df.copy()
+    df['Amount'] = to_dollars(df['Amount'])
+    return df
@@ -0,0 +1,157 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Budget goal keys that set a savings target rather than a spending category
+SAVINGS_KEYS = ('savings', 'savings & investments')
+
+# Months ahead the savings projections are reported for
+PROJECTION_MONTHS = (1, 3, 6, 12, 24, 60)
+
+
+def _round(value: float) -> Optional[float]:
+    """A plain float rounded to cents, or None for NaN (no goal set, never reached)."""
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def _money(values: np.ndarray) -> List[Optional[float]]:
+    return [_round(value) for value in values]
+
+
+def _months(values: np.ndarray) -> List[Optional[int]]:
+    return [None if np.isnan(value) else int(value) for value in values]
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _months_to_reach(targets: np.ndarray, monthly_savings: float) -> np.ndarray:
+    """Whole months until ``targets`` are saved at ``monthly_savings`` a month; NaN if never."""
+    if not monthly_savings > 0:
+        return np.full(len(targets), np.nan)
+    return np.ceil(targets / monthly_savings)
+
+
+def budget_variance(category_data: Sequence[Dict[str, Any]], months: int, monthly_income: float,
+                    budget_goals: Dict[str, Any]) -> pd.DataFrame:
+    """Per expense category: share of spending, monthly average and the variance against its budget goal.
+
+    Budget goals are percentages of monthly income keyed by category name
+    (case-insensitive), the way the goals page sends them. Variance is budget
+    minus actual, so a negative value is the monthly overspend.
+    """
+    goals = {str(key).lower(): _number(value) for key, value in budget_goals.items()}
+    frame = pd.DataFrame(list(category_data), columns=['Category', 'Amount'])
+    frame = frame[frame['Category'] != 'Income']
+    totals = frame['Amount'].to_numpy(dtype=float)
+    total = totals.sum()
+
+    budget_pct = frame['Category'].str.lower().map(goals).to_numpy(dtype=float)
+    monthly_average = totals / months
+    budget_amount = budget_pct / 100 * monthly_income
+    return pd.DataFrame({
+        'category': frame['Category'].to_numpy(),
+        'total': totals,
+        'share_pct': totals / total * 100 if total else np.zeros(len(totals)),
+        'monthly_average': monthly_average,
+        'budget_pct': budget_pct,
+        'budget_amount': budget_amount,
+        'variance': budget_amount - monthly_average,
+    })
+
+
+def goal_analysis(category_data: Sequence[Dict[str, Any]], monthly_spending: Dict[str, Dict[str, float]],
+                  monthly_income: float, budget_goals: Optional[Dict[str, Any]] = None,
+                  custom_goals: Optional[Sequence[Dict[str, Any]]] = None,
+                  as_of: Optional[date] = None) -> Dict[str, Any]:
+    """Budget variance, savings projections and months-to-goal from upload aggregates.
+
+    ``category_data`` and ``monthly_spending`` are the upload response
+    aggregates; monthly figures are averaged over the months the statements
+    cover. The result only depends on the arguments (``as_of`` defaults to
+    today), so it's safe to cache and to hand to the LLM as facts.
+    """
+    budget_goals = budget_goals or {}
+    custom_goals = list(custom_goals or [])
+    as_of = as_of or date.today()
+    months = max(len(monthly_spending), 1)
+
+    budget = budget_variance(category_data, months, monthly_income, budget_goals)
+    monthly_expenses = float(budget['monthly_average'].sum())
+    # Categories without a goal are assumed to stay at their current level
+    planned_expenses = float(budget['budget_amount'].fillna(budget['monthly_average']).sum())
+    savings_goal = next((_number(value) for key, value in budget_goals.items()
+                         if str(key).lower() in SAVINGS_KEYS), np.nan)
+
+    monthly_savings = monthly_income - monthly_expenses
+    planned_savings = monthly_income - planned_expenses
+    horizons = np.array(PROJECTION_MONTHS, dtype=float)
+    income_months = [categories.get('Income', 0.0) for categories in monthly_spending.values()]
+
+    targets = np.array([_number(goal.get('amount')) for goal in custom_goals], dtype=float)
+    deadlines = pd.to_datetime(pd.Series([goal.get('deadline') for goal in custom_goals], dtype=object),
+                               errors='coerce').to_numpy(dtype='datetime64[D]')
+    # Whole calendar months until the deadline, at least one
+    deadline_months = deadlines.astype('datetime64[M]')
+    months_left = (deadline_months - np.datetime64(as_of, 'M')).astype(float)
+    months_left -= (deadlines - deadline_months.astype('datetime64[D]')).astype(float) < as_of.day - 1
+    months_left[np.isnat(deadlines)] = np.nan
+    months_left = np.maximum(months_left, 1)
+    required_monthly = targets / months_left
+    months_current = _months_to_reach(targets, monthly_savings)
+    months_planned = _months_to_reach(targets, planned_savings)
+
+    return {
+        'months_covered': months,
+        'budget': [
+            {
+                'category': row.category,
+                'total': _round(row.total),
+                'share_pct': _round(row.share_pct),
+                'monthly_average': _round(row.monthly_average),
+                'budget_pct': _round(row.budget_pct),
+                'budget_amount': _round(row.budget_amount),
+                'variance': _round(row.variance),
+                'over_budget': bool(row.variance < 0)
+            }
+            for row in budget.itertuples(index=False)
+        ],
+        'savings': {
+            'monthly_income': monthly_income,
+            'observed_monthly_income': round(float(np.mean(income_months)), 2) if income_months else None,
+            'monthly_expenses': round(monthly_expenses, 2),
+            'monthly_savings': round(monthly_savings, 2),
+            'savings_rate_pct': round(monthly_savings / monthly_income * 100, 2),
+            'planned_monthly_expenses': round(planned_expenses, 2),
+            'planned_monthly_savings': round(planned_savings, 2),
+            'planned_savings_rate_pct': round(planned_savings / monthly_income * 100, 2),
+            'target_savings_rate_pct': _round(savings_goal),
+            'projections': [
+                {'months': int(horizon), 'current': current, 'planned': planned}
+                for horizon, current, planned in zip(horizons, _money(horizons * monthly_savings),
+                                                     _money(horizons * planned_savings))
+            ]
+        },
+        'goals': [
+            {
+                'description': goal.get('description', ''),
+                'amount': amount,
+                'deadline': goal.get('deadline'),
+                'months_left': left,
+                'required_monthly_saving': required,
+                'months_to_goal': current,
+                'months_to_goal_planned': planned,
+                'on_track': current is not None and left is not None and current <= left
+            }
+            for goal, amount, left, required, current, planned in zip(
+                custom_goals, _money(targets), _months(months_left), _money(required_monthly),
+                _months(months_current), _months(months_planned)
+            )
+        ]
+    }
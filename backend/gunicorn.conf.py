@@ -0,0 +1,29 @@
+"""gunicorn settings. Run from the backend directory: ``gunicorn``."""
+import importlib
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Synchronous uploads of large statements can take minutes; async uploads return immediately
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# The app itself is not preloaded: create_app() opens SQLite connections and starts
+# job threads, neither of which survives a fork. The modules are, below.
+preload_app = False
+
+# Imported once in the master so forked workers start with them already loaded.
+# Add e.g. plotly.express,pdfplumber,openai to warm the lazily imported parts too.
+PRELOAD_MODULES = [
+    name.strip() for name in os.getenv('GUNICORN_PRELOAD_MODULES', 'app').split(',') if name.strip()
+]
+
+
+def on_starting(server):
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            server.log.warning(f"Could not preload {name}: {e}")
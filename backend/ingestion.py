@@ -0,0 +1,233 @@
+import logging
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from frames import canonical_frame
+from metrics import buffered_spans, record_stage, span, timed_iter
+from pdf_extraction import extract_pdf_frame, parse_amounts
+from schema_cache import SAMPLE_ROWS, apply_layout, resolve_layout, source_columns
+
+logger = logging.getLogger(__name__)
+
+
+# Rows per chunk when streaming large CSV/Excel exports
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def clean_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize Date/Amount/Description, drop rows missing any of them and return the canonical frame.
+
+    Columns already parsed by ``apply_layout`` are left as they are. Every
+    other column is dropped (see frames.canonical_frame).
+    """
+    try:
+        # Convert Date column to datetime
+        if not pd.api.types.is_datetime64_any_dtype(df['Date']):
+            df['Date'] = pd.to_datetime(df['Date'])
+        logger.info("Successfully converted Date column to datetime")
+        
+        # Clean Amount column
+        if not pd.api.types.is_numeric_dtype(df['Amount']):
+            df['Amount'] = parse_amounts(df['Amount'])
+        logger.info("Successfully cleaned Amount column")
+        
+        # Remove any rows with missing values
+        df = df.dropna(subset=['Date', 'Description', 'Amount'])
+        logger.info(f"Removed rows with missing values. Remaining rows: {len(df)}")
+        
+        if len(df) == 0:
+            raise ValueError("No valid transactions found after cleaning the data.")
+        
+        # Descriptions are stripped and interned here, once per distinct value
+        df = canonical_frame(df)
+        
+    except Exception as e:
+        logger.error(f"Error cleaning data: {str(e)}")
+        raise ValueError(f"Error cleaning data: {str(e)}")
+    return df
+
+
+def parse_statement(filepath: str) -> pd.DataFrame:
+    """Read a statement and return cleaned Date/Description/Amount rows (no categories yet)."""
+    try:
+        logger.info(f"Processing file: {filepath}")
+        
+        # Get file extension
+        file_ext = os.path.splitext(filepath)[1].lower()
+        logger.info(f"File extension: {file_ext}")
+        
+        if file_ext == '.pdf':
+            logger.info("Processing PDF file")
+            with span('parse') as parsed:
+                df = extract_pdf_frame(filepath)
+                parsed.rows = len(df)
+            if df.empty:
+                raise ValueError("No transactions found in the PDF. Please ensure the statement contains transaction data.")
+            logger.info(f"Successfully extracted {len(df)} transactions from PDF")
+        else:
+            # Handle CSV and Excel files
+            logger.info(f"Processing {file_ext} file")
+            try:
+                with span('parse') as parsed:
+                    df, layout = _read_table(filepath, file_ext)
+                    parsed.rows = len(df)
+            except Exception as e:
+                logger.error(f"Error reading file: {str(e)}")
+                raise ValueError(f"Error reading file: {str(e)}")
+
+        # Log column names for debugging
+        logger.info(f"Available columns: {df.columns.tolist()}")
+        
+        with span('clean') as cleaned:
+            if file_ext != '.pdf':
+                df = apply_layout(df, layout)
+                logger.info(f"Using layout {layout}")
+
+            df = clean_frame(df)
+            cleaned.rows = len(df)
+        
+        return df
+    except Exception as e:
+        logger.error(f"Error parsing file: {str(e)}")
+        logger.error(traceback.format_exc())
+        raise
+
+
+def _read_table(filepath: str, file_ext: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Read a CSV or Excel statement and resolve its column layout."""
+    if file_ext == '.csv':
+        # A small sample identifies the layout; the full read then parses only
+        # the mapped columns, as plain strings with no per-column sniffing
+        sample = pd.read_csv(filepath, nrows=SAMPLE_ROWS, dtype=str)
+        layout = resolve_layout(sample.columns, sample)
+        sources = source_columns(layout)
+        df = pd.read_csv(filepath, usecols=sources, dtype={col: str for col in sources})
+        logger.info(f"Successfully read CSV with {len(df)} rows")
+    elif file_ext in ['.xlsx', '.xls']:
+        df = pd.read_excel(filepath)
+        layout = resolve_layout(df.columns, df.head(SAMPLE_ROWS))
+        logger.info(f"Successfully read Excel with {len(df)} rows")
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+    return df, layout
+
+
+def iter_statement_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield cleaned Date/Description/Amount chunks of a CSV or Excel file.
+
+    Only the layout's columns are read, as strings, so memory stays bounded by
+    ``chunk_size`` rows however long the export is. The layout (and its date
+    format) is resolved once from the first rows and reused for every chunk.
+    Chunks with no valid rows are skipped.
+    """
+    file_ext = os.path.splitext(filepath)[1].lower()
+    if file_ext == '.csv':
+        sample = pd.read_csv(filepath, nrows=SAMPLE_ROWS, dtype=str)
+        layout = resolve_layout(sample.columns, sample)
+        sources = source_columns(layout)
+        chunks = pd.read_csv(filepath, usecols=sources, dtype={col: str for col in sources}, chunksize=chunk_size)
+    elif file_ext == '.xlsx':
+        # Rows come out of the workbook with the layout already applied
+        layout = None
+        chunks = _iter_xlsx_chunks(filepath, chunk_size)
+    else:
+        raise ValueError(f"Streaming is not supported for {file_ext} files")
+
+    for chunk in timed_iter(chunks, 'parse'):
+        with span('clean') as cleaned:
+            if layout is not None:
+                chunk = apply_layout(chunk, layout)
+            try:
+                frame = clean_frame(chunk)
+            except ValueError as e:
+                logger.warning(f"Skipping chunk of {len(chunk)} rows: {str(e)}")
+                continue
+            cleaned.rows = len(frame)
+        yield frame
+
+
+def _iter_xlsx_chunks(filepath: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    # openpyxl's read-only mode streams rows instead of loading the whole sheet
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(col) if col is not None else '' for col in header]
+        width = len(header)
+        head = [(list(row) + [None] * width)[:width] for _, row in zip(range(SAMPLE_ROWS), rows)]
+        layout = resolve_layout(header, pd.DataFrame(head, columns=header, dtype=object))
+        indices = [header.index(col) for col in source_columns(layout)]
+        columns = [header[i] for i in indices]
+
+        batch = [[row[i] for i in indices] for row in head]
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in indices])
+            if len(batch) >= chunk_size:
+                yield apply_layout(pd.DataFrame(batch, columns=columns, dtype=object), layout)
+                batch = []
+        if batch:
+            yield apply_layout(pd.DataFrame(batch, columns=columns, dtype=object), layout)
+    finally:
+        workbook.close()
+
+
+_pool = None
+
+
+def _get_pool(max_workers: Optional[int]) -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Workers don't inherit the parent's LLM threads or open sockets
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context('spawn')
+        _pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context)
+    return _pool
+
+
+def parse_statements(filepaths: Sequence[str],
+                     max_workers: Optional[int] = None) -> List[Tuple[Optional[pd.DataFrame], Optional[str]]]:
+    """Parse statements in parallel worker processes.
+
+    Returns one (frame, error) pair per path, in the order given. A single file
+    is parsed in-process since a worker round trip would only add overhead.
+    Stage timings measured in the workers are recorded here, in the parent.
+    """
+    global _pool
+    if len(filepaths) <= 1:
+        results = [_parse_one(filepath) for filepath in filepaths]
+    else:
+        try:
+            results = list(_get_pool(max_workers).map(_parse_one, filepaths))
+        except BrokenProcessPool as e:
+            logger.error(f"Parse worker pool failed, parsing in-process: {str(e)}")
+            _pool = None
+            results = [_parse_one(filepath) for filepath in filepaths]
+
+    for _, _, spans in results:
+        for stage, seconds, rows in spans:
+            record_stage(stage, seconds, rows)
+    return [(df, error) for df, error, _ in results]
+
+
+def _parse_one(filepath: str) -> Tuple[Optional[pd.DataFrame], Optional[str], list]:
+    with buffered_spans() as spans:
+        try:
+            df = parse_statement(filepath)
+            if df is None or df.empty:
+                raise ValueError("No data found in file")
+            return df, None, spans
+        except Exception as e:
+            return None, str(e), spans
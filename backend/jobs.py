@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import pickle
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# A running job whose heartbeat is older than this is assumed to belong to a dead worker
+DEFAULT_STALE_SECONDS = 300
+DEFAULT_RETENTION_SECONDS = 24 * 3600
+
+
+class JobCheckpoint:
+    """Handle given to a job runner for progress reports and per-stage checkpoints."""
+
+    def __init__(self, jobs: 'JobQueue', job_id: str):
+        self.jobs = jobs
+        self.job_id = job_id
+
+    @property
+    def directory(self) -> str:
+        return self.jobs.job_dir(self.job_id)
+
+    def load(self, stage: str) -> Optional[Any]:
+        """Return the saved output of a finished stage, or None if it must be (re)run."""
+        path = os.path.join(self.directory, f"{stage}.pkl")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            logger.info(f"Job {self.job_id}: resuming from checkpoint '{stage}'")
+            return value
+        except Exception as e:
+            logger.warning(f"Job {self.job_id}: discarding unreadable checkpoint '{stage}': {str(e)}")
+            return None
+
+    def save(self, stage: str, value: Any) -> None:
+        path = os.path.join(self.directory, f"{stage}.pkl")
+        # Write then rename so a crash never leaves a half-written checkpoint behind
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        self.progress(stage)
+
+    def progress(self, stage: str, rows_processed: Optional[int] = None) -> None:
+        self.jobs.update(self.job_id, stage=stage, rows_processed=rows_processed)
+
+
+# Runner: (files as [(filename, path)], options, checkpoint) -> (JSON-serializable payload, HTTP status)
+JobRunner = Callable[[List[Tuple[str, str]], Dict[str, Any], JobCheckpoint], Tuple[Dict[str, Any], int]]
+
+
+class JobQueue:
+    """SQLite-backed background job queue run by in-process worker threads.
+
+    Job state lives in SQLite and inputs/checkpoints under ``directory`` so a
+    restarted process picks unfinished jobs back up; stale running jobs are
+    reclaimed after ``stale_seconds`` without a heartbeat.
+    """
+
+    def __init__(self, directory: str, runner: JobRunner, workers: int = 2,
+                 encode: Callable[[Any], str] = json.dumps,
+                 stale_seconds: int = DEFAULT_STALE_SECONDS,
+                 retention_seconds: int = DEFAULT_RETENTION_SECONDS):
+        self.directory = directory
+        self.runner = runner
+        self.workers = workers
+        self.encode = encode
+        self.stale_seconds = stale_seconds
+        self.retention_seconds = retention_seconds
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, 'jobs.db'), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, rows_processed INTEGER NOT NULL DEFAULT 0, "
+            "files TEXT NOT NULL, options TEXT NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def create(self) -> str:
+        """Reserve a job id and its directory so input files can be saved into it."""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.job_dir(job_id), exist_ok=True)
+        return job_id
+
+    def submit(self, job_id: str, files: List[Tuple[str, str]], options: Optional[Dict[str, Any]] = None) -> str:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, stage, files, options, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, QUEUED, json.dumps(files), json.dumps(options or {}), now, now)
+            )
+            self._conn.commit()
+        self.start()
+        self._queue.put(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, stage, rows_processed, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('job_id', 'status', 'stage', 'rows_processed', 'result', 'error', 'created_at', 'updated_at')
+        return dict(zip(keys, row))
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        fields = {key: value for key, value in fields.items() if value is not None}
+        fields['updated_at'] = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{key} = ?' for key in fields)} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+    def start(self) -> None:
+        """Start worker threads (once) and requeue any unfinished jobs from earlier runs."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            pending = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) ORDER BY created_at",
+                (QUEUED, RUNNING, time.time() - self.stale_seconds)
+            ).fetchall()
+        for (job_id,) in pending:
+            logger.info(f"Requeueing unfinished job {job_id}")
+            self._queue.put(job_id)
+        self._purge()
+
+    def _claim(self, job_id: str) -> Optional[Tuple[List[Tuple[str, str]], Dict[str, Any]]]:
+        """Atomically mark a job as running, unless another worker already has it."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND updated_at < ?))",
+                (RUNNING, now, job_id, QUEUED, RUNNING, now - self.stale_seconds)
+            )
+            self._conn.commit()
+            if cursor.rowcount == 0:
+                return None
+            files, options = self._conn.execute("SELECT files, options FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return [tuple(entry) for entry in json.loads(files)], json.loads(options)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            try:
+                claimed = self._claim(job_id)
+                if claimed is not None:
+                    self._run(job_id, *claimed)
+            except Exception as e:
+                logger.error(f"Job worker error for {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str, files: List[Tuple[str, str]], options: Dict[str, Any]) -> None:
+        logger.info(f"Running job {job_id}")
+        try:
+            payload, status_code = self.runner(files, options, JobCheckpoint(self, job_id))
+            status = DONE if status_code < 400 else FAILED
+            self.update(job_id, status=status, stage=status, result=self.encode(payload), error=payload.get('error'))
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            self.update(job_id, status=FAILED, stage=FAILED, error=str(e))
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def _purge(self) -> None:
+        """Forget finished jobs older than the retention window."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - self.retention_seconds)
+            )
+            self._conn.commit()
@@ -0,0 +1,339 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from metrics import LLM_FIRST_TOKEN_SECONDS, LLM_RETRIES, LLM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+def retryable_errors() -> Tuple[type, ...]:
+    """Errors worth retrying: throttling and transient transport/server failures.
+
+    openai is imported lazily, so until it has been loaded nothing can raise
+    its errors and there is nothing to retry on.
+    """
+    openai = sys.modules.get('openai')
+    if openai is None:
+        return ()
+    return (
+        openai.error.RateLimitError,
+        openai.error.ServiceUnavailableError,
+        openai.error.APIConnectionError,
+        openai.error.Timeout,
+        openai.error.TryAgain,
+    )
+
+
+def _openai():
+    # Importing openai (and its HTTP stack) is slow, so it waits for the first real completion
+    import openai
+
+    return openai
+
+
+class OpenAIBackend:
+    """Chat completions from the OpenAI API (or a compatible server at ``api_base``).
+
+    openai keeps one HTTP session per thread and closes and replaces it every
+    few minutes. Here every thread's session mounts one shared adapter, so all
+    requests draw from a single keep-alive pool of ``pool_size`` connections
+    that survives those rotations. Each request gets ``connect_timeout`` to
+    connect and ``timeout`` between bytes of the reply. Retries are left to
+    LLMExecutor.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, timeout: Optional[float] = 30.0,
+                 connect_timeout: Optional[float] = 5.0, pool_size: int = 8,
+                 api_key: Optional[str] = None, api_base: Optional[str] = None):
+        self.model = model
+        self.timeout = (connect_timeout, timeout) if connect_timeout and timeout else timeout
+        self.pool_size = pool_size
+        self.api_key = api_key
+        self.api_base = api_base
+        self._adapter = None
+        self._lock = threading.Lock()
+
+    def __call__(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        response = self._create(messages, temperature, max_tokens)
+        return response.choices[0].message.content.strip()
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Iterator[str]:
+        """Yield completion text as the API streams it back."""
+        for chunk in self._create(messages, temperature, max_tokens, stream=True):
+            token = chunk.choices[0].delta.get('content')
+            if token:
+                yield token
+
+    def close(self) -> None:
+        with self._lock:
+            if self._adapter is not None:
+                self._adapter.close_pool()
+                self._adapter = None
+
+    def _create(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, stream: bool = False):
+        openai = self._client()
+        return openai.ChatCompletion.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            request_timeout=self.timeout,
+            api_key=self.api_key or os.getenv('OPENAI_API_KEY'),
+            api_base=self.api_base,
+            stream=stream
+        )
+
+    def _client(self):
+        openai = _openai()
+        with self._lock:
+            if self._adapter is None:
+                self._adapter = _shared_adapter_class()(pool_connections=1, pool_maxsize=self.pool_size,
+                                                        max_retries=0)
+            # openai 0.28 calls this to build each thread's session; the last backend built wins
+            openai.requestssession = self._make_session
+        return openai
+
+    def _make_session(self):
+        import requests
+
+        session = requests.Session()
+        session.mount('https://', self._adapter)
+        session.mount('http://', self._adapter)
+        return session
+
+
+def _shared_adapter_class():
+    from requests.adapters import HTTPAdapter
+
+    class SharedAdapter(HTTPAdapter):
+        """An adapter mounted on many sessions: closing one session leaves the pool open."""
+
+        def close(self):
+            pass
+
+        def close_pool(self):
+            super().close()
+
+    return SharedAdapter
+
+
+class StubCompletionBackend:
+    """Deterministic offline stand-in for the chat completion API.
+
+    Answers batched categorization prompts (numbered "description | $amount"
+    rows) with a keyword guess per row so the batching pipeline can be
+    exercised without network access. Set ``malformed_every`` to return
+    garbage on every n-th categorization call. Any other prompt (chat, goals,
+    insights) gets ``reply``, or an echo of the prompt's first line, streamed
+    one word at a time by ``stream``.
+
+    Every reply waits ``latency`` seconds first and streamed words then arrive
+    every ``token_delay`` seconds, so the pipeline and the streaming endpoints
+    can be timed with a realistic but repeatable LLM (LLM_BACKEND=stub).
+    """
+
+    KEYWORDS = {
+        'Food & Dining': ['restaurant', 'cafe', 'coffee', 'grocery', 'pizza', 'dining'],
+        'Transportation': ['uber', 'lyft', 'transport', 'gas', 'fuel', 'parking'],
+        'Housing': ['rent', 'mortgage'],
+        'Entertainment': ['netflix', 'spotify', 'cinema', 'movie'],
+        'Healthcare': ['doctor', 'pharmacy', 'dental', 'hospital'],
+        'Shopping': ['amazon', 'store', 'mall'],
+        'Utilities': ['electric', 'water', 'internet', 'phone'],
+    }
+
+    ROW_RE = re.compile(r'^(\d+)\. (.*) \| \$(-?[\d.]+)$', re.MULTILINE)
+
+    def __init__(self, malformed_every: int = 0, reply: Optional[str] = None, latency: float = 0.0,
+                 token_delay: float = 0.0):
+        self.malformed_every = malformed_every
+        self.reply = reply
+        self.latency = latency
+        self.token_delay = token_delay
+        self.calls = 0
+        self._categorizations = 0
+
+    def __call__(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        rows = self.ROW_RE.findall(messages[-1]['content'])
+        if not rows:
+            return ''.join(self.stream(messages, temperature, max_tokens)).strip()
+        self.calls += 1
+        self._categorizations += 1
+        time.sleep(self.latency)
+        if self.malformed_every and self._categorizations % self.malformed_every == 0:
+            return "Sorry, I can't help with that."
+        return json.dumps({row_id: self._guess(description, float(amount)) for row_id, description, amount in rows})
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Iterator[str]:
+        self.calls += 1
+        reply = self.reply
+        if reply is None:
+            first_line = messages[-1]['content'].strip().split('\n')[0]
+            reply = f"Here are some thoughts on: {first_line}"
+        time.sleep(self.latency)
+        for i, word in enumerate(reply.split(' ')[:max_tokens]):
+            if i:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else ' ' + word
+
+    def _guess(self, description: str, amount: float) -> str:
+        if amount > 0:
+            return 'Income'
+        lowered = description.lower()
+        for category, keywords in self.KEYWORDS.items():
+            if any(keyword in lowered for keyword in keywords):
+                return category
+        return 'Other'
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class LLMExecutor:
+    """Shared execution policy for completion calls.
+
+    ``call`` runs one completion on the calling thread, holding one of
+    ``max_concurrency`` slots, after taking a token from the rate limiter, and
+    retries throttled or transient failures with exponential backoff. ``stream``
+    does the same for a streamed completion, and ``map`` fans work out over a
+    thread pool so independent calls overlap.
+
+    The ``backend`` is any callable taking (messages, temperature, max_tokens)
+    and returning the reply text, an OpenAIBackend unless one is given. If it
+    also has a ``stream`` method, streamed completions use it.
+    """
+
+    def __init__(self, backend: Optional[Callable[..., str]] = None, max_concurrency: int = 8,
+                 rate_per_second: Optional[float] = None, max_retries: int = 4,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0):
+        self.backend = backend or OpenAIBackend(pool_size=max_concurrency)
+        self.complete = self.backend
+        # Without a stream method the whole reply is sent as one chunk
+        self.stream_complete = getattr(self.backend, 'stream', None)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._bucket = TokenBucket(rate_per_second) if rate_per_second else None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+
+    def call(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            text = self._call(messages, temperature, max_tokens)
+            outcome = 'ok'
+            return text
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - start, mode='complete', outcome=outcome)
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Iterator[str]:
+        """Yield completion text as it arrives, under the same slots, rate limit and retry policy as ``call``.
+
+        Failures are only retried before the first chunk; after that the caller
+        has already seen part of the reply and the error is raised.
+        """
+        start = time.perf_counter()
+        outcome = 'error'
+        first = True
+        try:
+            for chunk in self._stream(messages, temperature, max_tokens):
+                if first:
+                    LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start)
+                    first = False
+                yield chunk
+            outcome = 'ok'
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - start, mode='stream', outcome=outcome)
+
+    def _call(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                with self._slots:
+                    return self.complete(messages, temperature, max_tokens)
+            except retryable_errors() as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                LLM_RETRIES.inc(mode='complete')
+                time.sleep(delay)
+                attempt += 1
+
+    def _stream(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> Iterator[str]:
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            started = False
+            try:
+                with self._slots:
+                    if self.stream_complete is None:
+                        chunks = [self.complete(messages, temperature, max_tokens)]
+                    else:
+                        chunks = self.stream_complete(messages, temperature, max_tokens)
+                    for chunk in chunks:
+                        started = True
+                        yield chunk
+                return
+            except retryable_errors() as e:
+                if started or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(f"LLM stream failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                LLM_RETRIES.inc(mode='stream')
+                time.sleep(delay)
+                attempt += 1
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Apply fn to every item concurrently, returning results in input order."""
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self._pool.map(fn, items))
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = (getattr(error, 'headers', None) or {}).get('retry-after')
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
@@ -0,0 +1,40 @@
+import logging
+import os
+from typing import Callable, Dict
+
+from llm import DEFAULT_MODEL, OpenAIBackend, StubCompletionBackend
+
+logger = logging.getLogger(__name__)
+
+
+def _openai_from_env(pool_size: int) -> OpenAIBackend:
+    return OpenAIBackend(
+        model=os.getenv('LLM_MODEL', DEFAULT_MODEL),
+        timeout=float(os.getenv('LLM_TIMEOUT_SECONDS', '30')),
+        connect_timeout=float(os.getenv('LLM_CONNECT_TIMEOUT_SECONDS', '5')),
+        pool_size=pool_size,
+        api_base=os.getenv('LLM_API_BASE') or None
+    )
+
+
+def _stub_from_env(pool_size: int) -> StubCompletionBackend:
+    return StubCompletionBackend(
+        latency=float(os.getenv('LLM_STUB_LATENCY_SECONDS', '0')),
+        token_delay=float(os.getenv('LLM_STUB_TOKEN_DELAY_SECONDS', '0'))
+    )
+
+
+# LLM_BACKEND picks one of these per deployment
+BACKENDS: Dict[str, Callable[[int], Callable[..., str]]] = {
+    'openai': _openai_from_env,
+    'stub': _stub_from_env,
+}
+
+
+def create_backend(name: str = None, pool_size: int = 8) -> Callable[..., str]:
+    """Completion backend named by ``name`` or LLM_BACKEND (default openai), configured from the environment."""
+    name = (name or os.getenv('LLM_BACKEND', 'openai')).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}', expected one of {', '.join(BACKENDS)}")
+    logger.info(f"Using the {name} LLM backend")
+    return BACKENDS[name](pool_size)
@@ -0,0 +1,127 @@
+import importlib.util
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# scikit-learn is optional (see requirements.txt); without it only the keyword tier runs locally. It is
+# imported on the first fit since loading it takes most of a second
+SKLEARN_AVAILABLE = importlib.util.find_spec('sklearn') is not None
+
+DEFAULT_KEYWORDS = {
+    'Food & Dining': [
+        'restaurant', 'cafe', 'coffee', 'coffee shop', 'starbucks', 'fast food', 'mcdonalds', 'pizza',
+        'grocery', 'grocery store', 'supermarket', 'bakery', 'uber eats', 'doordash', 'grubhub', 'whole foods',
+    ],
+    'Transportation': [
+        'uber', 'lyft', 'taxi', 'public transport', 'metro', 'subway', 'transit', 'bus', 'train',
+        'gas station', 'fuel', 'shell', 'chevron', 'parking', 'toll',
+    ],
+    'Housing': ['rent', 'mortgage', 'landlord', 'hoa', 'property management'],
+    'Entertainment': [
+        'netflix', 'spotify', 'hulu', 'disney', 'cinema', 'movie', 'theater', 'concert', 'concert tickets',
+        'ticketmaster', 'steam', 'online subscription',
+    ],
+    'Healthcare': ['doctor', 'doctor appointment', 'pharmacy', 'cvs', 'walgreens', 'dental', 'dentist',
+                   'hospital', 'clinic'],
+    'Shopping': ['amazon', 'apple store', 'clothing store', 'bookstore', 'online shopping', 'target',
+                 'walmart', 'ikea', 'best buy', 'mall'],
+    'Utilities': ['electricity', 'electricity bill', 'electric', 'water bill', 'internet', 'internet bill',
+                  'mobile bill', 'phone bill', 'comcast', 'verizon', 'at&t'],
+    'Education': ['tuition', 'university', 'college', 'coursera', 'udemy'],
+    'Travel': ['airbnb', 'hotel', 'airline', 'airlines', 'expedia', 'booking.com'],
+    'Other': ['atm', 'atm withdrawal'],
+}
+
+
+class KeywordMatcher:
+    """Map descriptions to categories with one compiled alternation over all keywords.
+
+    The leftmost keyword in the description wins, preferring the longest keyword
+    at that position (so "uber eats" beats "uber").
+    """
+
+    def __init__(self, keywords: Dict[str, Sequence[str]]):
+        self._lookup = {}
+        for category, words in keywords.items():
+            for word in words:
+                self._lookup[word.lower()] = category
+        alternatives = sorted(self._lookup, key=len, reverse=True)
+        self._pattern = re.compile(
+            r'(?<![a-z0-9])(' + '|'.join(re.escape(word) for word in alternatives) + r')(?![a-z0-9])'
+        )
+
+    @classmethod
+    def default(cls) -> 'KeywordMatcher':
+        return cls(DEFAULT_KEYWORDS)
+
+    def match(self, description: str) -> Optional[str]:
+        found = self._pattern.search(str(description).lower())
+        return self._lookup[found.group(1)] if found else None
+
+
+class LocalClassifier:
+    """TF-IDF + logistic regression over normalized merchant names.
+
+    Trained on the labels the LLM has already produced (as stored in the merchant
+    cache); predictions below ``min_confidence`` are left for the LLM.
+    """
+
+    def __init__(self, min_confidence: float = 0.8, min_samples: int = 50):
+        self.min_confidence = min_confidence
+        self.min_samples = min_samples
+        self.trained_on = 0
+        # (vectorizer, model), swapped in as one so a fit can run while predict is serving
+        self._fitted = None
+
+    @staticmethod
+    def available() -> bool:
+        return SKLEARN_AVAILABLE
+
+    @property
+    def ready(self) -> bool:
+        return self._fitted is not None
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str]) -> bool:
+        """Train on (text, label) pairs. Returns False if there isn't enough data."""
+        if not self.available() or len(texts) < self.min_samples or len(set(labels)) < 2:
+            return False
+
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+
+        vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), sublinear_tf=True)
+        features = vectorizer.fit_transform(texts)
+        model = LogisticRegression(max_iter=1000)
+        model.fit(features, labels)
+
+        self._fitted = (vectorizer, model)
+        self.trained_on = len(texts)
+        logger.info(f"Trained local classifier on {len(texts)} labeled merchants")
+        return True
+
+    def fit_from_cache(self, cache) -> bool:
+        """Train on the expense labels held in a MerchantCategoryCache."""
+        texts, labels = [], []
+        for key, category in cache.labeled_entries():
+            merchant, sign = key.rsplit('|', 1)
+            if sign == '-' and merchant:
+                texts.append(merchant)
+                labels.append(category)
+        return self.fit(texts, labels)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        """Return (category, confidence) per text; category is None below the threshold."""
+        fitted = self._fitted
+        if fitted is None or not texts:
+            return [(None, 0.0)] * len(texts)
+
+        vectorizer, model = fitted
+        probabilities = model.predict_proba(vectorizer.transform(texts))
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities.max(axis=1)
+        return [
+            (str(model.classes_[index]) if score >= self.min_confidence else None, float(score))
+            for index, score in zip(best, confidence)
+        ]
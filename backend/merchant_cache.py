@@ -0,0 +1,153 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 90 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 100000
+DEFAULT_MEMORY_ENTRIES = 5000
+
+_DATE_RE = re.compile(r'\b\d{1,4}[-/.]\d{1,2}(?:[-/.]\d{1,4})?\b')
+_CARD_RE = re.compile(r'(?:\b(?:card|crd)\s*)?[x*#]+\s*\d{2,}', re.IGNORECASE)
+_STORE_ID_RE = re.compile(r'(?:#|\bno\.?\s*|\bstore\s*)\d+|\b\w*\d\w*\b', re.IGNORECASE)
+_PUNCT_RE = re.compile(r'[^a-z& ]+')
+
+
+def normalize_description(description: str) -> str:
+    """Reduce a raw statement description to a stable merchant name."""
+    text = str(description).lower()
+    text = _DATE_RE.sub(' ', text)
+    text = _CARD_RE.sub(' ', text)
+    text = _STORE_ID_RE.sub(' ', text)
+    text = _PUNCT_RE.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def cache_key(description: str, amount: float) -> str:
+    sign = '+' if amount > 0 else '-' if amount < 0 else '0'
+    return f"{normalize_description(description)}|{sign}"
+
+
+class MerchantCategoryCache:
+    """Merchant -> category cache with an in-process LRU in front of SQLite.
+
+    Entries older than ``ttl_seconds`` are treated as misses and pruned, and the
+    on-disk store is trimmed to ``max_entries`` by least recent update.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS merchant_categories ("
+            "key TEXT PRIMARY KEY, category TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS merchant_categories_updated ON merchant_categories (updated_at)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up keys, counting one hit or miss per key."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+
+        with self._lock:
+            pending = []
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and now - entry[1] < self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    pending.append(key)
+
+            # SQLite caps the number of bound parameters per statement
+            for start in range(0, len(pending), 500):
+                chunk = pending[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, category, updated_at FROM merchant_categories "
+                    f"WHERE key IN ({','.join('?' * len(chunk))}) AND updated_at > ?",
+                    (*chunk, now - self.ttl_seconds)
+                ).fetchall()
+                for key, category, updated_at in rows:
+                    found[key] = category
+                    self._remember(key, category, updated_at)
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, entries: Dict[str, str]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO merchant_categories (key, category, updated_at) VALUES (?, ?, ?)",
+                [(key, category, now) for key, category in entries.items()]
+            )
+            for key, category in entries.items():
+                self._remember(key, category, now)
+            self._evict(now)
+            self._conn.commit()
+
+    def labeled_entries(self) -> List[Tuple[str, str]]:
+        """Return every unexpired (key, category) pair, e.g. to train a local model."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, category FROM merchant_categories WHERE updated_at > ?",
+                (time.time() - self.ttl_seconds,)
+            ).fetchall()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory)
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM merchant_categories")
+            self._conn.commit()
+
+    def _remember(self, key: str, category: str, updated_at: float) -> None:
+        self._memory[key] = (category, updated_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM merchant_categories WHERE updated_at <= ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM merchant_categories").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM merchant_categories WHERE key IN ("
+                "SELECT key FROM merchant_categories ORDER BY updated_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
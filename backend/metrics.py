@@ -0,0 +1,270 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upload stages run from milliseconds (cached files) to minutes (large PDFs)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labelnames, values, value in self.samples():
+            lines.append(f"{name}{_format_labels(labelnames, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self.labelnames, key, value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # Per label set: count per bucket (not cumulative), total count and sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * len(self.buckets), [0, 0.0]))
+            counts[index] += 1
+            totals[0] += 1
+            totals[1] += value
+
+    def samples(self):
+        samples = []
+        bucket_labels = self.labelnames + ('le',)
+        with self._lock:
+            for key, (counts, totals) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", bucket_labels, key + (_format_value(bound),), cumulative))
+                samples.append((f"{self.name}_count", self.labelnames, key, totals[0]))
+                samples.append((f"{self.name}_sum", self.labelnames, key, totals[1]))
+        return samples
+
+
+class CallbackMetric(_Metric):
+    """Metric read from ``collect`` at scrape time: a number, or a dict of label values to numbers.
+
+    Used for counters other objects already keep, such as cache hit counts.
+    """
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], object],
+                 labelnames: Sequence[str] = (), kind: str = 'gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self):
+        values = self.collect()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            return [(self.name, (), (), values)]
+        return [(self.name, self.labelnames, key if isinstance(key, tuple) else (key,), value)
+                for key, value in sorted(values.items())]
+
+
+class Registry:
+    """The metrics of this process, rendered in the Prometheus text format.
+
+    Each worker process keeps its own registry, so behind a pre-forking server
+    every scrape sees one worker; aggregate across workers in Prometheus.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, collect: Callable[[], object],
+                 labelnames: Sequence[str] = (), kind: str = 'gauge') -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, collect, labelnames, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # One broken collector shouldn't take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {type(e).__name__}")
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        # Re-registering (e.g. a module reloaded in development) keeps the existing series
+        return self._metrics.setdefault(metric.name, metric)
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram('morelife_stage_seconds', 'Time spent in each upload pipeline stage.', ['stage'])
+STAGE_ROWS = REGISTRY.counter('morelife_stage_rows_total', 'Rows coming out of each upload pipeline stage.', ['stage'])
+LLM_SECONDS = REGISTRY.histogram('morelife_llm_request_seconds', 'LLM completion latency, retries included.',
+                                 ['mode', 'outcome'])
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram('morelife_llm_first_token_seconds',
+                                             'Time until the first chunk of a streamed LLM completion.')
+LLM_RETRIES = REGISTRY.counter('morelife_llm_retries_total', 'LLM completions retried after a transient failure.',
+                               ['mode'])
+HTTP_SECONDS = REGISTRY.histogram('morelife_http_request_seconds', 'Time to produce each HTTP response.',
+                                  ['endpoint', 'method', 'status'])
+
+
+class RequestTrace:
+    """Stage timings of one request, totalled per stage in the order first seen."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.rows: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float, rows: Optional[int] = None) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if rows is not None:
+            self.rows[stage] = self.rows.get(stage, 0) + rows
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; browsers show it in the network panel."""
+        entries = []
+        for stage, seconds in self.stages.items():
+            description = f';desc="{self.rows[stage]} rows"' if stage in self.rows else ''
+            entries.append(f"{stage};dur={seconds * 1000:.1f}{description}")
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ', '.join(entries)
+
+
+_trace: ContextVar[Optional[RequestTrace]] = ContextVar('request_trace', default=None)
+_buffer: ContextVar[Optional[List[Tuple[str, float, Optional[int]]]]] = ContextVar('span_buffer', default=None)
+
+
+def start_trace() -> RequestTrace:
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+def end_trace() -> Optional[RequestTrace]:
+    trace = _trace.get()
+    _trace.set(None)
+    return trace
+
+
+def record_stage(stage: str, seconds: float, rows: Optional[int] = None) -> None:
+    buffer = _buffer.get()
+    if buffer is not None:
+        buffer.append((stage, seconds, rows))
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if rows is not None:
+        STAGE_ROWS.inc(rows, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.add(stage, seconds, rows)
+
+
+class Span:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.rows: Optional[int] = None
+
+
+@contextmanager
+def span(stage: str) -> Iterator[Span]:
+    """Time the enclosed block as one pass through ``stage``; set ``rows`` on the span to count rows too."""
+    current = Span(stage)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        record_stage(stage, time.perf_counter() - start, current.rows)
+
+
+@contextmanager
+def buffered_spans() -> Iterator[List[Tuple[str, float, Optional[int]]]]:
+    """Collect spans instead of recording them, so a worker process can send them back to the parent."""
+    buffer: List[Tuple[str, float, Optional[int]]] = []
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+
+
+def timed_iter(items: Iterable[T], stage: str) -> Iterator[T]:
+    """Yield from ``items``, timing the production of each item as a span of ``stage``."""
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        record_stage(stage, time.perf_counter() - start, len(item) if hasattr(item, '__len__') else None)
+        yield item
@@ -0,0 +1,280 @@
+import logging
+import multiprocessing
+import os
+import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Pages handed to one worker; small enough to spread a long statement over every core
+PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', '8'))
+
+# tabula-py reuses one in-process JVM through jpype when it's installed; set to 1 to force a JVM per call
+TABULA_FORCE_SUBPROCESS = os.getenv('TABULA_FORCE_SUBPROCESS', '0') == '1'
+
+_AMOUNT_JUNK_RE = r'[$,\s()\-]'
+
+# date, then the description, then the first money-looking token: "$12", "-$1,234.50", "(12.00)", "12.00-"
+_TEXT_LINE_RE = re.compile(
+    r'(?P<date>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\s*(?P<description>.*?)\s+(?=[-($\d])'
+    r'(?P<amount>\(?-?\$\s?-?\d[\d,]*(?:\.\d{2})?\)?-?|\(?-?\d[\d,]*\.\d{2}\)?-?)(?=\s|$)'
+)
+
+# ISO first: an unambiguous match there settles exports that use it
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d',
+                '%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%m-%d-%y', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%Y', '%d-%m-%y']
+DATE_SAMPLE_SIZE = 200
+
+# Pages, spread over the statement, whose dates settle one format for every page range
+DATE_SAMPLE_PAGES = int(os.getenv('PDF_DATE_SAMPLE_PAGES', '6'))
+
+_DATE_TOKEN_RE = re.compile(r'\b(?:\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b')
+
+
+def empty_transactions() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.Series(dtype='datetime64[ns]'),
+        'Description': pd.Series(dtype=object),
+        'Amount': pd.Series(dtype=float)
+    })
+
+
+def identify_table_columns(columns: Sequence[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Find the date, description and amount columns of an extracted table (lower-cased headers)."""
+    date_col = next((col for col in columns if 'date' in col), None)
+    desc_col = next((col for col in columns if any(x in col for x in ['desc', 'memo', 'details'])), None)
+    amount_col = next((col for col in columns if any(x in col for x in ['amount', 'debit', 'credit'])), None)
+    return date_col, desc_col, amount_col
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """Vectorized "$1,234.50" / "-12.00" / "$-12.00" / "(12.00)" / "12.00-" -> signed float; junk becomes NaN."""
+    # Currency signs and spaces can sit on either side of the minus ("-$12.00", "$-12.00")
+    text = values.astype(str).str.replace(r'[$\s]', '', regex=True)
+    negative = text.str.startswith(('-', '(')) | text.str.endswith('-')
+    amounts = pd.to_numeric(text.str.replace(_AMOUNT_JUNK_RE, '', regex=True), errors='coerce').abs()
+    return amounts.mask(negative, -amounts)
+
+
+def parse_table(table: pd.DataFrame, date_format: Optional[str] = None) -> pd.DataFrame:
+    """Pull Date/Description/Amount out of one extracted table in a single vectorized pass.
+
+    Dates are parsed with ``date_format``, inferred from the table's own date
+    cells when not given, so one format applies to every row of the table.
+    """
+    table = table.copy()
+    table.columns = [str(col).strip().lower() if col is not None else '' for col in table.columns]
+    date_col, desc_col, amount_col = identify_table_columns(table.columns)
+    logger.debug(f"Identified columns - Date: {date_col}, Description: {desc_col}, Amount: {amount_col}")
+    if not (date_col and desc_col and amount_col):
+        return empty_transactions()
+
+    raw_dates = table[date_col].fillna('').astype(str).str.strip()
+    if date_format is None:
+        date_format = infer_date_format(raw_dates[raw_dates != ''])
+    frame = pd.DataFrame({
+        'Date': pd.to_datetime(raw_dates, format=date_format or 'mixed', errors='coerce'),
+        'Description': table[desc_col].astype(str),
+        'Amount': parse_amounts(table[amount_col])
+    })
+    unparsed = frame['Date'].isna() & (raw_dates != '')
+    if unparsed.any():
+        logger.warning(f"Dropped {int(unparsed.sum())} table rows whose date doesn't match "
+                       f"{date_format or 'any known format'}, e.g. {raw_dates[unparsed].iloc[0]!r}")
+    dropped = frame['Date'].isna() | frame['Amount'].isna()
+    if dropped.any():
+        logger.debug(f"Skipped {int(dropped.sum())} table rows without a valid date or amount")
+    return frame[~dropped]
+
+
+def infer_date_format(samples: Sequence[str]) -> Optional[str]:
+    """Return the first candidate format that parses every sample, or None."""
+    samples = pd.Series(list(dict.fromkeys(samples))[:DATE_SAMPLE_SIZE], dtype=object)
+    if samples.empty:
+        return None
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(samples, format=date_format, errors='coerce').notna().all():
+            return date_format
+    return None
+
+
+def parse_text_lines(lines: Sequence[str], date_format: Optional[str] = None) -> Tuple[pd.DataFrame, Optional[str]]:
+    """Parse statement text lines into transactions in a single pass.
+
+    Every line is matched against a single compiled pattern; the distinct dates
+    are then converted with one to_datetime call using ``date_format`` (inferred
+    from the matched dates when not given). Returns the frame and the format used so
+    callers can reuse it for the rest of the statement.
+    """
+    if not len(lines):
+        return empty_transactions(), date_format
+    # A plain loop over the compiled pattern is faster than Series.str.extract for this one-pattern pass
+    matches = pd.DataFrame([match.groups() for match in map(_TEXT_LINE_RE.search, lines) if match],
+                           columns=['date', 'description', 'amount'])
+    if matches.empty:
+        return empty_transactions(), date_format
+
+    if date_format is None:
+        date_format = infer_date_format(matches['date'])
+    # Statements repeat each date many times, so only the distinct date strings are parsed
+    codes, unique_dates = pd.factorize(matches['date'])
+    parsed = pd.to_datetime(pd.Series(unique_dates, dtype=object), format=date_format or 'mixed', errors='coerce')
+    dates = pd.Series(parsed.to_numpy()[codes], index=matches.index)
+    frame = pd.DataFrame({
+        'Date': dates,
+        'Description': matches['description'].fillna(''),
+        'Amount': parse_amounts(matches['amount'])
+    })
+    frame = frame[frame['Date'].notna() & frame['Amount'].notna()].reset_index(drop=True)
+    return frame, date_format
+
+
+def parse_text_for_transactions(text: str) -> List[Dict[str, Any]]:
+    """Parse text to find transactions."""
+    frame, _ = parse_text_lines(text.split('\n'))
+    return frame.to_dict('records')
+
+
+def extract_pages(pdf_path: str, start: int, end: int, date_format: Optional[str] = None) -> pd.DataFrame:
+    """Extract transactions from pages [start, end) with pdfplumber.
+
+    Each page's tables are tried first; a page with no usable table falls back
+    to parsing its text lines. Dates are parsed with ``date_format`` when the
+    caller has settled it for the whole statement.
+    """
+    import pdfplumber
+
+    frames = []
+    text_lines = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in range(start, min(end, len(pdf.pages))):
+            page = pdf.pages[page_num]
+            try:
+                page_frames = []
+                for rows in page.extract_tables():
+                    if len(rows) > 1:
+                        page_frames.append(parse_table(pd.DataFrame(rows[1:], columns=rows[0]), date_format))
+                page_frames = [frame for frame in page_frames if not frame.empty]
+
+                if page_frames:
+                    frames.extend(page_frames)
+                else:
+                    text = page.extract_text()
+                    if text:
+                        text_lines.extend(text.split('\n'))
+            except Exception as e:
+                logger.warning(f"Error processing page {page_num + 1} with pdfplumber: {e}")
+            finally:
+                # pdfplumber caches parsed layout objects per page; drop them as we go
+                page.flush_cache()
+
+    # Text from every table-less page is parsed together so the date format is inferred once
+    if text_lines:
+        frames.append(parse_text_lines(text_lines, date_format)[0])
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else empty_transactions()
+
+
+def sample_date_format(pdf, sample_pages: int = DATE_SAMPLE_PAGES) -> Optional[str]:
+    """Infer one date format for a whole statement from the dates printed on a spread of its pages.
+
+    A page range holding only ambiguous dates (every day 12 or less) would
+    otherwise pick its own format and swap day and month.
+    """
+    page_count = len(pdf.pages)
+    picks = sorted({round(i * (page_count - 1) / max(sample_pages - 1, 1)) for i in range(min(sample_pages, page_count))})
+    samples = []
+    for page_num in picks:
+        page = pdf.pages[page_num]
+        try:
+            samples.extend(_DATE_TOKEN_RE.findall(page.extract_text() or ''))
+        except Exception as e:
+            logger.warning(f"Error sampling dates on page {page_num + 1}: {e}")
+        finally:
+            page.flush_cache()
+    return infer_date_format(samples)
+
+
+def extract_with_tabula(pdf_path: str, date_format: Optional[str] = None) -> pd.DataFrame:
+    """Last-resort table extraction through tabula (Java)."""
+    import tabula
+
+    logger.info("Attempting to extract tables using tabula")
+    try:
+        tables = tabula.read_pdf(pdf_path, pages='all', force_subprocess=TABULA_FORCE_SUBPROCESS)
+        logger.info(f"Found {len(tables)} tables in PDF")
+    except Exception as e:
+        logger.error(f"Tabula extraction failed: {str(e)}")
+        return empty_transactions()
+
+    frames = []
+    for table in tables:
+        try:
+            frames.append(parse_table(table, date_format))
+        except Exception as e:
+            logger.error(f"Error processing table: {str(e)}")
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else empty_transactions()
+
+
+_pool = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+    return _pool
+
+
+def _extract_page_range(args: Tuple[str, int, int, Optional[str]]) -> pd.DataFrame:
+    return extract_pages(*args)
+
+
+def extract_pdf_frame(pdf_path: str, parallel: bool = True) -> pd.DataFrame:
+    """Extract transactions from a PDF statement as a Date/Description/Amount frame.
+
+    pdfplumber handles the common case; long statements are split into page
+    ranges processed in parallel (unless we're already inside a worker process),
+    all parsing dates with one format sampled from the whole statement. tabula
+    only runs when pdfplumber finds nothing.
+    """
+    # Loaded on the first PDF so CSV-only workers never pay for it
+    import pdfplumber
+
+    try:
+        logger.info(f"Starting PDF processing for {pdf_path}")
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+            # A single range already parses all of its dates together
+            date_format = sample_date_format(pdf) if page_count > PAGES_PER_TASK else None
+
+        ranges = [(pdf_path, start, start + PAGES_PER_TASK, date_format)
+                  for start in range(0, page_count, PAGES_PER_TASK)]
+        if parallel and len(ranges) > 1 and (os.cpu_count() or 1) > 1 and multiprocessing.parent_process() is None:
+            frames = list(_get_pool().map(_extract_page_range, ranges))
+        else:
+            frames = [extract_pages(*args) for args in ranges]
+        frames = [frame for frame in frames if not frame.empty]
+        transactions = pd.concat(frames, ignore_index=True) if frames else empty_transactions()
+
+        if transactions.empty:
+            logger.info("No transactions found with pdfplumber, falling back to tabula")
+            transactions = extract_with_tabula(pdf_path, date_format)
+
+        logger.info(f"Found {len(transactions)} transactions")
+        return transactions
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}")
+        logger.error(traceback.format_exc())
+        return empty_transactions()
+
+
+def extract_transactions_from_pdf(pdf_path: str) -> List[Dict[str, Any]]:
+    return extract_pdf_frame(pdf_path).to_dict('records')
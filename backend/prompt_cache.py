@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from llm import DEFAULT_MODEL
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def prompt_fingerprint(messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                       model: str = DEFAULT_MODEL) -> str:
+    """Stable key for one completion request: the messages plus every sampling parameter."""
+    payload = json.dumps([model, temperature, max_tokens, messages], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _Flight:
+    """A completion in progress that identical requests wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.text: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.seconds = 0.0
+
+
+class PromptCache:
+    """In-process LRU of completion text keyed by prompt fingerprint.
+
+    Entries expire ``ttl_seconds`` after they were stored, and the least
+    recently used are dropped beyond ``max_entries``. Concurrent misses on the
+    same fingerprint are coalesced: the first caller runs the completion and
+    the others wait for its text instead of making their own call. Every hit
+    and coalesced caller is credited with the latency of the call that produced
+    the text, reported as ``saved_seconds``.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._entries: 'OrderedDict[str, Tuple[str, float, float]]' = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            return entry[0] if entry else None
+
+    def put(self, key: str, text: str, seconds: float = 0.0) -> None:
+        if not self.enabled or not text:
+            return
+        with self._lock:
+            self._entries[key] = (text, time.monotonic() + self.ttl_seconds, seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_call(self, key: str, complete: Callable[[], str]) -> str:
+        """Cached text for ``key``, or the result of ``complete()``, shared with identical concurrent calls."""
+        state, value = self._claim(key)
+        if state == 'hit':
+            return value
+        if state == 'wait':
+            return self._wait(value)
+
+        flight = value
+        start = time.perf_counter()
+        try:
+            text = complete()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            self._land(key, flight, text, time.perf_counter() - start)
+            return text
+        finally:
+            self._release(key, flight)
+
+    def stream(self, key: str, chunks: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Like ``get_or_call`` for a streamed completion.
+
+        The caller that runs the completion relays its chunks as they arrive;
+        a hit, or a caller that waited on an identical stream, gets the whole
+        text as a single chunk.
+        """
+        state, value = self._claim(key)
+        if state == 'hit':
+            yield value
+            return
+        if state == 'wait':
+            yield self._wait(value)
+            return
+
+        flight = value
+        start = time.perf_counter()
+        parts = []
+        try:
+            for chunk in chunks():
+                parts.append(chunk)
+                yield chunk
+        except BaseException as e:
+            # A client disconnecting closes the generator; whoever waited gets an error, not a cached partial reply
+            flight.error = e if isinstance(e, Exception) else RuntimeError('Completion was cancelled')
+            raise
+        else:
+            self._land(key, flight, ''.join(parts).strip(), time.perf_counter() - start)
+        finally:
+            self._release(key, flight)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_ratio': (self.hits + self.coalesced) / total if total else 0.0,
+                'saved_seconds': round(self.saved_seconds, 3),
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'inflight': len(self._inflight)
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: str, now: float) -> Optional[Tuple[str, float, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _claim(self, key: str):
+        """('hit', text), ('wait', flight) to wait on, or ('lead', flight) to run the completion."""
+        with self._lock:
+            entry = self._lookup(key, time.monotonic()) if self.enabled else None
+            if entry is not None:
+                self.hits += 1
+                self.saved_seconds += entry[2]
+                return 'hit', entry[0]
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return 'wait', flight
+            self.misses += 1
+            flight = self._inflight[key] = _Flight()
+            return 'lead', flight
+
+    def _wait(self, flight: _Flight) -> str:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        with self._lock:
+            self.saved_seconds += flight.seconds
+        return flight.text
+
+    def _land(self, key: str, flight: _Flight, text: str, seconds: float) -> None:
+        flight.text = text
+        flight.seconds = seconds
+        self.put(key, text, seconds)
+
+    def _release(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        flight.done.set()
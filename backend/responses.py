@@ -0,0 +1,135 @@
+import base64
+import gzip
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+# Optional accelerators: orjson for encoding, brotli for br responses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = {'application/json', 'application/vnd.apache.arrow.stream', 'text/csv', 'text/plain'}
+
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it's installed.
+
+    Output matches the default provider: keys are sorted, dates keep Flask's
+    HTTP-date format and anything orjson can't encode goes through the default
+    hook. NaN becomes null, where the stdlib encoder would emit invalid JSON.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=options).decode()
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'o': offset}).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """Offset encoded in an opaque page cursor; raises ValueError for a malformed one."""
+    if not cursor:
+        return 0
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        offset = int(payload['o'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if offset < 0:
+        raise ValueError('Invalid cursor')
+    return offset
+
+
+def page_frame(df: pd.DataFrame, cursor: Optional[str], limit: int) -> Tuple[pd.DataFrame, Optional[str]]:
+    """Slice one page off an immutable result frame; returns the page and the next cursor (None at the end)."""
+    offset = decode_cursor(cursor)
+    page = df.iloc[offset:offset + limit]
+    next_offset = offset + len(page)
+    return page, encode_cursor(next_offset) if next_offset < len(df) else None
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Dates as ISO day strings, the form every response encoding below uses."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return df
+
+
+def frame_columns(df: pd.DataFrame) -> Dict[str, Any]:
+    """Column-oriented JSON: names once, then one list of values per column."""
+    df = compact_frame(df)
+    return {
+        'columns': [str(col) for col in df.columns],
+        'data': {str(col): df[col].tolist() for col in df.columns}
+    }
+
+
+def page_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return compact_frame(df).to_dict('records')
+
+
+def arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Arrow IPC stream bytes for a frame; needs pyarrow."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def negotiate_encoding(accept_encodings) -> Optional[str]:
+    """Pick br or gzip from a werkzeug Accept-Encoding header, honouring q-values."""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+def compress_response(response: Response, accept_encodings) -> Response:
+    """Compress a finished response body with the best encoding the client accepts."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    if encoding == 'br':
+        body = brotli.compress(body, quality=5)
+    else:
+        body = gzip.compress(body, compresslevel=6)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Parquet needs pyarrow; without it the cache is simply disabled
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+# Bump when parsing or categorization changes so stale entries stop matching
+CACHE_VERSION = 3
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def combined_digest(digests: Iterable[str], **options: Any) -> str:
+    """Key for results derived from a set of files, independent of upload order."""
+    payload = json.dumps({'files': sorted(digests), 'options': options}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed on-disk cache of categorized statement frames.
+
+    Frames are keyed by the SHA-256 of the uploaded file's bytes and stored as
+    Parquet; small JSON results (such as insights for a set of files) can be
+    stored alongside. Reads refresh an entry's mtime and the least recently used
+    entries are evicted once the directory grows past ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def available() -> bool:
+        return pyarrow is not None
+
+    def get_frame(self, digest: str, filters: Optional[List[Tuple]] = None) -> Optional[pd.DataFrame]:
+        """Read a cached frame, optionally only the rows matching Parquet ``filters``."""
+        path = self._path(digest, 'parquet')
+        try:
+            df = pd.read_parquet(path, filters=filters)
+        except FileNotFoundError:
+            self._count(False)
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {digest}: {str(e)}")
+            self._remove(path)
+            self._count(False)
+            return None
+        self._touch(path)
+        self._count(True)
+        return df
+
+    def put_frame(self, digest: str, df: pd.DataFrame) -> None:
+        try:
+            self._write(self._path(digest, 'parquet'), lambda tmp: df.to_parquet(tmp, index=False))
+        except Exception as e:
+            # Mixed-type object columns can't always be written; the upload still succeeds
+            logger.warning(f"Could not cache frame {digest}: {str(e)}")
+
+    def get_json(self, digest: str) -> Optional[Any]:
+        path = self._path(digest, 'json')
+        try:
+            with open(path) as f:
+                value = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._count(False)
+            return None
+        self._touch(path)
+        self._count(True)
+        return value
+
+    def put_json(self, digest: str, value: Any) -> None:
+        def write(tmp):
+            with open(tmp, 'w') as f:
+                json.dump(value, f)
+        try:
+            self._write(self._path(digest, 'json'), write)
+        except Exception as e:
+            logger.warning(f"Could not cache result {digest}: {str(e)}")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+    def _path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.directory, f"v{CACHE_VERSION}-{digest}.{ext}")
+
+    def _write(self, path: str, write) -> None:
+        # Write then rename so concurrent readers never see a partial file
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            self._remove(tmp)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from pdf_extraction import infer_date_format, parse_amounts
+
+logger = logging.getLogger(__name__)
+
+COLUMN_HINTS = {
+    'Description': ['desc', 'memo', 'details', 'narrative'],
+    'Amount': ['amount', 'debit', 'credit', 'value'],
+    'Date': ['date', 'posted', 'transaction date'],
+}
+
+MISSING_COLUMN_ERRORS = {
+    'Description': "Could not find a description column. Please ensure your file has a column for transaction descriptions.",
+    'Amount': "Could not find an amount column. Please ensure your file has a column for transaction amounts.",
+    'Date': "Could not find a date column. Please ensure your file has a column for transaction dates.",
+}
+
+DEBIT_HINTS = ['debit', 'withdrawal']
+CREDIT_HINTS = ['credit', 'deposit']
+
+# Bump when detection changes so previously cached layouts stop matching
+LAYOUT_VERSION = 2
+
+# Rows sampled to fingerprint a layout and infer its date format
+SAMPLE_ROWS = 50
+
+# A column whose sampled values take more shapes than this is treated as free text
+MAX_COLUMN_SHAPES = 3
+
+_DIGITS_RE = re.compile(r'\d+')
+_LETTERS_RE = re.compile(r'[^\W\d_]+')
+
+
+def detect_columns(columns: Sequence[Any],
+                   targets: Sequence[str] = ('Description', 'Amount', 'Date')) -> Dict[str, Any]:
+    """Map Description/Amount/Date to the source column holding each one."""
+    mapping = {}
+    for target in targets:
+        if target in columns:
+            mapping[target] = target
+            continue
+        matches = [col for col in columns if any(x in str(col).lower() for x in COLUMN_HINTS[target])]
+        if not matches:
+            raise ValueError(MISSING_COLUMN_ERRORS[target])
+        mapping[target] = matches[0]
+    return mapping
+
+
+def _first_match(columns: Sequence[str], hints: Sequence[str]) -> Optional[str]:
+    return next((col for col in columns if any(x in col.lower() for x in hints)), None)
+
+
+def value_shape(value: Any) -> str:
+    """Coarse shape of a cell: digit runs become 9 and letter runs become a."""
+    return _LETTERS_RE.sub('a', _DIGITS_RE.sub('9', str(value).strip()))
+
+
+def layout_fingerprint(columns: Sequence[Any], sample: pd.DataFrame) -> str:
+    """Hash of the header plus the shape of the sampled values in each column."""
+    shapes = []
+    for col in sample.columns:
+        column_shapes = sorted({value_shape(value) for value in sample[col].dropna()})
+        shapes.append(column_shapes if len(column_shapes) <= MAX_COLUMN_SHAPES else 'text')
+    payload = json.dumps({'version': LAYOUT_VERSION, 'columns': [str(col) for col in columns], 'shapes': shapes})
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def detect_layout(columns: Sequence[Any], sample: pd.DataFrame) -> Dict[str, Any]:
+    """Work out column mapping, date format and amount convention from a header and sample rows."""
+    names = [str(col) for col in columns]
+    # A debit/credit pair wins over a signed amount column, since its headers often
+    # contain "amount" too ("Debit Amount", "Credit Amount")
+    debit, credit = _first_match(names, DEBIT_HINTS), _first_match(names, CREDIT_HINTS)
+    if not (debit and credit) or debit == credit:
+        debit = credit = None
+
+    targets = ('Description', 'Date') if debit else ('Description', 'Amount', 'Date')
+    mapping = detect_columns(names, targets)
+    layout = {
+        'description': mapping['Description'],
+        'date': mapping['Date'],
+        'amount': mapping.get('Amount'),
+        'debit': debit,
+        'credit': credit,
+        'date_format': None
+    }
+
+    by_name = {str(col): col for col in sample.columns}
+    dates = sample[by_name[layout['date']]].dropna() if layout['date'] in by_name else pd.Series(dtype=object)
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        layout['date_format'] = infer_date_format(dates.astype(str).str.strip().tolist())
+    return layout
+
+
+def source_columns(layout: Dict[str, Any]) -> List[str]:
+    """The source columns a layout reads, e.g. for usecols."""
+    names = [layout['description'], layout['date'], layout['amount'], layout['debit'], layout['credit']]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def apply_layout(df: pd.DataFrame, layout: Dict[str, Any]) -> pd.DataFrame:
+    """Date/Description/Amount parsed from the layout's source columns with a fixed date format.
+
+    Only those three columns are returned; the rest of the export is dropped.
+    """
+    by_name = {str(col): col for col in df.columns}
+    raw_dates = df[by_name[layout['date']]]
+    raw_description = df[by_name[layout['description']]]
+
+    if layout['amount']:
+        amounts = df[by_name[layout['amount']]]
+        if not pd.api.types.is_numeric_dtype(amounts):
+            amounts = parse_amounts(amounts)
+    else:
+        # Debits are money out whatever sign the bank prints them with
+        debit = df[by_name[layout['debit']]]
+        credit = df[by_name[layout['credit']]]
+        debit = debit if pd.api.types.is_numeric_dtype(debit) else parse_amounts(debit)
+        credit = credit if pd.api.types.is_numeric_dtype(credit) else parse_amounts(credit)
+        amounts = credit.abs().fillna(0) - debit.abs().fillna(0)
+        amounts = amounts.mask(debit.isna() & credit.isna())
+
+    dates = raw_dates
+    if not pd.api.types.is_datetime64_any_dtype(raw_dates) and layout['date_format']:
+        dates = pd.to_datetime(raw_dates, format=layout['date_format'], errors='coerce')
+        # The cached format doesn't fit this file after all; let pandas infer instead
+        if dates.isna().sum() > raw_dates.isna().sum():
+            logger.warning(f"Date format {layout['date_format']} did not match every row, inferring instead")
+            dates = raw_dates
+
+    return pd.DataFrame({
+        'Date': dates,
+        'Description': raw_description,
+        'Amount': amounts
+    })
+
+
+class LayoutCache:
+    """Bank layout fingerprint -> detected layout, in memory and in SQLite.
+
+    Shared by the parse worker processes, so the first-seen detection cost is
+    paid once per bank format rather than once per upload.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = {}
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS layouts ("
+            "fingerprint TEXT PRIMARY KEY, layout TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            layout = self._memory.get(fingerprint)
+            if layout is None:
+                row = self._conn.execute(
+                    "SELECT layout FROM layouts WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+                if row is not None:
+                    layout = self._memory[fingerprint] = json.loads(row[0])
+            if layout is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return layout
+
+    def put(self, fingerprint: str, layout: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[fingerprint] = layout
+            self._conn.execute(
+                "INSERT OR REPLACE INTO layouts (fingerprint, layout, created_at) VALUES (?, ?, ?)",
+                (fingerprint, json.dumps(layout), time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+
+_layout_cache = None
+
+
+def get_layout_cache() -> LayoutCache:
+    """Per-process cache instance; every process shares the same SQLite file."""
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = LayoutCache(os.getenv('LAYOUT_CACHE_PATH', os.path.join('cache', 'layouts.db')))
+    return _layout_cache
+
+
+def resolve_layout(columns: Sequence[Any], sample: pd.DataFrame,
+                   cache: Optional[LayoutCache] = None) -> Dict[str, Any]:
+    """Return the cached layout for this header/sample shape, detecting and caching it on first sight."""
+    cache = cache or get_layout_cache()
+    fingerprint = layout_fingerprint(columns, sample)
+    layout = cache.get(fingerprint)
+    if layout is None:
+        layout = detect_layout(columns, sample)
+        cache.put(fingerprint, layout)
+        logger.info(f"Detected new statement layout {fingerprint[:12]}: {layout}")
+    return layout
@@ -0,0 +1,51 @@
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_TYPE = 'text/event-stream'
+
+# Proxies (nginx in particular) buffer responses unless told not to
+EVENT_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """One server-sent event carrying ``data`` as JSON."""
+    prefix = f"event: {event}\n" if event else ''
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def stream_completion(chunks: Iterable[str], meta: Optional[Dict[str, Any]] = None,
+                      done: Optional[Callable[[str], Dict[str, Any]]] = None,
+                      error_message: str = 'Failed to generate a response') -> Iterator[str]:
+    """Relay completion chunks as server-sent events.
+
+    Emits an optional ``meta`` event first (data that doesn't depend on the
+    LLM), then one unnamed event per chunk as ``{"token": ...}``, and finally a
+    ``done`` event built from the full text, or an ``error`` event if the
+    completion fails part way.
+    """
+    start = time.perf_counter()
+    if meta is not None:
+        yield sse_event(meta, 'meta')
+
+    parts = []
+    try:
+        for chunk in chunks:
+            if not parts:
+                logger.info(f"First token after {time.perf_counter() - start:.3f}s")
+            parts.append(chunk)
+            yield sse_event({'token': chunk})
+    except Exception as e:
+        logger.error(f"Streaming completion failed: {str(e)}")
+        yield sse_event({'error': error_message}, 'error')
+        return
+
+    text = ''.join(parts).strip()
+    logger.info(f"Streamed {len(parts)} chunks in {time.perf_counter() - start:.3f}s")
+    yield sse_event(done(text) if done else {'text': text}, 'done')
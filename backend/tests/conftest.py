@@ -0,0 +1,51 @@
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Backend modules import each other as top-level modules, the way app.py runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every cache and store lives in a scratch directory, and the LLM is the local stub
+SCRATCH = tempfile.mkdtemp(prefix='morelife-tests-')
+os.environ.update(
+    LLM_BACKEND='stub',
+    MERCHANT_CACHE_PATH=os.path.join(SCRATCH, 'merchants.db'),
+    RESULT_CACHE_DIR=os.path.join(SCRATCH, 'results'),
+    TRANSACTION_STORE_PATH=os.path.join(SCRATCH, 'transactions.db'),
+    LAYOUT_CACHE_PATH=os.path.join(SCRATCH, 'layouts.db'),
+    JOBS_DIR=os.path.join(SCRATCH, 'jobs'),
+)
+
+
+@pytest.fixture(scope='session')
+def backend():
+    """The app module; its services are built by the flask_app fixture."""
+    import app
+    return app
+
+
+@pytest.fixture(scope='session')
+def flask_app(backend):
+    flask_app = backend.create_app(start_jobs=False)
+    flask_app.config['UPLOAD_FOLDER'] = os.path.join(SCRATCH, 'uploads')
+    os.makedirs(flask_app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return flask_app
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
+
+
+@pytest.fixture
+def upload(client):
+    """POST named CSV texts to /api/upload; returns the JSON body."""
+    def post(files, query='', **form):
+        data = {'files': [(io.BytesIO(text.encode()), name) for name, text in files], **form}
+        response = client.post(f"/api/upload{query}", data=data, content_type='multipart/form-data')
+        assert response.status_code == 200, response.get_data(as_text=True)
+        return response.get_json()
+    return post
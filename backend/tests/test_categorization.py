@@ -0,0 +1,121 @@
+import threading
+from itertools import product
+
+import pytest
+
+from categorization import TieredCategorizer, categorize_batch
+from llm import StubCompletionBackend
+from local_categorizer import LocalClassifier
+from merchant_cache import MerchantCategoryCache, cache_key
+
+needs_sklearn = pytest.mark.skipif(not LocalClassifier.available(), reason='scikit-learn is not installed')
+
+PLACES = ['Main', 'Oak', 'Elm', 'Pine', 'Lake', 'Hill']
+CAFES = [f'{place} {kind} Cafe' for place, kind in product(PLACES, ['Corner', 'Street', 'Bean', 'Roast'])]
+GARAGES = [f'{place} {kind} Garage' for place, kind in product(PLACES, ['Park', 'Auto', 'Central', 'Plaza'])]
+
+
+@pytest.fixture
+def cache():
+    cache = MerchantCategoryCache(':memory:')
+    cache.set_many({cache_key(name, -1): 'Food & Dining' for name in CAFES})
+    cache.set_many({cache_key(name, -1): 'Transportation' for name in GARAGES})
+    return cache
+
+
+class FlakyBackend(StubCompletionBackend):
+    """Garbles its first ``malformed`` replies, then answers like the stub."""
+
+    def __init__(self, malformed=1):
+        super().__init__()
+        self.malformed = malformed
+
+    def __call__(self, messages, temperature, max_tokens):
+        if self.calls < self.malformed:
+            self.calls += 1
+            return 'not json'
+        return super().__call__(messages, temperature, max_tokens)
+
+
+class FailingBackend:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, messages, temperature, max_tokens):
+        self.calls += 1
+        raise TimeoutError('upstream timed out')
+
+
+def test_malformed_reply_splits_the_batch():
+    complete = FlakyBackend()
+    descriptions = ['Pizza Place', 'Uber Trip', 'Netflix', 'Corner Store']
+    categories = categorize_batch(descriptions, [-12.0, -8.5, -15.99, -3.0], complete)
+    assert categories == ['Food & Dining', 'Transportation', 'Entertainment', 'Shopping']
+    assert complete.calls == 3
+
+
+def test_backend_error_fails_the_batch_without_splitting():
+    complete = FailingBackend()
+    categories = categorize_batch([f'Merchant {i}' for i in range(50)], [-1.0] * 50, complete)
+    assert categories == [None] * 50
+    assert complete.calls == 1
+
+
+class BlockingClassifier(LocalClassifier):
+    """Holds every fit until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__(min_confidence=0.5, min_samples=10)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.fit_threads = []
+
+    def fit(self, texts, labels):
+        self.fit_threads.append(threading.current_thread())
+        self.started.set()
+        self.release.wait(5)
+        return super().fit(texts, labels)
+
+
+@needs_sklearn
+def test_classifier_fit_runs_off_the_request_path(cache):
+    classifier = BlockingClassifier()
+    complete = StubCompletionBackend()
+    categorizer = TieredCategorizer(complete=complete, cache=cache, classifier=classifier)
+
+    # The fit is still blocked, so the rows go to the LLM instead of waiting for it
+    assert categorizer.categorize(['Harbor Corner Cafe'], [-4.5]) == ['Food & Dining']
+    assert classifier.started.wait(5)
+    assert classifier.fit_threads[0] is not threading.current_thread()
+    assert not classifier.ready
+    assert complete.calls == 1
+
+    classifier.release.set()
+    categorizer.wait_for_training(5)
+    assert classifier.ready
+
+    assert categorizer.categorize(['River Bean Cafe'], [-3.0]) == ['Food & Dining']
+    assert complete.calls == 1
+    assert categorizer.stats()['classifier_rows'] == 1
+
+
+@needs_sklearn
+def test_retrain_keeps_serving_the_previous_model(cache):
+    classifier = BlockingClassifier()
+    classifier.release.set()
+    categorizer = TieredCategorizer(complete=StubCompletionBackend(), cache=cache, classifier=classifier,
+                                    retrain_every=1)
+    categorizer.categorize(['Harbor Corner Cafe'], [-4.5])
+    categorizer.wait_for_training(5)
+    assert len(classifier.fit_threads) == 1
+
+    # The LLM label from the first upload makes a refit due; while it is blocked the old model answers
+    classifier.release.clear()
+    classifier.started.clear()
+    categorizer.categorize(['Dentist Office'], [-80.0])
+    assert categorizer.categorize(['River Auto Garage'], [-12.0]) == ['Transportation']
+    assert classifier.started.wait(5)
+    assert len(classifier.fit_threads) == 2
+
+    classifier.release.set()
+    categorizer.wait_for_training(5)
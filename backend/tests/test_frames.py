@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from frames import CATEGORY_DTYPE, canonical_frame, concat_frames, dollar_frame, to_cents, to_dollars
+
+
+def frame(rows, categories=None):
+    df = pd.DataFrame(rows, columns=['Date', 'Description', 'Amount'])
+    df['Date'] = pd.to_datetime(df['Date'])
+    if categories is not None:
+        df['Category'] = categories
+    return canonical_frame(df)
+
+
+def test_dollar_amounts_round_trip_through_cents():
+    rng = np.random.default_rng(11)
+    amounts = np.round(rng.uniform(-5000, 5000, 10000), 2)
+    cents = to_cents(amounts)
+    assert cents.dtype == np.int64
+    assert (to_dollars(cents) == amounts).all()
+    # Float noise from arithmetic lands on the nearest cent
+    assert to_cents([0.1 + 0.2, 19.99, -1299.99, 1e-9]).tolist() == [30, 1999, -129999, 0]
+    # Sums are exact, where summing the floats drifts
+    assert to_cents([0.1] * 10).sum() == 100
+
+
+def test_canonical_frame_dtypes():
+    df = frame([('2024-01-02', ' Coffee Shop', -4.5), ('2024-01-03', 'Coffee Shop ', -3.25),
+                ('2024-01-04', 'Payroll', 2500.0)], categories=['Food & Dining', 'Not A Category', 'Income'])
+    assert df.dtypes['Date'] == 'datetime64[ns]'
+    assert df.dtypes['Amount'] == np.int64
+    assert isinstance(df.dtypes['Description'], pd.CategoricalDtype)
+    assert df['Description'].cat.categories.tolist() == ['Coffee Shop', 'Payroll']
+    assert df.dtypes['Category'] == CATEGORY_DTYPE
+    assert df['Category'].tolist() == ['Food & Dining', 'Other', 'Income']
+    assert dollar_frame(df)['Amount'].tolist() == [-4.5, -3.25, 2500.0]
+
+
+def test_concat_keeps_categoricals_and_cents():
+    first = frame([('2024-01-02', 'Coffee Shop', -4.5), ('2024-01-03', 'Rent', -1000.0)],
+                  categories=['Food & Dining', 'Housing'])
+    second = frame([('2024-02-02', 'Grocery Outlet', -86.1), ('2024-02-03', 'Coffee Shop', -3.25)],
+                   categories=['Shopping', 'Food & Dining'])
+
+    combined = concat_frames([first, second])
+    assert list(combined.columns) == ['Date', 'Description', 'Amount', 'Category']
+    assert isinstance(combined.dtypes['Description'], pd.CategoricalDtype)
+    assert combined.dtypes['Category'] == CATEGORY_DTYPE
+    assert combined.dtypes['Amount'] == np.int64
+    assert combined['Description'].tolist() == ['Coffee Shop', 'Rent', 'Grocery Outlet', 'Coffee Shop']
+    assert combined['Description'].cat.categories.tolist() == ['Coffee Shop', 'Rent', 'Grocery Outlet']
+    assert combined['Category'].tolist() == ['Food & Dining', 'Housing', 'Shopping', 'Food & Dining']
+    assert combined['Amount'].tolist() == [-450, -100000, -8610, -325]
+    assert combined.index.tolist() == [0, 1, 2, 3]
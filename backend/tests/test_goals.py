@@ -0,0 +1,67 @@
+import io
+from datetime import date
+
+from goals import goal_analysis
+
+TWO_MONTHS = ('Date,Description,Amount\n'
+              '2024-01-01,Rent,-1000.00\n'
+              '2024-01-15,Payroll,3000.00\n'
+              '2024-02-01,Rent,-1000.00\n'
+              '2024-02-15,Payroll,3000.00\n')
+GOALS = {'monthlyIncome': 3000, 'budgetGoals': {}, 'customGoals': [{'description': 'Trip', 'amount': '4000',
+                                                                     'deadline': '2099-01-01'}]}
+
+
+def test_goal_analysis_averages_over_months_covered():
+    analysis = goal_analysis([{'Category': 'Housing', 'Amount': 2000.0}],
+                             {'2024-01': {'Housing': 1000.0}, '2024-02': {'Housing': 1000.0}},
+                             3000.0, {'housing': 30, 'savings': 20},
+                             [{'description': 'Trip', 'amount': '4000', 'deadline': '2024-07-01'}],
+                             as_of=date(2024, 3, 1))
+    [housing] = analysis['budget']
+    assert (housing['monthly_average'], housing['budget_amount'], housing['variance']) == (1000.0, 900.0, -100.0)
+    assert analysis['savings']['monthly_savings'] == 2000.0
+    assert analysis['savings']['planned_monthly_savings'] == 2100.0
+    assert analysis['savings']['target_savings_rate_pct'] == 20.0
+    [trip] = analysis['goals']
+    assert (trip['months_left'], trip['months_to_goal'], trip['required_monthly_saving']) == (4, 2, 1000.0)
+    assert trip['on_track']
+
+
+def test_analysis_returns_without_the_narrative(client, upload):
+    result_id = upload([('two-months.csv', TWO_MONTHS)])['result_id']
+
+    body = client.post('/api/analyze-goals', json={**GOALS, 'resultId': result_id}).get_json()
+    assert body['recommendations'] is None
+    assert body['analysis']['months_covered'] == 2
+    assert body['analysis']['budget'][0]['monthly_average'] == 1000.0
+
+    narrated = client.post('/api/analyze-goals?narrative=1', json={**GOALS, 'resultId': result_id}).get_json()
+    assert narrated['recommendations']
+    assert narrated['analysis'] == body['analysis']
+
+
+def test_posted_spending_uses_its_monthly_breakdown(client, upload):
+    uploaded = upload([('two-months.csv', TWO_MONTHS)])
+    spending = {'categoryData': uploaded['category_data'],
+                'monthlySpending': uploaded['insights']['monthly_spending']}
+    body = client.post('/api/analyze-goals', json={**GOALS, 'actualSpending': spending}).get_json()
+    assert body['analysis']['months_covered'] == 2
+
+
+def test_stored_history_is_only_reachable_by_its_token(backend, client, upload):
+    token = upload([('two-months.csv', TWO_MONTHS)], query='?history=1')['history_token']
+    user_id = backend.transaction_store.resolve_token(token)
+    assert user_id and user_id != token
+
+    body = client.post('/api/analyze-goals', json=GOALS, headers={'X-History-Token': token}).get_json()
+    assert body['analysis']['months_covered'] == 2
+
+    # The owner's user id is not a credential, and only issued tokens are accepted
+    for request in ({'json': {**GOALS, 'userId': user_id}}, {'json': GOALS, 'headers': {'X-User-Id': user_id}},
+                    {'json': {**GOALS, 'historyToken': user_id}}):
+        assert client.post('/api/analyze-goals', **request).status_code == 400
+
+    response = client.post('/api/upload', data={'files': [(io.BytesIO(TWO_MONTHS.encode()), 'two-months.csv')]},
+                           headers={'X-History-Token': 'guessed'}, content_type='multipart/form-data')
+    assert response.status_code == 403
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pdfplumber', 'plotly', 'openai')
+
+
+def loaded_modules(code, **env):
+    """Heavy modules present in sys.modules after running ``code`` in a fresh interpreter."""
+    script = f"import json, sys\n{code}\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env={**os.environ, **env},
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_importing_app_skips_heavy_modules():
+    assert loaded_modules('import app') == []
+
+
+@pytest.mark.parametrize('llm_backend', ['stub', 'openai'])
+def test_building_the_app_skips_heavy_modules(tmp_path, llm_backend):
+    # The OpenAI client is only imported on the first completion, so a placeholder key is enough
+    assert loaded_modules('import app\napp.create_app(start_jobs=False)', LLM_BACKEND=llm_backend,
+                          OPENAI_API_KEY='placeholder', RESULT_CACHE_DIR=str(tmp_path / 'results'),
+                          MERCHANT_CACHE_PATH=str(tmp_path / 'merchants.db'),
+                          TRANSACTION_STORE_PATH=str(tmp_path / 'transactions.db'),
+                          LAYOUT_CACHE_PATH=str(tmp_path / 'layouts.db'), JOBS_DIR=str(tmp_path / 'jobs')) == []
@@ -0,0 +1,31 @@
+import ingestion
+from ingestion import parse_statements
+
+GOOD = ('Date,Description,Amount\n'
+        '2024-01-02,Coffee Shop,-4.50\n'
+        '2024-01-03,Payroll,2500.00\n')
+# No description column, so parsing fails inside the worker
+BAD = ('Posted,Value\n'
+       '2024-01-02,-4.50\n')
+
+
+def test_worker_errors_come_back_per_file_in_order(tmp_path):
+    paths = []
+    for name, text in (('first.csv', GOOD), ('broken.csv', BAD), ('second.csv', GOOD)):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+
+    results = parse_statements(paths, max_workers=2)
+    assert ingestion._pool is not None
+    assert [None if df is None else len(df) for df, _ in results] == [2, None, 2]
+    assert [error is None for _, error in results] == [True, False, True]
+    assert 'description column' in results[1][1]
+
+
+def test_upload_reports_failed_files_parsed_in_workers(upload):
+    body = upload([('good.csv', GOOD), ('broken.csv', BAD)], query='?insights=defer')
+    assert body['processed_files'] == ['good.csv']
+    [failed] = body['failed_files']
+    assert failed['filename'] == 'broken.csv'
+    assert 'description column' in failed['error']
@@ -0,0 +1,64 @@
+import time
+
+from jobs import DONE, JobCheckpoint, JobQueue
+
+STATEMENT = ('Date,Description,Amount\n'
+             '2024-04-01,Rent,-1000.00\n'
+             '2024-04-02,Coffee Shop,-4.50\n'
+             '2024-04-15,Payroll,2500.00\n')
+
+
+def wait_for(jobs, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job['status'] == DONE:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish: {jobs.get(job_id)}")
+
+
+def test_restarted_queue_resumes_a_dead_workers_job_from_its_checkpoint(tmp_path):
+    directory = str(tmp_path / 'jobs')
+    # A worker claims the job, checkpoints its first stage and dies before the second
+    first = JobQueue(directory, runner=None, workers=0)
+    job_id = first.submit(first.create(), [('statement.csv', '/gone/statement.csv')], {'view': 'summary'})
+    assert first._claim(job_id) is not None
+    JobCheckpoint(first, job_id).save('parse', {'rows': 3})
+
+    runs = []
+
+    def runner(files, options, checkpoint):
+        parsed = checkpoint.load('parse')
+        runs.append((files, options, parsed))
+        return {'rows': parsed['rows'] if parsed else None}, 200
+
+    restarted = JobQueue(directory, runner, workers=1, stale_seconds=0)
+    restarted.start()
+    job = wait_for(restarted, job_id)
+    assert runs == [([('statement.csv', '/gone/statement.csv')], {'view': 'summary'}, {'rows': 3})]
+    assert job['result'] == '{"rows": 3}'
+
+
+def test_upload_pipeline_reuses_finished_stages(backend, flask_app, tmp_path, monkeypatch):
+    jobs = JobQueue(str(tmp_path / 'jobs'), runner=None, workers=0)
+    job_id = jobs.create()
+    path = tmp_path / 'statement.csv'
+    path.write_text(STATEMENT)
+    saved = [('statement.csv', str(path))]
+
+    first, status = backend.run_upload_pipeline(saved, checkpoint=JobCheckpoint(jobs, job_id), defer_insights=True)
+    assert status == 200
+
+    # After a restart the input is gone and nothing may be parsed or categorized again
+    path.unlink()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('stage re-run despite its checkpoint')
+    monkeypatch.setattr(backend, 'parse_statements', fail)
+    monkeypatch.setattr(backend, 'categorize_frame', fail)
+
+    resumed, status = backend.run_upload_pipeline(saved, checkpoint=JobCheckpoint(jobs, job_id), defer_insights=True)
+    assert status == 200
+    assert resumed['category_data'] == first['category_data']
+    assert resumed['processed_files'] == ['statement.csv']
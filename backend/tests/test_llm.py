@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from categorization import SYSTEM_PROMPT, build_batch_prompt
+from llm import LLMExecutor, OpenAIBackend, StubCompletionBackend, TokenBucket
+
+MESSAGES = [{'role': 'user', 'content': 'ping'}]
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completions endpoint that counts the connections it accepts."""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'id': 'x', 'object': 'chat.completion', 'choices': [
+            {'index': 0, 'message': {'role': 'assistant', 'content': 'pong'}, 'finish_reason': 'stop'}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api_base():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CompletionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_survives_session_rotation(api_base, monkeypatch):
+    openai = pytest.importorskip('openai')
+    # Every request rotates its thread's session, as openai does after MAX_SESSION_LIFETIME_SECS
+    monkeypatch.setattr(openai.api_requestor, 'MAX_SESSION_LIFETIME_SECS', 0)
+    backend = OpenAIBackend(api_key='test', api_base=api_base, pool_size=2)
+    CompletionHandler.connections = 0
+
+    replies = []
+    for _ in range(3):
+        # A fresh thread each round; each one rotates (and closes) its session on its second call
+        worker = threading.Thread(target=lambda: replies.extend(backend(MESSAGES, 0, 5) for _ in range(2)))
+        worker.start()
+        worker.join()
+
+    assert replies == ['pong'] * 6
+    # Sequential requests keep reusing the one pooled connection
+    assert CompletionHandler.connections == 1
+    backend.close()
+
+
+def test_stub_backend_categorizes_and_streams():
+    stub = StubCompletionBackend(reply='stay on budget')
+    batch = [{'role': 'system', 'content': SYSTEM_PROMPT},
+             {'role': 'user', 'content': build_batch_prompt(['Coffee Shop'], [-4.5])}]
+    assert json.loads(stub(batch, 0, 50)) == {'1': 'Food & Dining'}
+    assert list(stub.stream(MESSAGES, 0, 50)) == ['stay', ' on', ' budget']
+    assert stub(MESSAGES, 0, 50) == 'stay on budget'
+
+
+def test_chat_streams_from_the_stub(client):
+    response = client.post('/api/chat?stream=1', json={'message': 'hi'})
+    assert response.mimetype == 'text/event-stream'
+    assert 'event: done' in response.get_data(as_text=True)
+
+
+class ScriptedBackend:
+    """Raises the scripted errors in turn, then answers 'ok'; tracks peak concurrency."""
+
+    def __init__(self, errors=(), delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, messages, temperature, max_tokens):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return 'ok'
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays the executor asked for, without waiting them out."""
+    import llm
+
+    delays = []
+    monkeypatch.setattr(llm.time, 'sleep', lambda seconds: delays.append(seconds) if seconds else None)
+    return delays
+
+
+def test_retryable_errors_back_off_exponentially(sleeps):
+    openai = pytest.importorskip('openai')
+    backend = ScriptedBackend([openai.error.RateLimitError('slow down'), openai.error.Timeout('timed out'),
+                               openai.error.ServiceUnavailableError('busy')])
+    executor = LLMExecutor(backend, max_retries=4, backoff_base=0.5)
+
+    assert executor.call(MESSAGES, 0, 5) == 'ok'
+    assert backend.calls == 4
+    # base * 2^attempt, jittered down by at most half
+    assert len(sleeps) == 3
+    assert all(low <= delay <= high for delay, low, high in zip(sleeps, [0.25, 0.5, 1.0], [0.5, 1.0, 2.0]))
+
+
+def test_retry_after_header_and_retry_limit(sleeps):
+    openai = pytest.importorskip('openai')
+    throttled = openai.error.RateLimitError('slow down', headers={'retry-after': '3'})
+    backend = ScriptedBackend([throttled] * 3)
+    executor = LLMExecutor(backend, max_retries=2)
+
+    with pytest.raises(openai.error.RateLimitError):
+        executor.call(MESSAGES, 0, 5)
+    assert backend.calls == 3
+    assert sleeps == [3.0, 3.0]
+
+
+def test_other_errors_are_not_retried(sleeps):
+    pytest.importorskip('openai')
+    backend = ScriptedBackend([ValueError('bad request')])
+    with pytest.raises(ValueError):
+        LLMExecutor(backend).call(MESSAGES, 0, 5)
+    assert backend.calls == 1
+    assert sleeps == []
+
+
+def test_rate_limit_and_concurrency_bound():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    # Two tokens in the burst, then one every 50ms
+    assert time.perf_counter() - start >= 0.18
+
+    # Eight callers at once still share two slots
+    backend = ScriptedBackend(delay=0.02)
+    executor = LLMExecutor(backend, max_concurrency=2)
+    with ThreadPoolExecutor(max_workers=8) as callers:
+        assert list(callers.map(lambda _: executor.call(MESSAGES, 0, 5), range(8))) == ['ok'] * 8
+    assert backend.peak == 2
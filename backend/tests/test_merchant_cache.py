@@ -0,0 +1,43 @@
+from categorization import categorize_transactions
+from llm import StubCompletionBackend
+from merchant_cache import MerchantCategoryCache, cache_key
+
+# Merchants no keyword rule knows, so the first upload has to ask the LLM
+STATEMENT = ('Date,Description,Amount\n'
+             '2024-05-01,Quillfeather Atelier,-42.00\n'
+             '2024-05-02,Brambleworth Supply 05/02,-17.25\n'
+             '2024-05-03,QUILLFEATHER ATELIER #0042,-8.00\n'
+             '2024-05-15,Thistledown Payroll,2100.00\n')
+
+
+def test_keys_ignore_dates_card_numbers_and_store_ids():
+    assert cache_key('QUILLFEATHER ATELIER #0042 05/03', -8.0) == cache_key('Quillfeather Atelier', -42.0)
+    assert cache_key('Quillfeather Atelier', -42.0) != cache_key('Quillfeather Atelier', 42.0)
+
+
+def test_seen_merchants_are_not_sent_again():
+    cache = MerchantCategoryCache(':memory:')
+    complete = StubCompletionBackend()
+    descriptions = ['Quillfeather Atelier', 'Brambleworth Supply', 'QUILLFEATHER ATELIER #0042']
+
+    first = categorize_transactions(descriptions, [-42.0, -17.25, -8.0], complete=complete, cache=cache)
+    assert complete.calls == 1
+    assert categorize_transactions(descriptions, [-42.0, -17.25, -8.0], complete=complete, cache=cache) == first
+    assert complete.calls == 1
+    assert cache.stats()['hits'] == 2
+
+
+def test_reupload_makes_no_llm_calls(backend, upload, monkeypatch):
+    # Without the result cache the second upload is parsed and categorized again
+    monkeypatch.setattr(backend, 'result_cache', None)
+    monkeypatch.setattr(backend.categorizer, 'classifier', None)
+    stub = backend.llm_executor.backend
+
+    calls = stub.calls
+    first = upload([('may.csv', STATEMENT)], query='?insights=defer')
+    assert stub.calls > calls
+
+    calls = stub.calls
+    second = upload([('may.csv', STATEMENT)], query='?insights=defer')
+    assert stub.calls == calls
+    assert second['transactions_by_category'] == first['transactions_by_category']
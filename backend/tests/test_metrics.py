@@ -0,0 +1,84 @@
+import io
+import re
+
+from metrics import PROMETHEUS_CONTENT_TYPE, Registry, end_trace, span, start_trace
+
+STATEMENT = ('Date,Description,Amount\n'
+             '2024-07-01,Rent,-1000.00\n'
+             '2024-07-02,Coffee Shop,-4.50\n'
+             '2024-07-09,Grocery Outlet,-86.10\n'
+             '2024-07-15,Payroll,2500.00\n')
+UPLOAD_SECONDS = 'morelife_http_request_seconds_count{endpoint="/api/upload",method="POST",status="200"}'
+
+
+def scrape(client):
+    """Samples of a /metrics scrape by series name and labels."""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == PROMETHEUS_CONTENT_TYPE
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            samples[series] = float(value)
+    return samples
+
+
+def post(client, name, headers=None):
+    return client.post('/api/upload?insights=defer', headers=headers or {},
+                       data={'files': [(io.BytesIO(STATEMENT.encode()), name)]}, content_type='multipart/form-data')
+
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = Registry()
+    rows = registry.counter('rows_total', 'Rows seen.', ['stage'])
+    seconds = registry.histogram('stage_seconds', 'Stage time.', ['stage'], buckets=(0.1, 1.0))
+    registry.callback('broken', 'Raises on scrape.', lambda: 1 / 0)
+    rows.inc(3, stage='parse')
+    rows.inc(2, stage='parse')
+    seconds.observe(0.5, stage='say "hi"')
+
+    text = registry.render()
+    assert '# TYPE rows_total counter\nrows_total{stage="parse"} 5\n' in text
+    assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 0\n' in text
+    assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="1.0"} 1\n' in text
+    assert 'stage_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 1\n' in text
+    assert 'stage_seconds_count{stage="say \\"hi\\""} 1\n' in text
+    assert '# broken unavailable: ZeroDivisionError' in text
+
+
+def test_metrics_count_requests_stages_and_cache_lookups(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'result_cache', None)
+    before = scrape(client)
+
+    assert post(client, 'july.csv').status_code == 200
+    after = scrape(client)
+    assert after[UPLOAD_SECONDS] == before.get(UPLOAD_SECONDS, 0) + 1
+    for stage in ('parse', 'categorize'):
+        series = f'morelife_stage_rows_total{{stage="{stage}"}}'
+        assert after[series] == before.get(series, 0) + 4
+    assert 'morelife_cache_lookups_total{cache="merchant",result="hit"}' in after
+    assert 'morelife_cache_lookups_total{cache="result",result="hit"}' not in after
+
+
+def test_profiled_requests_get_a_server_timing_header(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'result_cache', None)
+    assert 'Server-Timing' not in post(client, 'unprofiled.csv').headers
+
+    header = post(client, 'profiled.csv', headers={'X-Profile': '1'}).headers['Server-Timing']
+    entries = dict(re.match(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) rows")?$', entry).group(1, 3)
+                   for entry in header.split(', '))
+    assert entries['categorize'] == '4'
+    assert 'serialize' in entries
+    assert list(entries)[-1] == 'total'
+
+
+def test_traces_total_repeated_stages():
+    trace = start_trace()
+    for rows in (3, 4):
+        with span('categorize') as categorized:
+            categorized.rows = rows
+    assert end_trace() is trace
+    assert trace.rows == {'categorize': 7}
+    assert trace.server_timing().startswith('categorize;dur=')
+    assert 'desc="7 rows"' in trace.server_timing()
@@ -0,0 +1,47 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import pdf_extraction
+from benchmarks.synthetic import write_pdf
+from pdf_extraction import parse_amounts, parse_table, parse_text_lines
+
+
+def test_parse_amounts_signs_and_separators():
+    values = pd.Series(['$-12.00', '-$12.00', '(12.00)', '12.00-', '1,234.50', '$ -4.50', '$1,234.50', 'n/a'])
+    parsed = parse_amounts(values).tolist()
+    assert parsed[:7] == [-12.0, -12.0, -12.0, -12.0, 1234.5, -4.5, 1234.5]
+    assert pd.isna(parsed[7])
+
+
+def test_text_lines_keep_minus_after_currency_sign():
+    frame, _ = parse_text_lines(['01/05/2024 Coffee Shop $-4.50', '01/06/2024 Payroll $2,500.00'])
+    assert frame['Amount'].tolist() == [-4.5, 2500.0]
+
+
+def test_table_dates_use_one_inferred_format(caplog):
+    table = pd.DataFrame({
+        'Date': ['03/04/2024', '13/04/2024', '2024-04-20', None],
+        'Description': ['Grocery Store', 'Pharmacy', 'Cinema', 'Balance forward'],
+        'Amount': ['-12.00', '-8.50', '-15.00', '']
+    })
+    frame = parse_table(table.iloc[:2])
+    assert frame['Date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-04-03', '2024-04-13']
+
+    with caplog.at_level('WARNING', logger='pdf_extraction'):
+        frame = parse_table(table, date_format='%d/%m/%Y')
+    assert len(frame) == 2
+    assert 'Dropped 1 table rows' in caplog.text
+
+
+@pytest.mark.parametrize('table', [False, True])
+def test_pdf_date_format_is_settled_once_per_statement(tmp_path, monkeypatch, table):
+    # The first page range only holds days 1-12, which read as MM/DD as well as DD/MM
+    rows = [(date(2024, 1, day), f'Grocery Store #{day}', -10.0 - day) for day in range(1, 29)]
+    path = str(tmp_path / 'statement.pdf')
+    write_pdf(path, rows, rows_per_page=6, table=table, date_format='%d/%m/%Y')
+    monkeypatch.setattr(pdf_extraction, 'PAGES_PER_TASK', 2)
+
+    frame = pdf_extraction.extract_pdf_frame(path, parallel=False)
+    assert frame['Date'].tolist() == [pd.Timestamp(day) for day, _, _ in rows]
@@ -0,0 +1,141 @@
+import threading
+import time
+import types
+
+import pytest
+
+import prompt_cache
+from prompt_cache import PromptCache, prompt_fingerprint
+
+MESSAGES = [{'role': 'user', 'content': 'Summarize my spending'}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test moves by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(prompt_cache, 'time', types.SimpleNamespace(monotonic=lambda: now[0],
+                                                                     perf_counter=time.perf_counter))
+    return now
+
+
+def test_fingerprint_covers_every_sampling_parameter():
+    key = prompt_fingerprint(MESSAGES, 0.7, 500)
+    assert key == prompt_fingerprint([dict(message) for message in MESSAGES], 0.7, 500)
+    assert key != prompt_fingerprint(MESSAGES, 0.2, 500)
+    assert key != prompt_fingerprint(MESSAGES, 0.7, 400)
+    assert key != prompt_fingerprint(MESSAGES, 0.7, 500, model='another-model')
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PromptCache(ttl_seconds=60)
+    calls = []
+
+    def complete():
+        calls.append(clock[0])
+        return f"reply {len(calls)}"
+
+    assert cache.get_or_call('key', complete) == 'reply 1'
+    clock[0] += 59
+    assert cache.get_or_call('key', complete) == 'reply 1'
+    clock[0] += 1
+    assert cache.get('key') is None
+    assert cache.get_or_call('key', complete) == 'reply 2'
+    assert len(calls) == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PromptCache(max_entries=2)
+    cache.put('old', 'a')
+    cache.put('kept', 'b')
+    cache.get('old')
+    cache.put('new', 'c')
+    assert cache.get('kept') is None
+    assert cache.get('old') == 'a'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_disabled_cache_still_calls_every_time():
+    cache = PromptCache(ttl_seconds=0)
+    assert cache.get_or_call('key', lambda: 'first') == 'first'
+    assert cache.get_or_call('key', lambda: 'second') == 'second'
+
+
+def run_concurrently(cache, call, callers):
+    """Start ``callers`` threads on ``call``, returning once all but the leader are waiting on it."""
+    results = [None] * callers
+    errors = [None] * callers
+
+    def worker(i):
+        try:
+            results[i] = call()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < callers - 1:
+        assert time.monotonic() < deadline, cache.stats()
+        time.sleep(0.001)
+    return threads, results, errors
+
+
+def test_concurrent_identical_requests_share_one_call():
+    cache = PromptCache()
+    release = threading.Event()
+    calls = []
+
+    def complete():
+        calls.append(1)
+        release.wait(5)
+        return 'shared reply'
+
+    threads, results, errors = run_concurrently(cache, lambda: cache.get_or_call('key', complete), 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ['shared reply'] * 5
+    assert errors == [None] * 5
+    stats = cache.stats()
+    assert (stats['misses'], stats['coalesced'], stats['inflight']) == (1, 4, 0)
+    assert cache.get_or_call('key', complete) == 'shared reply'
+
+
+def test_waiters_get_the_leaders_error_and_nothing_is_cached():
+    cache = PromptCache()
+    release = threading.Event()
+
+    def complete():
+        release.wait(5)
+        raise RuntimeError('rate limited')
+
+    threads, results, errors = run_concurrently(cache, lambda: cache.get_or_call('key', complete), 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [str(error) for error in errors] == ['rate limited'] * 3
+    assert cache.get('key') is None
+
+
+def test_streams_are_coalesced_into_the_whole_text():
+    cache = PromptCache()
+    release = threading.Event()
+
+    def chunks():
+        yield 'Spending '
+        release.wait(5)
+        yield 'is up.'
+
+    threads, results, errors = run_concurrently(cache, lambda: list(cache.stream('key', chunks)), 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [['Spending ', 'is up.'], ['Spending is up.'], ['Spending is up.']]
+    assert list(cache.stream('key', chunks)) == ['Spending is up.']
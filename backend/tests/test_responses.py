@@ -0,0 +1,87 @@
+import gzip
+import io
+
+import pytest
+
+from responses import ARROW_STREAM_TYPE, brotli
+from result_cache import ResultCache
+
+pytestmark = pytest.mark.skipif(not ResultCache.available(), reason='pyarrow is not installed')
+
+STATEMENT = ('Date,Description,Amount\n'
+             + ''.join(f'2024-03-{day:02d},Corner Market {n},-{n}.{day:02d}\n'
+                       for day in range(1, 29) for n in range(1, 10))
+             + '2024-03-29,Payroll,2500.00\n')
+EXPENSE_ROWS = 28 * 9
+
+
+@pytest.fixture
+def result_url(upload):
+    body = upload([('march.csv', STATEMENT)], query='?view=summary&insights=defer')
+    assert 'transactions_by_category' not in body
+    assert sum(body['category_counts'].values()) == EXPENSE_ROWS
+    return body['transactions_url']
+
+
+def test_cursor_pages_cover_every_row_once(client, result_url):
+    rows, cursor, pages = [], None, 0
+    while True:
+        query = f"?limit=100&cursor={cursor}" if cursor else '?limit=100'
+        body = client.get(result_url + query).get_json()
+        assert body['total'] == EXPENSE_ROWS
+        rows.extend(body['transactions'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len({(row['Date'], row['Description'], row['Amount']) for row in rows}) == EXPENSE_ROWS
+    assert client.get(result_url + '?cursor=not-a-cursor').status_code == 400
+    assert client.get(result_url + '?limit=0').status_code == 400
+
+
+def test_formats_return_the_same_page(client, result_url):
+    records = client.get(result_url + '?limit=50').get_json()
+    columns = client.get(result_url + '?limit=50&format=columns').get_json()
+    assert columns['next_cursor'] == records['next_cursor']
+    assert set(columns['transactions']['columns']) == set(records['transactions'][0])
+    assert columns['transactions']['data']['Amount'] == [row['Amount'] for row in records['transactions']]
+
+    import pyarrow as pa
+
+    response = client.get(result_url + '?limit=50&format=arrow')
+    assert response.mimetype == ARROW_STREAM_TYPE
+    assert response.headers['X-Next-Cursor'] == records['next_cursor']
+    assert response.headers['X-Total-Count'] == str(EXPENSE_ROWS)
+    table = pa.ipc.open_stream(io.BytesIO(response.get_data())).read_all()
+    assert table.num_rows == 50
+    assert table.column('Amount').to_pylist() == [row['Amount'] for row in records['transactions']]
+
+    assert client.get(result_url + '?format=xml').status_code == 400
+
+
+def test_responses_use_the_best_accepted_encoding(client, result_url):
+    plain = client.get(result_url + '?limit=200')
+    assert 'Content-Encoding' not in plain.headers
+
+    gzipped = client.get(result_url + '?limit=200', headers={'Accept-Encoding': 'gzip'})
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    assert gzip.decompress(gzipped.get_data()) == plain.get_data()
+
+    # q-values win over the server's preference for br
+    preferred = client.get(result_url + '?limit=200', headers={'Accept-Encoding': 'br;q=0.5, gzip;q=1'})
+    assert preferred.headers['Content-Encoding'] == 'gzip'
+
+    # Bodies under the threshold aren't worth it
+    small = client.get(result_url + '?limit=1', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred_when_accepted(client, result_url):
+    plain = client.get(result_url + '?limit=200')
+    response = client.get(result_url + '?limit=200', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()) == plain.get_data()
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+import pytest
+
+from frames import canonical_frame
+from result_cache import ResultCache, file_digest
+
+pytestmark = pytest.mark.skipif(not ResultCache.available(), reason='pyarrow is not installed')
+
+STATEMENT = ('Date,Description,Amount\n'
+             '2024-06-01,Rent,-1000.00\n'
+             '2024-06-02,Coffee Shop,-4.50\n'
+             '2024-06-15,Payroll,2500.00\n')
+
+
+def test_frames_round_trip_by_content_hash(tmp_path):
+    path = tmp_path / 'statement.csv'
+    path.write_text(STATEMENT)
+    frame = canonical_frame(pd.read_csv(path, parse_dates=['Date']).assign(Category=['Housing', 'Food & Dining',
+                                                                                     'Income']))
+    cache = ResultCache(str(tmp_path / 'results'))
+    digest = file_digest(str(path))
+
+    assert cache.get_frame(digest) is None
+    cache.put_frame(digest, frame)
+    cached = cache.get_frame(digest)
+    pd.testing.assert_frame_equal(cached, frame)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path / 'results'), max_bytes=250)
+    for i, key in enumerate(['old', 'kept', 'new']):
+        cache.put_json(key, {'padding': 'x' * 100})
+        os.utime(cache._path(key, 'json'), (i, i))
+        if key == 'kept':
+            cache.get_json('kept')
+    cache.put_json('newest', {'padding': 'x' * 100})
+    assert cache.get_json('old') is None
+    assert cache.get_json('kept') is not None
+
+
+def test_cache_hit_skips_parsing_and_categorization(backend, upload, monkeypatch):
+    first = upload([('june.csv', STATEMENT)], query='?insights=defer')
+
+    def fail(work, *args, **kwargs):
+        if len(work):
+            raise AssertionError('a cached file was parsed or categorized again')
+        return []
+
+    monkeypatch.setattr(backend, 'parse_statements', fail)
+    monkeypatch.setattr(backend, 'process_file_streaming', fail)
+    monkeypatch.setattr(backend, 'categorize_frame', fail)
+
+    # Same bytes under another name
+    second = upload([('june-again.csv', STATEMENT)], query='?insights=defer')
+    assert second['transactions_by_category'] == first['transactions_by_category']
+    assert second['processed_files'] == ['june-again.csv']
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from schema_cache import apply_layout, detect_layout
+
+DEBIT_CREDIT_CSV = ('Date,Description,Debit Amount,Credit Amount\n'
+                    '01/05/2024,Rent,1200.00,\n'
+                    '01/15/2024,Payroll,,3000.00\n')
+
+
+def test_debit_and_credit_amount_headers_map_to_a_pair():
+    sample = pd.DataFrame({'Date': ['01/05/2024', '01/15/2024'], 'Description': ['Rent', 'Payroll'],
+                           'Debit Amount': ['1200.00', None], 'Credit Amount': [None, '3000.00']})
+    layout = detect_layout(sample.columns, sample)
+    assert (layout['amount'], layout['debit'], layout['credit']) == (None, 'Debit Amount', 'Credit Amount')
+    assert apply_layout(sample, layout)['Amount'].tolist() == [-1200.0, 3000.0]
+
+
+def test_signed_amount_column_without_a_pair():
+    sample = pd.DataFrame({'Date': ['2024-01-05'], 'Description': ['Rent'], 'Amount': ['-1200.00']})
+    layout = detect_layout(sample.columns, sample)
+    assert (layout['amount'], layout['debit'], layout['credit']) == ('Amount', None, None)
+
+
+def test_debit_credit_amount_upload(upload):
+    body = upload([('debit-credit.csv', DEBIT_CREDIT_CSV)])
+    assert [row['Amount'] for row in body['category_data']] == [1200.0]
+    assert body['insights']['monthly_spending']['2024-01']['Income'] == 3000.0
@@ -0,0 +1,101 @@
+import sqlite3
+
+import pandas as pd
+
+from frames import canonical_frame
+from transaction_store import TransactionStore
+
+JANUARY = ('Date,Description,Amount\n'
+           '2024-01-01,Rent,-1000.00\n'
+           '2024-01-03,Coffee Shop,-4.50\n')
+JANUARY_TO_FEBRUARY = ('Date,Description,Amount\n'
+                       '2024-01-03,Coffee Shop,-4.50\n'
+                       '2024-02-01,Rent,-1000.00\n')
+# Two identical coffees on one day, split across chunks when streamed two rows at a time
+REPEATS = ('Date,Description,Amount\n'
+           '2024-03-01,Rent,-1000.00\n'
+           '2024-03-02,Coffee Shop,-4.50\n'
+           '2024-03-02,Coffee Shop,-4.50\n')
+
+
+def categorized(rows):
+    return canonical_frame(pd.DataFrame(rows, columns=['Date', 'Description', 'Amount', 'Category'])
+                           .assign(Date=lambda df: pd.to_datetime(df['Date'])))
+
+
+def test_repeat_counts_carry_across_chunks():
+    frame = categorized([('2024-03-02', 'Coffee Shop', -4.5, 'Food & Dining')] * 3)
+    whole, chunked = TransactionStore(':memory:'), TransactionStore(':memory:')
+    whole.add('u', frame)
+    seen = {}
+    for start in range(3):
+        chunked.add('u', frame.iloc[start:start + 1], seen=seen)
+    assert chunked.row_count('u') == whole.row_count('u') == 3
+    # The same file again adds nothing
+    assert chunked.add('u', frame, seen={}) == 0
+
+
+def test_overlapping_files_in_one_upload_match_separate_uploads(backend, upload):
+    together = upload([('january.csv', JANUARY), ('january-february.csv', JANUARY_TO_FEBRUARY)],
+                      query='?history=1')['history_token']
+    apart = upload([('january.csv', JANUARY)], query='?history=1')['history_token']
+    upload([('january-february.csv', JANUARY_TO_FEBRUARY)], history_token=apart)
+
+    store = backend.transaction_store
+    together, apart = store.resolve_token(together), store.resolve_token(apart)
+    assert store.row_count(together) == store.row_count(apart) == 3
+    assert store.category_data(together) == store.category_data(apart)
+
+
+def test_streamed_repeats_straddling_a_chunk_boundary_are_kept(backend, upload, monkeypatch):
+    monkeypatch.setattr(backend, 'STREAM_CHUNK_SIZE', 2)
+    streamed = upload([('repeats.csv', REPEATS)], query='?stream=1&history=1')['history_token']
+    whole = upload([('repeats.csv', REPEATS)], query='?history=1')['history_token']
+
+    store = backend.transaction_store
+    streamed, whole = store.resolve_token(streamed), store.resolve_token(whole)
+    assert store.row_count(streamed) == store.row_count(whole) == 3
+    assert store.category_data(streamed) == store.category_data(whole)
+
+
+def test_amounts_and_rollups_are_integer_cents():
+    store = TransactionStore(':memory:')
+    store.add('u', categorized([(f'2024-03-{day:02d}', 'Coffee Shop', -0.1, 'Food & Dining') for day in range(1, 11)]))
+    # Ten float dimes sum to 0.9999999999999999
+    assert store.category_data('u') == [{'Category': 'Food & Dining', 'Amount': 1.0}]
+    assert store.monthly_spending('u') == {'2024-03': {'Food & Dining': 1.0}}
+    assert store.transactions_frame('u')['Amount'].tolist() == [-0.1] * 10
+    types = store._conn.execute(
+        "SELECT DISTINCT typeof(amount) FROM transactions UNION SELECT DISTINCT typeof(total) FROM category_totals"
+    ).fetchall()
+    assert types == [('integer',)]
+
+
+def test_dollar_store_is_migrated_to_cents(tmp_path):
+    path = str(tmp_path / 'transactions.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE transactions (user_id TEXT NOT NULL, txn_key TEXT NOT NULL, date TEXT NOT NULL, "
+        "month TEXT NOT NULL, description TEXT NOT NULL, amount REAL NOT NULL, category TEXT NOT NULL, "
+        "PRIMARY KEY (user_id, txn_key)) WITHOUT ROWID;"
+        "CREATE INDEX transactions_by_category ON transactions (user_id, category, date);"
+        "CREATE TABLE category_totals (user_id TEXT NOT NULL, category TEXT NOT NULL, total REAL NOT NULL, "
+        "PRIMARY KEY (user_id, category)) WITHOUT ROWID;"
+        "CREATE TABLE monthly_totals (user_id TEXT NOT NULL, month TEXT NOT NULL, category TEXT NOT NULL, "
+        "total REAL NOT NULL, PRIMARY KEY (user_id, month, category)) WITHOUT ROWID;"
+        "CREATE TABLE users (user_id TEXT PRIMARY KEY, row_count INTEGER NOT NULL, updated_at REAL NOT NULL);"
+        "INSERT INTO transactions VALUES ('u', '2024-03-01|-1234|coffee shop#0', '2024-03-01', '2024-03', "
+        "'Coffee Shop', -12.34, 'Food & Dining');"
+        "INSERT INTO category_totals VALUES ('u', 'Food & Dining', 12.34);"
+        "INSERT INTO monthly_totals VALUES ('u', '2024-03', 'Food & Dining', 12.34);"
+        "INSERT INTO users VALUES ('u', 1, 0);"
+    )
+    conn.close()
+
+    store = TransactionStore(path)
+    assert store.category_data('u') == [{'Category': 'Food & Dining', 'Amount': 12.34}]
+    assert store.monthly_spending('u') == {'2024-03': {'Food & Dining': 12.34}}
+    assert store.high_ticket_items('u') == []
+    # The migrated row still dedups against the same statement
+    assert store.add('u', categorized([('2024-03-01', 'Coffee Shop', -12.34, 'Food & Dining')])) == 0
+    assert TransactionStore(path).category_data('u') == [{'Category': 'Food & Dining', 'Amount': 12.34}]
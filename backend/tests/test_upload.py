@@ -0,0 +1,7 @@
+def test_minus_after_currency_sign_stays_an_expense(upload):
+    body = upload([('statement.csv', 'Date,Description,Amount\n'
+                                     '2024-01-01,Rent,"$-1,200.00"\n'
+                                     '2024-01-02,Payroll,"$3,000.00"\n')])
+    assert [row['Amount'] for row in body['category_data']] == [1200.0]
+    assert body['category_data'][0]['Category'] != 'Income'
+    assert body['insights']['monthly_spending']['2024-01']['Income'] == 3000.0
@@ -0,0 +1,319 @@
+import hashlib
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from aggregation import HIGH_TICKET_THRESHOLD, TRANSACTION_COLUMNS, frame_records
+from frames import CENTS, to_dollars
+from merchant_cache import normalize_description
+
+logger = logging.getLogger(__name__)
+
+# Bumped when stored values change meaning; 2 stores amounts and totals as integer cents
+SCHEMA_VERSION = 2
+
+# Amounts are whole cents, the same as the canonical frame, so the rollups are integer sums
+HIGH_TICKET_CENTS = HIGH_TICKET_THRESHOLD * CENTS
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS transactions ("
+    "user_id TEXT NOT NULL, txn_key TEXT NOT NULL, date TEXT NOT NULL, month TEXT NOT NULL, "
+    "description TEXT NOT NULL, amount INTEGER NOT NULL, category TEXT NOT NULL, "
+    "PRIMARY KEY (user_id, txn_key)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS transactions_by_category ON transactions (user_id, category, date)",
+    # Partial index so high-ticket lookups never scan the rest of the history
+    "CREATE INDEX IF NOT EXISTS transactions_high_ticket ON transactions (user_id, date) "
+    f"WHERE abs(amount) > {HIGH_TICKET_CENTS} AND category != 'Income'",
+    "CREATE TABLE IF NOT EXISTS category_totals ("
+    "user_id TEXT NOT NULL, category TEXT NOT NULL, total INTEGER NOT NULL, "
+    "PRIMARY KEY (user_id, category)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS monthly_totals ("
+    "user_id TEXT NOT NULL, month TEXT NOT NULL, category TEXT NOT NULL, total INTEGER NOT NULL, "
+    "PRIMARY KEY (user_id, month, category)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS users ("
+    "user_id TEXT PRIMARY KEY, row_count INTEGER NOT NULL, updated_at REAL NOT NULL)",
+    # Bearer tokens the server handed out, stored hashed, each owning one history
+    "CREATE TABLE IF NOT EXISTS history_tokens ("
+    "token_hash TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL NOT NULL) WITHOUT ROWID",
+]
+
+
+# Version 1 stores held REAL dollars; their tables are renamed aside and copied over as cents
+_DOLLAR_TABLES = {
+    'transactions': "user_id, txn_key, date, month, description, CAST(round(amount * 100) AS INTEGER), category",
+    'category_totals': "user_id, category, CAST(round(total * 100) AS INTEGER)",
+    'monthly_totals': "user_id, month, category, CAST(round(total * 100) AS INTEGER)",
+}
+
+
+def _migrate_to_cents(conn: sqlite3.Connection) -> None:
+    for table in _DOLLAR_TABLES:
+        conn.execute(f"ALTER TABLE {table} RENAME TO {table}_dollars")
+    # The indexes moved with the renamed table but kept their names
+    conn.execute("DROP INDEX IF EXISTS transactions_by_category")
+    conn.execute("DROP INDEX IF EXISTS transactions_high_ticket")
+    for statement in _SCHEMA:
+        conn.execute(statement)
+    for table, columns in _DOLLAR_TABLES.items():
+        conn.execute(f"INSERT INTO {table} SELECT {columns} FROM {table}_dollars")
+        conn.execute(f"DROP TABLE {table}_dollars")
+    logger.info("Migrated the transaction store from dollars to integer cents")
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def transaction_keys(df: pd.DataFrame, seen: Optional[Dict[str, int]] = None) -> pd.Series:
+    """Dedup key per row of a canonical frame: date, amount in cents and normalized description.
+
+    Identical rows within one statement file (two coffees on the same day) are
+    told apart by their occurrence number, so re-uploading a statement adds
+    nothing while genuine repeats inside it are kept. Occurrences are counted
+    per file: pass the same ``seen`` dict for every chunk of a file so the
+    count carries across chunk boundaries (it is updated in place).
+    """
+    descriptions = df['Description'].astype(str)
+    normalized = {description: normalize_description(description) for description in descriptions.unique()}
+    base = (
+        df['Date'].dt.strftime('%Y-%m-%d') + '|'
+        + df['Amount'].astype('int64').astype(str) + '|'
+        + descriptions.map(normalized)
+    )
+    occurrence = base.groupby(base).cumcount()
+    if seen is not None:
+        occurrence += base.map(seen).fillna(0).astype('int64')
+        for key, count in base.value_counts().items():
+            seen[key] = seen.get(key, 0) + count
+    return base + '#' + occurrence.astype(str)
+
+
+class TransactionStore:
+    """Per-user categorized transaction history in SQLite.
+
+    Uploads append only rows not already stored (deduplicated on
+    ``transaction_keys``), and the category and monthly rollups are updated
+    from those new rows alone, so adding a month to a long history costs
+    O(new rows) rather than O(history). Amounts and rollups are integer
+    cents, like the canonical frame, and become dollars only when read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # One writer at a time, so two workers opening an old store don't both migrate it
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            existing = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions'"
+            ).fetchone()
+            if existing and version < SCHEMA_VERSION:
+                _migrate_to_cents(self._conn)
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+
+    def add(self, user_id: str, df: pd.DataFrame, seen: Optional[Dict[str, int]] = None) -> int:
+        """Store a categorized frame's new rows and fold them into the rollups; returns rows added.
+
+        ``df`` must be one whole statement file, or one chunk of it with the
+        file's ``seen`` counts (see ``transaction_keys``); never several files
+        concatenated.
+        """
+        if df.empty:
+            return 0
+        rows = zip(
+            transaction_keys(df, seen).tolist(),
+            df['Date'].dt.strftime('%Y-%m-%d').tolist(),
+            df['Date'].dt.strftime('%Y-%m').tolist(),
+            df['Description'].astype(str).tolist(),
+            df['Amount'].astype('int64').tolist(),
+            df['Category'].astype(str).tolist()
+        )
+        with self._lock:
+            conn = self._conn
+            try:
+                conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS staging ("
+                    "txn_key TEXT PRIMARY KEY, date TEXT, month TEXT, description TEXT, amount INTEGER, category TEXT)"
+                )
+                conn.execute("DELETE FROM staging")
+                conn.executemany("INSERT OR IGNORE INTO staging VALUES (?, ?, ?, ?, ?, ?)", rows)
+                # Keep only the delta; each check is a primary-key lookup
+                conn.execute(
+                    "DELETE FROM staging WHERE EXISTS ("
+                    "SELECT 1 FROM transactions t WHERE t.user_id = ? AND t.txn_key = staging.txn_key)",
+                    (user_id,)
+                )
+                added = conn.execute("SELECT COUNT(*) FROM staging").fetchone()[0]
+                if added:
+                    conn.execute(
+                        "INSERT INTO transactions (user_id, txn_key, date, month, description, amount, category) "
+                        "SELECT ?, txn_key, date, month, description, amount, category FROM staging",
+                        (user_id,)
+                    )
+                    conn.execute(
+                        "INSERT INTO category_totals (user_id, category, total) "
+                        "SELECT ?, category, SUM(-amount) FROM staging WHERE amount < 0 GROUP BY category "
+                        "ON CONFLICT (user_id, category) DO UPDATE SET total = total + excluded.total",
+                        (user_id,)
+                    )
+                    conn.execute(
+                        "INSERT INTO monthly_totals (user_id, month, category, total) "
+                        "SELECT ?, month, category, SUM(abs(amount)) FROM staging WHERE true GROUP BY month, category "
+                        "ON CONFLICT (user_id, month, category) DO UPDATE SET total = total + excluded.total",
+                        (user_id,)
+                    )
+                    conn.execute(
+                        "INSERT INTO users (user_id, row_count, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT (user_id) DO UPDATE SET row_count = row_count + excluded.row_count, "
+                        "updated_at = excluded.updated_at",
+                        (user_id, added, time.time())
+                    )
+                conn.execute("DELETE FROM staging")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        logger.info(f"Stored {added} new of {len(df)} transactions for user {user_id}")
+        return added
+
+    def issue_token(self) -> str:
+        """Start a new history and return the bearer token that identifies its owner.
+
+        Histories are only ever looked up through ``resolve_token``, so a caller
+        can't reach one by naming its user id.
+        """
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._conn.execute("INSERT INTO history_tokens (token_hash, user_id, created_at) VALUES (?, ?, ?)",
+                               (_token_hash(token), uuid.uuid4().hex, time.time()))
+            self._conn.commit()
+        return token
+
+    def resolve_token(self, token: Optional[str]) -> Optional[str]:
+        """The user id a token from ``issue_token`` belongs to, or None for anything else."""
+        if not token:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT user_id FROM history_tokens WHERE token_hash = ?",
+                                     (_token_hash(token),)).fetchone()
+        return row[0] if row else None
+
+    def row_count(self, user_id: str) -> int:
+        """Rows stored for a user; changes whenever the rollups do."""
+        with self._lock:
+            row = self._conn.execute("SELECT row_count FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def aggregates(self, user_id: str, max_rows_per_category: Optional[int] = None) -> 'StoredAggregates':
+        return StoredAggregates(self, user_id, max_rows_per_category)
+
+    def category_data(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT category, total FROM category_totals WHERE user_id = ? ORDER BY category", (user_id,)
+            ).fetchall()
+        totals = to_dollars([total for _, total in rows]).tolist()
+        return [{'Category': category, 'Amount': total} for (category, _), total in zip(rows, totals)]
+
+    def monthly_spending(self, user_id: str) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT month, category, total FROM monthly_totals WHERE user_id = ? ORDER BY month, category",
+                (user_id,)
+            ).fetchall()
+        monthly = {}
+        for (month, category, _), total in zip(rows, to_dollars([total for _, _, total in rows]).tolist()):
+            monthly.setdefault(month, {})[category] = total
+        return monthly
+
+    def transactions_by_category(self, user_id: str,
+                                 max_rows_per_category: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Most recent expenses per category, newest first, read through the category index."""
+        return {
+            category: frame_records(frame)
+            for category, frame in self._category_frames(user_id, max_rows_per_category).items()
+        }
+
+    def transactions_frame(self, user_id: str, max_rows_per_category: Optional[int] = None) -> pd.DataFrame:
+        """The same rows as ``transactions_by_category`` as one frame, ordered by category."""
+        frames = list(self._category_frames(user_id, max_rows_per_category).values())
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    def _category_frames(self, user_id: str, max_rows_per_category: Optional[int]) -> Dict[str, pd.DataFrame]:
+        limit = max_rows_per_category or -1
+        frames = {}
+        with self._lock:
+            categories = [row[0] for row in self._conn.execute(
+                "SELECT category FROM category_totals WHERE user_id = ? ORDER BY category", (user_id,)
+            )]
+            for category in categories:
+                rows = self._conn.execute(
+                    "SELECT date, description, amount, category FROM transactions "
+                    "WHERE user_id = ? AND category = ? AND amount < 0 ORDER BY date DESC LIMIT ?",
+                    (user_id, category, limit)
+                ).fetchall()
+                frame = pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
+                frame['Date'] = pd.to_datetime(frame['Date'])
+                frame['Amount'] = to_dollars(frame['Amount'])
+                frames[category] = frame
+        return frames
+
+    def high_ticket_items(self, user_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT description, abs(amount), category, date FROM transactions "
+                f"WHERE user_id = ? AND abs(amount) > {HIGH_TICKET_CENTS} AND category != 'Income' "
+                "ORDER BY date",
+                (user_id,)
+            ).fetchall()
+        amounts = to_dollars([amount for _, amount, _, _ in rows]).tolist()
+        return [
+            {'Description': description, 'Amount': amount, 'Category': category, 'Date': date}
+            for (description, _, category, date), amount in zip(rows, amounts)
+        ]
+
+
+class StoredAggregates:
+    """A user's stored history behind the same read interface as ``SpendingAggregates``."""
+
+    def __init__(self, store: TransactionStore, user_id: str, max_rows_per_category: Optional[int] = None):
+        self.store = store
+        self.user_id = user_id
+        self.max_rows_per_category = max_rows_per_category
+
+    @property
+    def row_count(self) -> int:
+        return self.store.row_count(self.user_id)
+
+    def category_data(self) -> List[Dict[str, Any]]:
+        return self.store.category_data(self.user_id)
+
+    def transactions_by_category(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.store.transactions_by_category(self.user_id, self.max_rows_per_category)
+
+    def transactions_frame(self) -> pd.DataFrame:
+        return self.store.transactions_frame(self.user_id, self.max_rows_per_category)
+
+    def monthly_spending(self) -> Dict[str, Dict[str, float]]:
+        return self.store.monthly_spending(self.user_id)
+
+    def high_ticket_items(self) -> List[Dict[str, Any]]:
+        return self.store.high_ticket_items(self.user_id)
@@ -89,20 +89,24 @@ const FinancialGoals = ({ uploadedData }) => {
         monthlyIncome: parseFloat(monthlyIncome),
         budgetGoals: goals,
         customGoals: customGoals,
+        // Lets the server analyze its stored aggregates; actualSpending is the fallback if they've expired
+        resultId: uploadedData.result_id,
         actualSpending: {
           categoryData: uploadedData.category_data,
+          monthlySpending: uploadedData.insights?.monthly_spending,
           currentSpending: currentSpending,
           totalSpending: totalSpending
         }
       };
-
-      const response = await fetch('http://localhost:5000/api/analyze-goals', {
+      const request = {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify(goalData)
-      });
+      };
+
+      const response = await fetch('http://localhost:5000/api/analyze-goals', request);
 
       if (!response.ok) {
         throw new Error('Failed to analyze goals');
@@ -111,6 +115,15 @@ const FinancialGoals = ({ uploadedData }) => {
       const analysisResult = await response.json();
       setAnalysis(analysisResult);
       setStep(step + 1);
+
+      // The numbers don't wait on the model; the recommendations text is fetched separately
+      fetch('http://localhost:5000/api/analyze-goals?narrative=1', request)
+        .then((narrativeResponse) => (narrativeResponse.ok ? narrativeResponse.json() : null))
+        .catch(() => null)
+        .then((narrative) => setAnalysis((current) => ({
+          ...current,
+          recommendations: narrative?.recommendations || ''
+        })));
     } catch (err) {
       setError(err.message);
     } finally {
@@ -360,7 +373,8 @@ const FinancialGoals = ({ uploadedData }) => {
             AI Recommendations
           </Typography>
           <Box sx={{ mt: 2 }}>
-            {analysis.recommendations.split('\n').map((section, index) => {
+            {analysis.recommendations === null && <CircularProgress size={24} />}
+            {(analysis.recommendations || '').split('\n').map((section, index) => {
               if (section.trim().startsWith('1. Budget Analysis')) {
                 return (
                   <Box key={index} sx={{ mb: 3 }}>